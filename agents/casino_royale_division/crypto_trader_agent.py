@@ -9,6 +9,14 @@ from utils.market_indicators import compute_indicators
 from utils.strategy import BaseStrategy, TradeAction
 from utils.memory import TradeMemory
 from utils.agents import TradeJournalAgent, RiskManagerAgent, TransactionLedgerAgent
+from utils.instrumentation import span, profile_cycle
+from utils.bar_aggregator import BarAggregator, TIMEFRAME_SECONDS, BASE_TIMEFRAME
+
+AGENT_NAME = "CryptoTraderAgent"
+
+# 1-minute bars pulled per symbol on every cycle after the warm-up. The warm-up is sized
+# per timeframe: enough minutes to close `limit` bars (at most a full ring) plus the forming one.
+REFRESH_BARS = 120
 
 # Stubbed KrakenBroker for trade execution (replace with real implementation)
 class KrakenBroker:
@@ -54,6 +62,8 @@ class CryptoTraderAgent:
         simulation_mode: bool = True,
         min_data_points: int = 50,
         sarcasm_fallbacks=None,
+        bar_aggregator: BarAggregator = None,
+        sector_risk=None,
     ):
         self.broker = broker
         self.strategy = strategy
@@ -64,28 +74,50 @@ class CryptoTraderAgent:
         self.simulation_mode = simulation_mode
         self.min_data_points = min_data_points
         self.sarcasm_fallbacks = sarcasm_fallbacks or SARCASM_FALLBACKS
-        self.logger = logging.getLogger("CryptoTraderAgent")
+        self.logger = logging.getLogger(AGENT_NAME)
+        # 1m bars stream into every timeframe at once; indicators update on bar close
+        self.bar_aggregator = bar_aggregator or BarAggregator()
+        # Casino RiskManagerAgent: sector locks and loss limits checked right before each live order
+        self.sector_risk = sector_risk
 
     def fetch_market_data(self, symbol, timeframe='1h', limit=100):
         """
-        Fetch OHLCV data for the given symbol.
-        This should be implemented to fetch from a real data provider.
+        Fetch OHLCV data for the given symbol at the requested timeframe.
+
+        The broker is polled for 1-minute bars only: a warm-up window the first time a
+        symbol is seen, then a short overlapping window each cycle. New bars are pushed
+        through the aggregator, and the timeframe's closed bars come from its ring buffer.
         """
-        # Placeholder: replace with real data fetching logic
         # Return list of dicts: [{'timestamp': ..., 'open': ..., 'high': ..., 'low': ..., 'close': ..., 'volume': ...}, ...]
-        return []
+        if not hasattr(self.broker, 'fetch_ohlcv'):
+            # Placeholder: replace with real data fetching logic
+            return []
+        if timeframe not in self.bar_aggregator.timeframes:
+            return self.broker.fetch_ohlcv(symbol, limit)
+
+        if self.bar_aggregator.last_timestamp(symbol) is None:
+            ratio = TIMEFRAME_SECONDS[timeframe] // TIMEFRAME_SECONDS[BASE_TIMEFRAME]
+            request = (min(limit, self.bar_aggregator.capacity) + 1) * ratio
+        else:
+            request = REFRESH_BARS
+        bars = self.broker.fetch_ohlcv(symbol, request)
+        self.bar_aggregator.on_bars(symbol, bars or [])
+        return self.bar_aggregator.candles(symbol, timeframe, limit)
 
     def analyze_market(self, symbol, timeframe='1h', limit=100):
         """
         Fetch and compute indicators for the given symbol.
         """
         try:
-            ohlcv = self.fetch_market_data(symbol, timeframe, limit)
+            with span(AGENT_NAME, "data_fetch", symbol):
+                ohlcv = self.fetch_market_data(symbol, timeframe, limit)
             if not ohlcv or len(ohlcv) < self.min_data_points:
                 msg = random.choice(self.sarcasm_fallbacks)
                 self.logger.warning(f"Insufficient data for {symbol}: {msg}")
                 return None, msg
-            indicators = compute_indicators(ohlcv)
+            with span(AGENT_NAME, "indicators", symbol):
+                # Aggregated timeframes keep their indicators current on every bar close
+                indicators = self.bar_aggregator.indicators(symbol, timeframe) or compute_indicators(ohlcv)
             return indicators, None
         except Exception as e:
             msg = random.choice(self.sarcasm_fallbacks)
@@ -97,7 +129,8 @@ class CryptoTraderAgent:
         Use the strategy to decide on a trade action.
         """
         try:
-            action, confidence, rationale = self.strategy.decide(symbol, indicators)
+            with span(AGENT_NAME, "decide", symbol):
+                action, confidence, rationale = self.strategy.decide(symbol, indicators)
             return action, confidence, rationale
         except Exception as e:
             msg = f"Strategy error: {e}"
@@ -113,7 +146,7 @@ class CryptoTraderAgent:
                 # Simulate execution
                 execution = {
                     'symbol': symbol,
-                    'side': action.value,
+                    'side': action,
                     'qty': qty,
                     'order_type': 'market',
                     'status': 'filled',
@@ -121,7 +154,7 @@ class CryptoTraderAgent:
                     'simulated': True
                 }
             else:
-                execution = self.broker.submit_order(symbol, action.value, qty)
+                execution = self.broker.submit_order(symbol, action, qty)
             return execution
         except Exception as e:
             msg = f"Broker execution error: {e}"
@@ -148,7 +181,8 @@ class CryptoTraderAgent:
         action, confidence, rationale = self.decide_trade(symbol, indicators)
 
         # 3. Risk management veto
-        vetoed, risk_reason = self.risk_manager.veto(symbol, action, indicators, rationale)
+        with span(AGENT_NAME, "risk", symbol):
+            vetoed, risk_reason = self.risk_manager.veto(symbol, action, indicators, rationale)
         if vetoed:
             rationale['risk_veto'] = risk_reason
             self.trade_journal.log(symbol, action="VETOED", rationale=rationale)
@@ -162,15 +196,35 @@ class CryptoTraderAgent:
 
         # 4. Execute trade if not HOLD
         if action != TradeAction.HOLD:
-            execution = self.execute_trade(symbol, action, qty)
+            live = self.sector_risk is not None and not self.simulation_mode
+            if live:
+                # Right before submit, so a lock placed mid-cycle (kill switch, loss limit) stops the order
+                with span(AGENT_NAME, "risk", symbol):
+                    approved, risk_reason = self.sector_risk.check_trade(symbol, qty, indicators.get('close'), action)
+                if not approved:
+                    rationale['risk_veto'] = risk_reason
+                    self.trade_journal.log(symbol, action="VETOED", rationale=rationale)
+                    return {
+                        "symbol": symbol,
+                        "action": "VETOED",
+                        "confidence": confidence,
+                        "rationale": rationale,
+                        "status": "vetoed"
+                    }
+            with span(AGENT_NAME, "order", symbol):
+                execution = self.execute_trade(symbol, action, qty)
             if execution.get('status') == 'filled':
+                if live:
+                    self.sector_risk.log_trade(action, symbol, execution.get('qty', qty),
+                                               execution.get('fill_price') or indicators.get('close'))
                 # 5. Update memory and ledger
-                self.trade_memory.record_trade(symbol, action, qty, execution)
-                self.transaction_ledger.record_execution(symbol, action, qty, execution)
-                self.trade_journal.log(symbol, action=action.value, rationale=rationale)
+                with span(AGENT_NAME, "persist", symbol):
+                    self.trade_memory.record_trade(symbol, {"action": action, "qty": qty, "execution": execution})
+                    self.transaction_ledger.record_execution(symbol, action, qty, execution)
+                    self.trade_journal.log(symbol, action=action, rationale=rationale)
                 return {
                     "symbol": symbol,
-                    "action": action.value,
+                    "action": action,
                     "confidence": confidence,
                     "rationale": rationale,
                     "status": "executed",
@@ -181,7 +235,7 @@ class CryptoTraderAgent:
                 self.trade_journal.log(symbol, action="FAILED", rationale=rationale)
                 return {
                     "symbol": symbol,
-                    "action": action.value,
+                    "action": action,
                     "confidence": confidence,
                     "rationale": rationale,
                     "status": "failed",
@@ -203,27 +257,29 @@ class CryptoTraderAgent:
         Run trading logic for a list of symbols.
         """
         results = []
-        for symbol in symbols:
-            try:
-                result = self.trade(symbol, timeframe, limit, qty)
-                results.append(result)
-            except Exception as e:
-                msg = f"Critical error trading {symbol}: {e}"
-                self.logger.error(msg)
-                self.trade_journal.log(symbol, action="ERROR", rationale={"error": msg})
-                results.append({
-                    "symbol": symbol,
-                    "action": "ERROR",
-                    "confidence": 0.0,
-                    "rationale": {"error": msg},
-                    "status": "error"
-                })
+        with profile_cycle(AGENT_NAME):
+            for symbol in symbols:
+                try:
+                    result = self.trade(symbol, timeframe, limit, qty)
+                    results.append(result)
+                except Exception as e:
+                    msg = f"Critical error trading {symbol}: {e}"
+                    self.logger.error(msg)
+                    self.trade_journal.log(symbol, action="ERROR", rationale={"error": msg})
+                    results.append({
+                        "symbol": symbol,
+                        "action": "ERROR",
+                        "confidence": 0.0,
+                        "rationale": {"error": msg},
+                        "status": "error"
+                    })
         return results
 
 # Example usage (to be run in main application, not here):
 # from strategy import MyRSIMomentumVolatilityStrategy
+# from utils.order_router import build_default_router
 # agent = CryptoTraderAgent(
-#     broker=KrakenBroker(api_key='...', api_secret='...', paper=True),
+#     broker=build_default_router(),  # or KrakenBroker(api_key='...', api_secret='...', paper=True)
 #     strategy=MyRSIMomentumVolatilityStrategy(),
 #     trade_memory=TradeMemory(),
 #     trade_journal=TradeJournalAgent(),
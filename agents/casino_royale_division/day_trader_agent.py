@@ -25,14 +25,20 @@ from typing import List, Dict, Any, Optional, Tuple
 # External dependencies (assumed to exist in the Shipmate platform)
 from utils.market_indicators import compute_indicators
 from utils.trade_utils import BrokerAPI, TradeAction, TradeOrder, TradeResult
+from utils.trade_records import TradeDecision, IndicatorSnapshot
+from utils.instrumentation import span, profile_cycle
 from utils.strategy import BaseStrategy
 from utils.memory import TradeMemory
 from utils.agents import TradeJournalAgent, RiskManagerAgent, TransactionLedgerAgent
 
 # Configure logging
-logger = logging.getLogger("DayTraderAgent")
+AGENT_NAME = "DayTraderAgent"
+logger = logging.getLogger(AGENT_NAME)
 logger.setLevel(logging.INFO)
 
+# Closes per symbol handed to the RiskManager for correlated-exposure checks
+RISK_LOOKBACK = 60
+
 # Sarcastic fallback commentary pool
 SARCASTIC_COMMENTS = [
     "Oh, splendid. The API is about as reliable as a chocolate teapot.",
@@ -64,6 +70,7 @@ class DayTraderAgent:
         ledger_agent: Optional[TransactionLedgerAgent] = None,
         max_position_per_trade: float = 0.10,  # Max 10% of account per trade
         min_cash_reserve: float = 0.05,        # Keep at least 5% cash
+        sector_risk=None,
     ):
         """
         Initialize the DayTraderAgent.
@@ -79,6 +86,8 @@ class DayTraderAgent:
             ledger_agent (TransactionLedgerAgent, optional): Transaction ledger agent.
             max_position_per_trade (float): Max % of account per trade.
             min_cash_reserve (float): Min % of account to keep in cash.
+            sector_risk (optional): Casino RiskManagerAgent; checks sector locks and loss
+                limits right before each order and is fed every fill.
         """
         self.broker_api = broker_api
         self.strategy = strategy
@@ -89,6 +98,7 @@ class DayTraderAgent:
         self.ledger_agent = ledger_agent
         self.max_position_per_trade = max_position_per_trade
         self.min_cash_reserve = min_cash_reserve
+        self.sector_risk = sector_risk
 
     def _load_stock_universe(self, config_path: str) -> List[str]:
         """
@@ -117,45 +127,74 @@ class DayTraderAgent:
     def run(self):
         """
         Main execution loop for the trading agent.
+
+        The cycle runs in three phases: every symbol is analyzed and sized against one
+        account snapshot, the full set of proposed orders goes through the RiskManager
+        in a single batch, then approved (possibly resized) orders are placed.
         """
         logger.info("DayTraderAgent starting trading cycle.")
-        for symbol in self.stock_universe:
+        with profile_cycle(AGENT_NAME):
             try:
-                self._trade_symbol(symbol)
+                with span(AGENT_NAME, "account"):
+                    account_info = self.broker_api.get_account_info()
             except Exception as e:
-                logger.error(f"Error trading {symbol}: {e}")
-                logger.debug(traceback.format_exc())
-                self._log_sarcastic_comment(f"Error trading {symbol}: {e}")
+                logger.error(f"Failed to fetch account info: {e}")
+                self._log_sarcastic_comment(f"Failed to fetch account info: {e}")
+                return
 
-    def _trade_symbol(self, symbol: str):
+            proposals = []
+            for symbol in self.stock_universe:
+                try:
+                    proposal = self._propose_trade(symbol, account_info)
+                    if proposal:
+                        proposals.append(proposal)
+                except Exception as e:
+                    logger.error(f"Error trading {symbol}: {e}")
+                    logger.debug(traceback.format_exc())
+                    self._log_sarcastic_comment(f"Error trading {symbol}: {e}")
+
+            if proposals:
+                try:
+                    self._execute_proposals(proposals, account_info)
+                except Exception as e:
+                    # A failed batch risk check places nothing this cycle
+                    logger.error(f"Error executing {len(proposals)} proposed trades: {e}")
+                    logger.debug(traceback.format_exc())
+                    self._log_sarcastic_comment(f"Error executing {len(proposals)} proposed trades: {e}")
+
+    def _propose_trade(self, symbol: str, account_info: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """
-        Execute trading logic for a single symbol.
+        Analyze a single symbol and size a trade for it.
 
         Args:
             symbol (str): Ticker symbol.
+            account_info (dict): Account snapshot for this cycle.
+
+        Returns:
+            dict, optional: Proposed order with its context, or None when there is nothing to trade.
         """
-        logger.info(f"Analyzing {symbol}...")
-        try:
-            # 1. Fetch market data
+        logger.info("Analyzing %s...", symbol)
+        # 1. Fetch market data
+        with span(AGENT_NAME, "data_fetch", symbol):
             candles = self.broker_api.get_historical_data(symbol)
-            if not candles or len(candles) < 50:
-                self._log_sarcastic_comment(f"Insufficient data for {symbol}. Skipping.")
-                return
+        if not candles or len(candles) < 50:
+            self._log_sarcastic_comment(f"Insufficient data for {symbol}. Skipping.")
+            return None
 
-            # 2. Compute indicators
+        # 2. Compute indicators
+        with span(AGENT_NAME, "indicators", symbol):
             indicators = compute_indicators(candles)
-            logger.debug(f"Indicators for {symbol}: {indicators}")
+        logger.debug("Indicators for %s: %s", symbol, indicators)
 
-            # 3. Retrieve trade memory for symbol
+        # 3. Retrieve trade memory for symbol
+        with span(AGENT_NAME, "account", symbol):
             trade_history = self.memory.get_trade_history(symbol)
+        cash = account_info.get("cash", 0)
+        equity = account_info.get("equity", 0)
+        positions = account_info.get("positions", {})
 
-            # 4. Get account info for risk sizing
-            account_info = self.broker_api.get_account_info()
-            cash = account_info.get("cash", 0)
-            equity = account_info.get("equity", 0)
-            positions = account_info.get("positions", {})
-
-            # 5. Strategy decision
+        # 4. Strategy decision
+        with span(AGENT_NAME, "decide", symbol):
             decision, confidence, rationale = self.strategy.decide(
                 symbol=symbol,
                 indicators=indicators,
@@ -163,49 +202,97 @@ class DayTraderAgent:
                 account_info=account_info,
             )
 
-            # 6. Risk management and position sizing
-            position_size, risk_rationale = self._calculate_position_size(
-                symbol, cash, equity, confidence, indicators, positions
-            )
+        # 5. Position sizing
+        position_size, risk_rationale = self._calculate_position_size(
+            symbol, cash, equity, confidence, indicators, positions
+        )
+
+        if decision not in [TradeAction.BUY, TradeAction.SELL] or position_size <= 0:
+            with span(AGENT_NAME, "persist", symbol):
+                self._record_trade_decision(
+                    symbol, decision, 0, confidence, rationale, vetoed=False, indicators=indicators
+                )
+            logger.info("No actionable trade for %s. Decision: %s", symbol, decision)
+            return None
+
+        return {
+            "order": TradeOrder(symbol=symbol, action=decision, quantity=position_size, rationale=rationale),
+            "confidence": confidence,
+            "indicators": indicators,
+            "closes": [candle["close"] for candle in candles[-RISK_LOOKBACK:]],
+        }
 
-            # 7. RiskManager veto
-            if self.risk_manager:
-                veto, risk_comment = self.risk_manager.evaluate_trade(
-                    symbol=symbol,
-                    action=decision,
-                    position_size=position_size,
-                    indicators=indicators,
+    def _execute_proposals(self, proposals: List[Dict[str, Any]], account_info: Dict[str, Any]):
+        """
+        Run the batch risk check over all proposed orders, then place the approved ones.
+
+        Args:
+            proposals (List[dict]): Output of _propose_trade for this cycle.
+            account_info (dict): Account snapshot the orders were sized against.
+        """
+        orders = [proposal["order"] for proposal in proposals]
+        if self.risk_manager:
+            with span(AGENT_NAME, "risk"):
+                decisions = self.risk_manager.evaluate_orders(
+                    orders,
+                    indicators={order.symbol: proposal["indicators"] for order, proposal in zip(orders, proposals)},
                     account_info=account_info,
-                    trade_history=trade_history,
+                    price_history={order.symbol: proposal["closes"] for order, proposal in zip(orders, proposals)},
                 )
-                if veto:
-                    rationale["risk_manager"] = risk_comment
-                    self._record_trade_decision(
-                        symbol, decision, 0, confidence, rationale, vetoed=True
+        else:
+            decisions = [None] * len(orders)
+
+        for proposal, risk_decision in zip(proposals, decisions):
+            order = proposal["order"]
+            symbol = order.symbol
+            try:
+                if risk_decision is not None:
+                    if not risk_decision.approved:
+                        self._record_veto(proposal, risk_decision.reason)
+                        continue
+                    if risk_decision.quantity != order.quantity:
+                        order.rationale["risk_manager"] = risk_decision.reason
+                        order.quantity = risk_decision.quantity
+
+                price = proposal["indicators"].get("close")
+                if self.sector_risk:
+                    # Right before submit, so a lock placed mid-cycle (kill switch, loss limit) stops the order
+                    with span(AGENT_NAME, "risk", symbol):
+                        approved, reason = self.sector_risk.check_trade(symbol, order.quantity, price, order.action)
+                    if not approved:
+                        self._record_veto(proposal, reason)
+                        continue
+
+                with span(AGENT_NAME, "order", symbol):
+                    trade_result = self.broker_api.place_order(order)
+                if self.sector_risk and trade_result.success:
+                    filled = trade_result.details.get("filled_quantity", order.quantity)
+                    self.sector_risk.log_trade(order.action, symbol, filled, trade_result.fill_price or price)
+                with span(AGENT_NAME, "persist", symbol):
+                    self._record_trade_result(
+                        symbol, order, trade_result, proposal["confidence"], order.rationale, proposal["indicators"]
                     )
-                    logger.info(f"Trade vetoed by RiskManager for {symbol}: {risk_comment}")
-                    return
-
-            # 8. Place trade if warranted
-            if decision in [TradeAction.BUY, TradeAction.SELL] and position_size > 0:
-                order = TradeOrder(
-                    symbol=symbol,
-                    action=decision,
-                    quantity=position_size,
-                    rationale=rationale,
-                )
-                trade_result = self.broker_api.place_order(order)
-                self._record_trade_result(symbol, order, trade_result, confidence, rationale)
-            else:
-                self._record_trade_decision(
-                    symbol, decision, 0, confidence, rationale, vetoed=False
-                )
-                logger.info(f"No actionable trade for {symbol}. Decision: {decision}")
+            except Exception as e:
+                logger.error(f"Exception placing order for {symbol}: {e}")
+                logger.debug(traceback.format_exc())
+                self._log_sarcastic_comment(f"Exception placing order for {symbol}: {e}")
 
-        except Exception as e:
-            logger.error(f"Exception in _trade_symbol for {symbol}: {e}")
-            logger.debug(traceback.format_exc())
-            self._log_sarcastic_comment(f"Exception in _trade_symbol for {symbol}: {e}")
+    def _record_veto(self, proposal: Dict[str, Any], reason: str):
+        """
+        Record a proposed order the risk checks rejected.
+
+        Args:
+            proposal (dict): Output of _propose_trade.
+            reason (str): Why the order was rejected.
+        """
+        order = proposal["order"]
+        order.rationale["risk_manager"] = reason
+        with span(AGENT_NAME, "persist", order.symbol):
+            self._record_trade_decision(
+                order.symbol, order.action, 0, proposal["confidence"], order.rationale,
+                vetoed=True, indicators=proposal["indicators"]
+            )
+        logger.info("Trade vetoed by RiskManager for %s: %s", order.symbol, reason)
 
     def _calculate_position_size(
         self,
@@ -275,6 +362,7 @@ class DayTraderAgent:
         trade_result: TradeResult,
         confidence: float,
         rationale: Dict[str, Any],
+        indicators: Optional[Dict[str, Any]] = None,
     ):
         """
         Record trade result in memory, journal, and ledger.
@@ -285,22 +373,29 @@ class DayTraderAgent:
             trade_result (TradeResult): Result from broker.
             confidence (float): Strategy confidence.
             rationale (dict): Rationale for trade.
+            indicators (dict, optional): Indicators the decision was based on.
         """
-        metadata = {
-            "timestamp": datetime.utcnow().isoformat(),
-            "order": order.to_dict(),
-            "result": trade_result.to_dict(),
-            "confidence": confidence,
-            "rationale": rationale,
-        }
+        metadata = TradeDecision(
+            symbol,
+            datetime.utcnow().isoformat(),
+            order.action,
+            order.quantity,
+            confidence,
+            rationale,
+            False,
+            trade_result.success,
+            trade_result.order_id,
+            trade_result.fill_price,
+            IndicatorSnapshot.from_dict(indicators) if indicators else None,
+        )
         self.memory.record_trade(symbol, metadata)
         if self.journal_agent:
             self.journal_agent.log_trade(symbol, metadata)
         if self.ledger_agent:
             self.ledger_agent.record_transaction(symbol, metadata)
         logger.info(
-            f"Trade executed for {symbol}: {order.action} {order.quantity} shares. "
-            f"Rationale: {rationale}"
+            "Trade executed for %s: %s %s shares. Rationale: %s",
+            symbol, order.action, order.quantity, rationale
         )
 
     def _record_trade_decision(
@@ -311,6 +406,7 @@ class DayTraderAgent:
         confidence: float,
         rationale: Dict[str, Any],
         vetoed: bool = False,
+        indicators: Optional[Dict[str, Any]] = None,
     ):
         """
         Record trade decision (even if no trade was made).
@@ -322,21 +418,24 @@ class DayTraderAgent:
             confidence (float): Confidence.
             rationale (dict): Rationale.
             vetoed (bool): If trade was vetoed by risk manager.
+            indicators (dict, optional): Indicators the decision was based on.
         """
-        metadata = {
-            "timestamp": datetime.utcnow().isoformat(),
-            "decision": decision,
-            "position_size": position_size,
-            "confidence": confidence,
-            "rationale": rationale,
-            "vetoed": vetoed,
-        }
+        metadata = TradeDecision(
+            symbol,
+            datetime.utcnow().isoformat(),
+            decision,
+            position_size,
+            confidence,
+            rationale,
+            vetoed,
+            indicators=IndicatorSnapshot.from_dict(indicators) if indicators else None,
+        )
         self.memory.record_trade(symbol, metadata)
         if self.journal_agent:
             self.journal_agent.log_trade(symbol, metadata)
         logger.info(
-            f"Trade decision for {symbol}: {decision} {position_size} shares. "
-            f"Rationale: {rationale} Vetoed: {vetoed}"
+            "Trade decision for %s: %s %s shares. Rationale: %s Vetoed: %s",
+            symbol, decision, position_size, rationale, vetoed
         )
 
     def _log_sarcastic_comment(self, context: str):
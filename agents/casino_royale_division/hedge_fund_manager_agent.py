@@ -1,5 +1,6 @@
 # hedge_fund_manager_agent.py
 
+import math
 import logging
 import random
 import traceback
@@ -8,19 +9,27 @@ from utils.market_indicators import compute_indicators
 from utils.strategy import BaseStrategy, TradeAction
 from utils.memory import TradeMemory
 from utils.agents import TradeJournalAgent, RiskManagerAgent, TransactionLedgerAgent
-from utils.trade_utils import IBKRBroker, TradeOrder
+from utils.trade_utils import BrokerAPI, TradeOrder
+from utils.instrumentation import span, profile_cycle
+from utils.covariance_service import CovarianceService
+
+AGENT_NAME = "HedgeFundManagerAgent"
 
 class HedgeFundManagerAgent:
     def __init__(
         self,
-        broker: IBKRBroker,
+        broker: BrokerAPI,
         strategy: BaseStrategy,
         memory: TradeMemory,
         journal: TradeJournalAgent,
         risk_manager: RiskManagerAgent,
         ledger: TransactionLedgerAgent,
         simulation_mode: bool = True,
-        min_data_points: int = 50
+        min_data_points: int = 50,
+        covariance_service: CovarianceService = None,
+        weighting: str = "risk_parity",
+        target_gross: float = 0.9,
+        sector_risk=None
     ):
         self.broker = broker
         self.strategy = strategy
@@ -30,7 +39,14 @@ class HedgeFundManagerAgent:
         self.ledger = ledger
         self.simulation_mode = simulation_mode
         self.min_data_points = min_data_points
-        self.logger = logging.getLogger("HedgeFundManagerAgent")
+        # Buys are sized to portfolio target weights ("risk_parity" or "mean_variance") once
+        # a symbol has enough history; until then the fixed qty_per_asset applies.
+        self.covariance_service = covariance_service or CovarianceService()
+        self.weighting = weighting
+        self.target_gross = target_gross
+        # Casino RiskManagerAgent: sector locks and loss limits checked right before each live order
+        self.sector_risk = sector_risk
+        self.logger = logging.getLogger(AGENT_NAME)
         self.live_trading_enabled = False
 
     def authorize_trading(self):
@@ -38,77 +54,203 @@ class HedgeFundManagerAgent:
         return "Live trading authorized for Hedge Fund Manager Agent."
 
     def fetch_market_data(self, symbol, limit=100):
+        # Brokers that serve OHLCV (e.g. ReplayBroker, routed venues that have it) supply real bars
+        if hasattr(self.broker, "fetch_ohlcv"):
+            candles = self.broker.fetch_ohlcv(symbol, limit)
+            if candles is not None:
+                return candles
         # Replace with real data fetch logic later
         return [{"close": 150 + i, "open": 148+i, "high": 151+i, "low": 147+i, "volume": 100000+i*100} for i in range(limit)]
 
-    def analyze_asset(self, symbol):
+    def analyze_asset(self, symbol, candles_sink=None):
         try:
-            candles = self.fetch_market_data(symbol)
+            with span(AGENT_NAME, "data_fetch", symbol):
+                candles = self.fetch_market_data(symbol)
+            if candles_sink is not None and candles:
+                candles_sink[symbol] = candles
             if not candles or len(candles) < self.min_data_points:
                 return None, f"Insufficient data for {symbol}"
-            indicators = compute_indicators(candles)
+            with span(AGENT_NAME, "indicators", symbol):
+                indicators = compute_indicators(candles)
             return indicators, None
         except Exception as e:
             return None, f"Analysis error for {symbol}: {str(e)}"
 
     def decide_and_trade(self, symbol, qty=10):
-        indicators, error = self.analyze_asset(symbol)
+        with span(AGENT_NAME, "account", symbol):
+            account_info = self.broker.get_account_info()
+        return self._trade_batch([symbol], qty, account_info)[0]
+
+    def _propose(self, symbol, qty, account_info, candles_sink=None):
+        """
+        Analysis and strategy decision for one symbol. Returns (result, proposal): a final
+        result when nothing is to be traded, otherwise the order awaiting the batch risk check.
+        """
+        indicators, error = self.analyze_asset(symbol, candles_sink)
         if error:
             self.journal.log_trade(symbol, {"status": "skipped", "reason": error})
-            return {"symbol": symbol, "status": "skipped", "error": error}
+            return {"symbol": symbol, "status": "skipped", "error": error}, None
+
+        with span(AGENT_NAME, "account", symbol):
+            trade_history = self.memory.get_trade_history(symbol)
+
+        with span(AGENT_NAME, "decide", symbol):
+            action, confidence, rationale = self.strategy.decide(symbol, indicators, trade_history, account_info)
+
+        if action == TradeAction.HOLD:
+            self.journal.log_trade(symbol, {"status": "hold", "rationale": rationale})
+            return {"symbol": symbol, "status": "held", "rationale": rationale}, None
 
-        action, confidence, rationale = self.strategy.decide(symbol, indicators, self.memory.get_trade_history(symbol), self.broker.get_account_info())
+        return None, {
+            "order": TradeOrder(symbol, action, qty, rationale),
+            "confidence": confidence,
+            "indicators": indicators
+        }
 
-        vetoed, veto_reason = self.risk_manager.evaluate_trade(
-            symbol, action, qty, indicators, self.broker.get_account_info(), self.memory.get_trade_history(symbol)
-        )
+    def _execute(self, proposal, risk_decision):
+        order = proposal["order"]
+        symbol, rationale = order.symbol, order.rationale
+        if not risk_decision.approved:
+            return self._veto(symbol, rationale, risk_decision.reason)
+        if risk_decision.quantity != order.quantity:
+            rationale["resized"] = risk_decision.reason
+            order.quantity = risk_decision.quantity
 
-        if vetoed:
-            rationale["vetoed"] = veto_reason
-            self.journal.log_trade(symbol, {"status": "vetoed", "rationale": rationale})
-            return {"symbol": symbol, "status": "vetoed", "rationale": rationale}
+        price = proposal["indicators"].get("close")
+        live = self.sector_risk is not None and not self.simulation_mode
+        if live:
+            # Right before submit, so a lock placed mid-cycle (kill switch, loss limit) stops the order
+            with span(AGENT_NAME, "risk", symbol):
+                approved, reason = self.sector_risk.check_trade(symbol, order.quantity, price, order.action)
+            if not approved:
+                return self._veto(symbol, rationale, reason)
 
-        if action != TradeAction.HOLD:
-            order = TradeOrder(symbol, action, qty, rationale)
-            result = self.broker.place_order(order) if not self.simulation_mode else {
+        with span(AGENT_NAME, "order", symbol):
+            result = self.broker.place_order(order).to_dict() if not self.simulation_mode else {
                 "success": True, "order_id": "SIMULATED", "fill_price": 150.0, "details": {"simulated": True}
             }
+        if live and result["success"]:
+            filled = result["details"].get("filled_quantity", order.quantity)
+            self.sector_risk.log_trade(order.action, symbol, filled, result["fill_price"] or price)
+        with span(AGENT_NAME, "persist", symbol):
             self.memory.record_trade(symbol, {
                 "timestamp": datetime.utcnow().isoformat(),
-                "action": action,
-                "quantity": qty,
+                "action": order.action,
+                "quantity": order.quantity,
                 "rationale": rationale,
                 "result": result
             })
             self.journal.log_trade(symbol, {
                 "status": "executed",
-                "action": action.value,
-                "quantity": qty,
+                "action": order.action,
+                "quantity": order.quantity,
                 "rationale": rationale
             })
             self.ledger.record_transaction(symbol, result)
-            return {
-                "symbol": symbol,
-                "status": "executed",
-                "action": action.value,
-                "confidence": confidence,
-                "rationale": rationale
-            }
+        return {
+            "symbol": symbol,
+            "status": "executed",
+            "action": order.action,
+            "quantity": order.quantity,
+            "confidence": proposal["confidence"],
+            "rationale": rationale
+        }
 
-        else:
-            self.journal.log_trade(symbol, {"status": "hold", "rationale": rationale})
-            return {"symbol": symbol, "status": "held", "rationale": rationale}
+    def _veto(self, symbol, rationale, reason):
+        rationale["vetoed"] = reason
+        self.journal.log_trade(symbol, {"status": "vetoed", "rationale": rationale})
+        return {"symbol": symbol, "status": "vetoed", "rationale": rationale}
+
+    def _trade_batch(self, symbols, qty, account_info):
+        """
+        Decide on every symbol, risk-check all proposed orders in one batch, then place them.
+        """
+        results = [None] * len(symbols)
+        proposals = []
+        cycle_candles = {}
+        for i, symbol in enumerate(symbols):
+            try:
+                result, proposal = self._propose(symbol, qty, account_info, cycle_candles)
+                if proposal:
+                    proposal["index"] = i
+                    proposals.append(proposal)
+                else:
+                    results[i] = result
+            except Exception as e:
+                self.logger.error(f"Error processing {symbol}: {e}")
+                results[i] = {"symbol": symbol, "status": "error", "error": str(e)}
+
+        # One aligned update for the whole universe so cross-asset covariances move together
+        with span(AGENT_NAME, "covariance"):
+            self.covariance_service.ingest(cycle_candles)
+        if proposals:
+            proposals = self._size_to_targets(proposals, account_info, results)
+
+        if proposals:
+            orders = [proposal["order"] for proposal in proposals]
+            try:
+                with span(AGENT_NAME, "risk"):
+                    decisions = self.risk_manager.evaluate_orders(
+                        orders,
+                        {order.symbol: proposal["indicators"] for order, proposal in zip(orders, proposals)},
+                        account_info
+                    )
+            except Exception as e:
+                # A failed batch risk check places nothing this cycle
+                self.logger.error(f"Risk check failed for {len(orders)} orders: {e}")
+                for proposal in proposals:
+                    results[proposal["index"]] = {"symbol": proposal["order"].symbol, "status": "error", "error": str(e)}
+                return results
+            for proposal, risk_decision in zip(proposals, decisions):
+                symbol = proposal["order"].symbol
+                try:
+                    results[proposal["index"]] = self._execute(proposal, risk_decision)
+                except Exception as e:
+                    self.logger.error(f"Error processing {symbol}: {e}")
+                    results[proposal["index"]] = {"symbol": symbol, "status": "error", "error": str(e)}
+
+        return results
+
+    def target_weights(self, symbols=None):
+        return self.covariance_service.target_weights(self.weighting, symbols)
+
+    def _size_to_targets(self, proposals, account_info, results):
+        """
+        Resizes buys to close the gap between the current holding and the symbol's target
+        weight of equity. Buys already at or above target become holds.
+        """
+        weights = self.target_weights()
+        equity = float(account_info.get("equity", 0) or 0)
+        positions = account_info.get("positions", {}) or {}
+        sized = []
+        for proposal in proposals:
+            order = proposal["order"]
+            weight = weights.get(order.symbol)
+            price = proposal["indicators"].get("close") or 0
+            if str(order.action).upper() != TradeAction.BUY or weight is None or price <= 0 or equity <= 0:
+                sized.append(proposal)
+                continue
+            position = positions.get(order.symbol, 0)
+            held = position.get("quantity", 0) if isinstance(position, dict) else position
+            target_value = weight * equity * self.target_gross
+            order.rationale["target_weight"] = round(weight, 4)
+            order.quantity = max(math.floor((target_value - held * price) / price), 0)
+            if order.quantity > 0:
+                sized.append(proposal)
+            else:
+                self.journal.log_trade(order.symbol, {"status": "hold", "rationale": order.rationale})
+                results[proposal["index"]] = {"symbol": order.symbol, "status": "held", "rationale": order.rationale}
+        return sized
 
     def run_daily_strategy(self, symbols: list, qty_per_asset: int = 10):
         if not self.live_trading_enabled:
             return "Trading not authorized."
 
-        results = []
-        for symbol in symbols:
+        with profile_cycle(AGENT_NAME):
             try:
-                result = self.decide_and_trade(symbol, qty=qty_per_asset)
-                results.append(result)
+                with span(AGENT_NAME, "account"):
+                    account_info = self.broker.get_account_info()
             except Exception as e:
-                self.logger.error(f"Error processing {symbol}: {e}")
-                results.append({"symbol": symbol, "status": "error", "error": str(e)})
-        return results
+                self.logger.error(f"Error fetching account info: {e}")
+                return [{"symbol": symbol, "status": "error", "error": str(e)} for symbol in symbols]
+            return self._trade_batch(symbols, qty_per_asset, account_info)
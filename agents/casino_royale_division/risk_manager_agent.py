@@ -1,48 +1,188 @@
 # shipmate_ai/agents/casino_royale_division/risk_manager_agent.py
 
 import datetime
+import threading
 from core.push_notifications import send_push_notification
+from core.risk_state_store import get_risk_state_store
+from utils.risk_engine import RiskEngine
+
+# Order symbols ('BTC/USD') are checked under their Kraken pair names ('XBTUSD')
+ASSET_ALIASES = {'BTC': 'XBT'}
+
+def asset_key(asset):
+    base, _, quote = str(asset).upper().partition('/')
+    return ASSET_ALIASES.get(base, base) + quote
 
 class RiskManagerAgent:
-    def __init__(self):
+    def __init__(self, state=None):
         self.name = "Risk Management Strategist Agent"
         self.status = "Operational"
         self.sectors = {
             'Tech Stocks': {
                 'assets': ['AAPL', 'TSLA', 'MSFT', 'AMZN', 'NVDA'],
                 'loss_threshold_percent': 5,
-                'daily_loss_limit': 500,
-                'trading_locked': False,
-                'trade_log': []
+                'daily_loss_limit': 500
             },
             'Crypto': {
                 'assets': ['XBTUSD', 'ETHUSD', 'SOLUSD', 'ADAUSD', 'DOGEUSD'],
                 'loss_threshold_percent': 7,
-                'daily_loss_limit': 300,
-                'trading_locked': False,
-                'trade_log': []
+                'daily_loss_limit': 300
             }
         }
-        self.overall_trading_locked = False
+        # Locks, daily losses and the daily trade log are persisted and shared across processes
+        self.state = state or get_risk_state_store()
+        self.state.ensure_sectors(self.sectors)
 
-    def log_trade(self, trade_type, asset, quantity, price_per_unit, action_amount, is_profit=True):
+        # Vectorized book: O(1) asset -> sector lookup and running daily loss per sector
+        self.risk_engine = RiskEngine()
+        for sector_name, sector_data in self.sectors.items():
+            self.risk_engine.add_sector(
+                sector_name,
+                sector_data['assets'],
+                daily_loss_limit=sector_data['daily_loss_limit'],
+                loss_threshold_percent=sector_data['loss_threshold_percent']
+            )
+        self._last_reset = self.state.last_reset()
+        # Entries of each sector's shared trade log already applied to the engine, and the
+        # store version they reflect (unchanged version: nothing to pull)
+        self._applied_trades = {}
+        self._synced_version = None
+        self._sync_lock = threading.RLock()
+        self._sync_engine()
+
+    def assign_assets(self, sector_name, assets):
         """
-        Log a trade to the appropriate sector based on asset.
+        Adds assets (e.g. an agent's trading universe) to a configured sector so their
+        orders are checked against its locks and limits.
         """
-        timestamp = datetime.datetime.now().isoformat()
+        sector = self.sectors[sector_name]
+        for asset in assets:
+            key = asset_key(asset)
+            if key not in sector['assets']:
+                sector['assets'].append(key)
+        self.risk_engine.add_sector(
+            sector_name,
+            sector['assets'],
+            daily_loss_limit=sector['daily_loss_limit'],
+            loss_threshold_percent=sector['loss_threshold_percent']
+        )
 
-        for sector_name, sector_data in self.sectors.items():
-            if asset in sector_data['assets']:
-                trade_entry = {
-                    'timestamp': timestamp,
-                    'trade_type': trade_type,
-                    'asset': asset,
-                    'quantity': quantity,
-                    'price_per_unit': price_per_unit,
-                    'action_amount': action_amount,
-                    'is_profit': is_profit
-                }
-                sector_data['trade_log'].append(trade_entry)
+    def log_trade(self, trade_type, asset, quantity, price_per_unit, action_amount=None, is_profit=True):
+        """
+        Log a trade to the appropriate sector based on asset. Without an action_amount the
+        fill's realized P/L is taken from the book's average cost.
+        """
+        asset = asset_key(asset)
+        sector_name = self.risk_engine.sector_of(asset)
+        if sector_name not in self.sectors:
+            return
+
+        trade_entry = {
+            'timestamp': datetime.datetime.now().isoformat(),
+            'trade_type': trade_type,
+            'asset': asset,
+            'quantity': quantity,
+            'price_per_unit': price_per_unit,
+            'action_amount': action_amount,
+            'is_profit': is_profit
+        }
+        if action_amount is None:
+            signed_quantity = -quantity if str(trade_type).upper() == 'SELL' else quantity
+            realized = self.risk_engine.realized_for(asset, signed_quantity, price_per_unit)
+            trade_entry.update(action_amount=abs(realized), is_profit=realized >= 0)
+        else:
+            realized = abs(action_amount) if is_profit else -abs(action_amount)
+        self.state.record_trade(sector_name, trade_entry, loss=max(-realized, 0.0))
+        # The engine picks the fill up from the shared log, like fills from other processes
+        self._sync_engine()
+
+    def get_trade_log(self, sector_name):
+        return self.state.trade_log(sector_name)
+
+    def _sync_engine(self):
+        """
+        Pulls persisted state into the in-process engine: a reset, lock, loss or fill
+        recorded by another process (trading daemon, scheduler, dashboard, voice command)
+        is honoured here, so every process sees the same book for the day. With no new
+        writes since the last sync this is one version read.
+        """
+        with self._sync_lock:
+            version = self.state.version()
+            if version == self._synced_version:
+                return
+            last_reset = self.state.last_reset()
+            if last_reset != self._last_reset:
+                self._last_reset = last_reset
+                self.risk_engine.reset_daily()
+                self._applied_trades.clear()
+            engine = self.risk_engine
+            for sector_name in self.sectors:
+                applied = self._applied_trades.get(sector_name, 0)
+                new_entries = self.state.trade_log_since(sector_name, applied)
+                for entry in new_entries:
+                    if engine.sector_of(entry['asset']) != sector_name:
+                        self.assign_assets(sector_name, [entry['asset']])
+                    quantity = entry['quantity'] or 0
+                    if str(entry['trade_type']).upper() == 'SELL':
+                        quantity = -quantity
+                    amount = abs(entry['action_amount'] or 0)
+                    engine.record_trade(entry['asset'], quantity, entry['price_per_unit'],
+                                        realized=amount if entry['is_profit'] else -amount)
+                self._applied_trades[sector_name] = applied + len(new_entries)
+            for sector_name, state in self.state.snapshot().items():
+                sector_id = engine.sector_index.get(sector_name)
+                if sector_id is not None:
+                    engine.sector_locked[sector_id] = state['locked']
+                    engine.daily_loss[sector_id] = state['daily_loss']
+            self._synced_version = version
+
+    def check_trade(self, asset, quantity, price_per_unit=None, trade_type='BUY'):
+        """
+        Pre-order risk check (cheap enough to run before every order).
+        Returns (approved, reason); locks any sector whose limits are already breached.
+        """
+        self._sync_engine()
+        self._apply_limit_breaches()
+        signed_quantity = -quantity if str(trade_type).upper() == 'SELL' else quantity
+        return self.risk_engine.check_order(asset_key(asset), signed_quantity, price_per_unit)
+
+    def update_market_prices(self, prices):
+        """
+        Marks the book to market. prices: { asset: last_price }.
+        """
+        self.risk_engine.update_prices({asset_key(asset): price for asset, price in prices.items()})
+        self._sync_engine()
+        self._apply_limit_breaches()
+
+    def _apply_limit_breaches(self):
+        for sector_id in self.risk_engine.evaluate_limits():
+            sector_name = self.risk_engine.sectors[sector_id]
+            if sector_name in self.sectors:
+                daily_loss = self.risk_engine.daily_loss[sector_id]
+                self._lock_sector(
+                    sector_name,
+                    f"🚨 Shipmate Sector Lock: {sector_name}",
+                    f"{sector_name} breached its risk limits (daily loss ${daily_loss:.2f}). Sector trading auto-locked."
+                )
+
+    def _lock_sector(self, sector_name, title, message):
+        self.risk_engine.sector_locked[self.risk_engine.sector_index[sector_name]] = True
+        if self.state.set_locked(sector_name, True, reason=message):
+            send_push_notification(title=title, message=message)
+
+    def is_sector_locked(self, sector_name):
+        return self.state.is_locked(sector_name)
+
+    def lock_all_sectors(self, reason="Manual override"):
+        """
+        Emergency stop: locks every sector.
+        """
+        for sector_name in self.sectors:
+            self._lock_sector(
+                sector_name,
+                f"🚨 Shipmate Sector Lock: {sector_name}",
+                f"{sector_name} locked: {reason}."
+            )
 
     def assess_sector_risk(self, sector_name, starting_portfolio_value, current_portfolio_value):
         """
@@ -57,32 +197,31 @@ class RiskManagerAgent:
         loss_percent = (loss_amount / starting_portfolio_value) * 100
 
         if loss_percent >= sector['loss_threshold_percent']:
-            if not sector['trading_locked']:
-                sector['trading_locked'] = True
-                self.overall_trading_locked = True
-                send_push_notification(
-                    title=f"🚨 Shipmate Sector Lock: {sector_name}",
-                    message=f"{sector_name} loss {loss_percent:.2f}% exceeded limit. Sector trading auto-locked."
-                )
+            self._lock_sector(
+                sector_name,
+                f"🚨 Shipmate Sector Lock: {sector_name}",
+                f"{sector_name} loss {loss_percent:.2f}% exceeded limit. Sector trading auto-locked."
+            )
             return f"CRITICAL: {sector_name} dropped {loss_percent:.2f}%. Sector trading locked!"
         else:
             return f"{sector_name} stable: {loss_percent:.2f}% drawdown."
 
-    def assess_daily_loss(self, sector_name):
+    def assess_daily_loss(self, sector_name=None):
         """
-        Check daily loss for a specific sector only.
+        Check daily loss for a specific sector (or every sector when none is given).
         """
+        if sector_name is None:
+            return "\n".join(self.assess_daily_loss(name) for name in self.sectors)
+
         sector = self.sectors[sector_name]
-        total_loss = sum([-entry['action_amount'] for entry in sector['trade_log'] if not entry['is_profit']])
+        total_loss = self.state.daily_loss(sector_name)
 
         if total_loss >= sector['daily_loss_limit']:
-            if not sector['trading_locked']:
-                sector['trading_locked'] = True
-                self.overall_trading_locked = True
-                send_push_notification(
-                    title=f"🚨 Shipmate Daily Loss Limit: {sector_name}",
-                    message=f"{sector_name} daily loss ${total_loss:.2f} exceeded limit. Sector trading auto-locked."
-                )
+            self._lock_sector(
+                sector_name,
+                f"🚨 Shipmate Daily Loss Limit: {sector_name}",
+                f"{sector_name} daily loss ${total_loss:.2f} exceeded limit. Sector trading auto-locked."
+            )
             return f"CRITICAL: {sector_name} daily loss of ${total_loss:.2f} exceeds limit!"
         else:
             return f"{sector_name} daily loss acceptable: ${total_loss:.2f}."
@@ -91,13 +230,34 @@ class RiskManagerAgent:
         """
         Reset all sectors' daily logs and lock statuses.
         """
-        for sector_name, sector_data in self.sectors.items():
-            sector_data['trade_log'] = []
-            sector_data['trading_locked'] = False
-        self.overall_trading_locked = False
+        with self._sync_lock:
+            self.state.reset_daily()
+            self._last_reset = self.state.last_reset()
+            self.risk_engine.reset_daily()
+            self._applied_trades.clear()
+            self._synced_version = None
+
+    def assess_portfolio_risk(self):
+        """
+        Whole-book risk summary: exposure, VaR, drawdown and per-sector daily loss.
+        """
+        self._sync_engine()
+        self._apply_limit_breaches()
+        report = self.risk_engine.report()
+        lines = [
+            f"Equity ${report['equity']:,.2f} | Gross ${report['gross_exposure']:,.2f} | Net ${report['net_exposure']:,.2f}",
+            f"VaR95 ${report['var_95']:,.2f} | VaR99 ${report['var_99']:,.2f} | Drawdown ${report['drawdown']:,.2f}"
+        ]
+        for sector_name in self.sectors:
+            sector = report['sectors'][sector_name]
+            status = "LOCKED" if sector['locked'] else "OPEN"
+            lines.append(
+                f"{sector_name}: {status} | exposure ${sector['exposure']:,.2f} | daily loss ${sector['daily_loss']:,.2f}"
+            )
+        return "\n".join(lines)
 
     def is_trading_locked(self):
         """
         Check if any sector is currently locked.
         """
-        return self.overall_trading_locked
+        return self.state.any_locked()
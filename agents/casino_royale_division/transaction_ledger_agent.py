@@ -3,6 +3,8 @@
 import sqlite3
 import datetime
 import os
+from core.event_bus import publish_event
+from core.transaction_summary import get_monthly_profit_loss
 
 class TransactionLedgerAgent:
     def __init__(self):
@@ -43,6 +45,20 @@ class TransactionLedgerAgent:
 
         self.conn.commit()
 
+        # The dashboard's Net P/L is the month's realized profit_loss, not this trade's
+        # notional, so send the recomputed figure for it to display
+        now = datetime.datetime.now()
+        publish_event('ledger', {
+            'timestamp': timestamp,
+            'trade_type': trade_type,
+            'asset': asset,
+            'quantity': quantity,
+            'price_per_unit': price_per_unit,
+            'total_value_usd': total_value,
+            'is_profit': bool(is_profit),
+            'monthly_net_profit_loss': get_monthly_profit_loss(now.year, now.month)
+        })
+
     def get_all_transactions(self):
         """
         Returns all transactions.
@@ -1,19 +1,19 @@
 import datetime
 from typing import List, Dict, Any, Optional
-from utils.financial_memory import FinancialMemory
+from utils.financial_memory import get_financial_memory
 
 ACCOUNT_TYPES = {"checking", "savings", "credit", "investment"}
 
 class AccountTrackerAgent:
     def __init__(self):
-        self.memory = FinancialMemory()
+        self.memory = get_financial_memory()
         self.category = "accounts"
 
     def _get_accounts(self) -> List[Dict[str, Any]]:
         return self.memory.list_records(self.category)
 
     def _save_accounts(self, accounts: List[Dict[str, Any]]) -> None:
-        self.memory._save({self.category: accounts})
+        self.memory.replace_category(self.category, accounts)
 
     def add_account(self, account: Dict[str, Any]) -> Dict[str, Any]:
         required_fields = {"name", "type", "balance", "last_updated", "buffer_required"}
@@ -1,20 +1,20 @@
 import json
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Any
-from utils.financial_memory import FinancialMemory
+from utils.financial_memory import get_financial_memory
 
 class BillManagerAgent:
     BILL_CATEGORY = "bills"
     DATE_FORMAT = "%Y-%m-%d"
 
     def __init__(self):
-        self.memory = FinancialMemory()
+        self.memory = get_financial_memory()
 
     def _load_bills(self) -> List[Dict]:
         return self.memory.list_records(self.BILL_CATEGORY)
 
     def _save_bills(self, bills: List[Dict]) -> None:
-        self.memory._save({self.BILL_CATEGORY: bills})
+        self.memory.replace_category(self.BILL_CATEGORY, bills)
 
     def add_bill(self, bill: Dict[str, Any]) -> Dict[str, Any]:
         required_fields = {"name", "amount", "frequency", "due_date", "account"}
@@ -63,6 +63,10 @@ class BillManagerAgent:
     def list_bills(self) -> List[Dict[str, Any]]:
         return self._load_bills()
 
+    def bills_due_between(self, start, end) -> List[Dict[str, Any]]:
+        """Bills with due_date in [start, end] (dates or YYYY-MM-DD), by due date."""
+        return self.memory.bills_due_between(start, end)
+
     def _normalize_date(self, date_str: str) -> str:
         try:
             dt = datetime.strptime(date_str, self.DATE_FORMAT)
@@ -15,8 +15,10 @@ class FinanceCoordinatorAgent:
         today = datetime.today()
         end_date = today + timedelta(days=days_ahead)
 
-        bills = self.bill_agent.list_bills()
-        income = self.income_agent.list_income_sources()
+        # Date-range lookups (indexed on the SQLite backend); the exact bounds below
+        # still apply the time-of-day comparison against today
+        bills = self.bill_agent.bills_due_between(today.date(), end_date.date())
+        income = self.income_agent.income_expected_between(today.date(), end_date.date())
 
         cash_events = []
 
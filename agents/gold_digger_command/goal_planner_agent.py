@@ -1,10 +1,10 @@
 import datetime
 from typing import List, Dict, Any, Optional
-from utils.financial_memory import FinancialMemory
+from utils.financial_memory import get_financial_memory
 
 class GoalPlannerAgent:
     def __init__(self):
-        self.memory = FinancialMemory()
+        self.memory = get_financial_memory()
         self.category = "goals"
 
     def add_goal(self, name: str, target_amount: float, current_amount: float,
@@ -1,6 +1,6 @@
 import datetime
 from typing import List, Dict, Optional, Any
-from utils.financial_memory import FinancialMemory
+from utils.financial_memory import get_financial_memory
 
 FREQUENCY_MAP = {
     "weekly": 52,
@@ -12,7 +12,7 @@ FREQUENCY_MAP = {
 
 class IncomeTrackerAgent:
     def __init__(self):
-        self.memory = FinancialMemory()
+        self.memory = get_financial_memory()
         self.category = "income_sources"
 
     def add_income(self, record: Dict[str, Any]) -> Dict[str, Any]:
@@ -47,3 +47,7 @@ class IncomeTrackerAgent:
 
     def list_income_sources(self) -> List[Dict[str, Any]]:
         return self.memory.list_records(self.category)
+
+    def income_expected_between(self, start, end) -> List[Dict[str, Any]]:
+        """Income sources with next_expected_date in [start, end], by that date."""
+        return self.memory.list_records_between(self.category, "next_expected_date", start, end)
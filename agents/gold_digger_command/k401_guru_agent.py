@@ -2,12 +2,12 @@
 # k401_guru_agent.py
 
 from typing import List, Dict
-from utils.financial_memory import FinancialMemory
+from utils.financial_memory import get_financial_memory
 
 
 class K401GuruAgent:
     def __init__(self):
-        self.memory = FinancialMemory()
+        self.memory = get_financial_memory()
         self.funds = self._load_funds()
 
     def _load_funds(self) -> List[Dict]:
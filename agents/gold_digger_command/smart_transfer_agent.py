@@ -3,11 +3,11 @@
 
 from datetime import datetime, timedelta
 from typing import List, Dict
-from utils.financial_memory import FinancialMemory
+from utils.financial_memory import get_financial_memory
 
 class SmartTransferAgent:
     def __init__(self):
-        self.memory = FinancialMemory()
+        self.memory = get_financial_memory()
         self.now = datetime.now().date()
         self.accounts = self._load_accounts()
         self.bills = self._load_bills()
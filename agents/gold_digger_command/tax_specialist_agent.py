@@ -3,7 +3,7 @@
 
 from typing import List, Dict, Any
 from collections import defaultdict
-from utils.financial_memory import FinancialMemory
+from utils.financial_memory import get_financial_memory
 
 class TaxSpecialistAgent:
     SCHEDULE_A_CATEGORIES = {
@@ -24,7 +24,7 @@ class TaxSpecialistAgent:
     }
 
     def __init__(self):
-        self.memory = FinancialMemory()
+        self.memory = get_financial_memory()
         self.bills = self.memory.list_records('bills') or []
         self.income_sources = self.memory.list_records('income_sources') or []
         self.goals = self.memory.list_records('goals') or []
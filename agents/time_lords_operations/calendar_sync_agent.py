@@ -5,6 +5,7 @@ import uuid
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 from utils.calendar_memory import CalendarMemory
+from utils.ics_importer import ICSImporter, DEFAULT_HORIZON_DAYS, DEFAULT_LOOKBACK_DAYS
 
 class CalendarSyncAgent:
     def __init__(self):
@@ -45,9 +46,35 @@ class CalendarSyncAgent:
         self.memory.save_event(normalized)
         return normalized['event_id']
 
+    def add_events(self, events: List[dict]) -> List[str]:
+        """
+        Normalizes and upserts a batch (e.g. a sync import) in a single write.
+        """
+        normalized = [self._normalize_event(event) for event in events]
+        self.memory.save_events(normalized)
+        return [event['event_id'] for event in normalized]
+
+    def import_ics(self, path: str, horizon_days: int = DEFAULT_HORIZON_DAYS,
+                   horizon_start: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Imports an .ics export; recurring events are expanded from `horizon_start` (default:
+        DEFAULT_LOOKBACK_DAYS ago) up to `horizon_days` ahead, so years of past occurrences
+        of long-running series are not materialized. One-off events in the past are only
+        dropped when `horizon_start` is passed explicitly.
+        Returns import counts (events, occurrences, duplicates, cancelled, skipped, errors).
+        """
+        now = datetime.now()
+        recurrence_start = horizon_start if horizon_start is not None else now - timedelta(days=DEFAULT_LOOKBACK_DAYS)
+        importer = ICSImporter(self, horizon_start=horizon_start, horizon_end=now + timedelta(days=horizon_days),
+                               recurrence_start=recurrence_start)
+        return importer.import_file(path)
+
     def remove_event(self, event_id: str) -> bool:
         return self.memory.delete_event(event_id)
 
+    def remove_events(self, event_ids: List[str]) -> int:
+        return self.memory.delete_events(event_ids)
+
     def list_all_events(self) -> List[dict]:
         events = self.memory.load_all_events()
         return sorted(events, key=lambda e: (e['start_time'], e['end_time']))
@@ -57,34 +84,9 @@ class CalendarSyncAgent:
             target_date = datetime.strptime(date, "%Y-%m-%d").date()
         except Exception:
             raise ValueError("Date must be in YYYY-MM-DD format")
-        events = self.memory.load_all_events()
-        result = []
-        for event in events:
-            start = self._from_iso(event['start_time'])
-            end = self._from_iso(event['end_time'])
-            if (start.date() <= target_date <= end.date()):
-                result.append(event)
+        result = self.memory.get_events_on(target_date)
         return sorted(result, key=lambda e: (e['start_time'], e['end_time']))
 
     def get_conflicts(self) -> List[List[dict]]:
-        events = self.memory.load_all_events()
-        events_sorted = sorted(events, key=lambda e: self._from_iso(e['start_time']))
-        conflicts = []
-        n = len(events_sorted)
-        for i in range(n):
-            current = events_sorted[i]
-            current_start = self._from_iso(current['start_time'])
-            current_end = self._from_iso(current['end_time'])
-            overlap_group = [current]
-            for j in range(i + 1, n):
-                compare = events_sorted[j]
-                compare_start = self._from_iso(compare['start_time'])
-                compare_end = self._from_iso(compare['end_time'])
-                if compare_start < current_end and compare_end > current_start:
-                    overlap_group.append(compare)
-            if len(overlap_group) > 1:
-                overlap_ids = set(e['event_id'] for e in overlap_group)
-                already_in_conflicts = any(overlap_ids <= set(e['event_id'] for e in group) for group in conflicts)
-                if not already_in_conflicts:
-                    conflicts.append(overlap_group)
-        return conflicts
+        # Sweep over the memory's start-ordered interval index (see IntervalIndex.overlap_groups)
+        return self.memory.conflict_groups()
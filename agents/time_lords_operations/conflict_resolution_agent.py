@@ -2,11 +2,14 @@
 # conflict_resolution_agent.py
 
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from utils.calendar_memory import CalendarMemory
+from utils.interval_index import to_timestamp
 
 PRIORITY_ORDER = {"high": 3, "medium": 2, "low": 1}
 
+Span = Tuple[float, float]      # (start, end) in epoch seconds
+
 class ConflictResolutionAgent:
     def __init__(self):
         self.calendar_memory = CalendarMemory()
@@ -15,31 +18,51 @@ class ConflictResolutionAgent:
         return self.calendar_memory.load_all_events()
 
     def detect_overlaps(self, events: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
-        events_sorted = sorted(events, key=lambda e: e['start_time'])
-        overlaps = []
-        current_group = []
+        return [[event for event, _ in group] for group in self.conflict_components(events)]
+
+    def conflict_components(self, events: List[Dict[str, Any]]) -> List[List[Tuple[Dict[str, Any], Span]]]:
+        """
+        Connected groups of overlapping events in start order, each event with its span.
+
+        Each event is parsed once to epoch seconds (offsets respected, naive times local);
+        one sweep over the starts tracks the furthest end seen, so an event joins the group
+        if it starts before any earlier member ends: O(n log n) for the sort.
+        """
+        intervals = []
+        for position, event in enumerate(events):
+            span = self.span(event)
+            if span is not None:
+                intervals.append((span[0], position, span[1]))
+        intervals.sort()
 
-        for event in events_sorted:
-            if not current_group:
-                current_group.append(event)
+        components = []
+        current_group = []
+        reach = None
+        for start, position, end in intervals:
+            if current_group and start < reach:
+                current_group.append((events[position], (start, end)))
+                reach = max(reach, end)
                 continue
-            last = current_group[-1]
-            if self.is_overlap(last, event):
-                current_group.append(event)
-            else:
-                if len(current_group) > 1:
-                    overlaps.append(current_group)
-                current_group = [event]
+            if len(current_group) > 1:
+                components.append(current_group)
+            current_group = [(events[position], (start, end))]
+            reach = end
         if len(current_group) > 1:
-            overlaps.append(current_group)
-        return overlaps
+            components.append(current_group)
+        return components
+
+    def span(self, event: Dict[str, Any]) -> Optional[Span]:
+        """(start, end) in epoch seconds, or None when the event has no readable times."""
+        try:
+            return to_timestamp(event['start_time']), to_timestamp(event['end_time'])
+        except (KeyError, TypeError, ValueError, AttributeError):
+            return None
 
     def is_overlap(self, event1: Dict[str, Any], event2: Dict[str, Any]) -> bool:
-        start1 = self.parse_time(event1['start_time'])
-        end1 = self.parse_time(event1['end_time'])
-        start2 = self.parse_time(event2['start_time'])
-        end2 = self.parse_time(event2['end_time'])
-        return start1 < end2 and start2 < end1
+        span1, span2 = self.span(event1), self.span(event2)
+        if span1 is None or span2 is None:
+            return False
+        return span1[0] < span2[1] and span2[0] < span1[1]
 
     def parse_time(self, t: Any) -> datetime:
         if isinstance(t, datetime):
@@ -47,20 +70,23 @@ class ConflictResolutionAgent:
         return datetime.fromisoformat(t)
 
     def analyze_conflicts(self, overlaps: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
-        now = datetime.now()
+        return self.decide([[(event, self.span(event)) for event in group] for group in overlaps])
+
+    def decide(self, components: List[List[Tuple[Dict[str, Any], Span]]]) -> List[Dict[str, Any]]:
+        now = datetime.now().timestamp()
         decisions = []
-        for group in overlaps:
-            sorted_group = sorted(
+        for group in components:
+            ranked = sorted(
                 group,
-                key=lambda e: (
-                    -PRIORITY_ORDER.get(e.get('priority', 'low'), 1),
-                    abs((self.parse_time(e['start_time']) - now).total_seconds()),
-                    (self.parse_time(e['end_time']) - self.parse_time(e['start_time'])).total_seconds()
+                key=lambda item: (
+                    -PRIORITY_ORDER.get(item[0].get('priority', 'low'), 1),
+                    abs(item[1][0] - now),
+                    item[1][1] - item[1][0]
                 )
             )
-            keep_event = sorted_group[0]
-            for reschedule_event in sorted_group[1:]:
-                reason = self.build_reason(keep_event, reschedule_event)
+            keep_event, keep_span = ranked[0]
+            for reschedule_event, reschedule_span in ranked[1:]:
+                reason = self.build_reason(keep_event, reschedule_event, keep_span, reschedule_span, now)
                 decisions.append({
                     "keep_event_id": keep_event['event_id'],
                     "reschedule_event_id": reschedule_event['event_id'],
@@ -68,7 +94,10 @@ class ConflictResolutionAgent:
                 })
         return decisions
 
-    def build_reason(self, keep_event: Dict[str, Any], reschedule_event: Dict[str, Any]) -> str:
+    def build_reason(self, keep_event: Dict[str, Any], reschedule_event: Dict[str, Any],
+                     keep_span: Optional[Span] = None,
+                     reschedule_span: Optional[Span] = None,
+                     now: Optional[float] = None) -> str:
         kp = keep_event.get('priority', 'low')
         rp = reschedule_event.get('priority', 'low')
         if PRIORITY_ORDER.get(kp, 1) > PRIORITY_ORDER.get(rp, 1):
@@ -76,18 +105,18 @@ class ConflictResolutionAgent:
         elif PRIORITY_ORDER.get(kp, 1) < PRIORITY_ORDER.get(rp, 1):
             return f"{rp.capitalize()} priority event overrides {kp} priority"
 
-        kstart = self.parse_time(keep_event['start_time'])
-        rstart = self.parse_time(reschedule_event['start_time'])
-        now = datetime.now()
-        kdelta = abs((kstart - now).total_seconds())
-        rdelta = abs((rstart - now).total_seconds())
+        kstart, kend = keep_span or self.span(keep_event)
+        rstart, rend = reschedule_span or self.span(reschedule_event)
+        now = datetime.now().timestamp() if now is None else now
+        kdelta = abs(kstart - now)
+        rdelta = abs(rstart - now)
         if kdelta < rdelta:
             return "Event closer to now takes precedence"
         elif kdelta > rdelta:
             return "Event further from now can be rescheduled"
 
-        kdur = (self.parse_time(keep_event['end_time']) - kstart).total_seconds()
-        rdur = (self.parse_time(reschedule_event['end_time']) - rstart).total_seconds()
+        kdur = kend - kstart
+        rdur = rend - rstart
         if kdur < rdur:
             return "Shorter event is easier to keep in place"
         else:
@@ -95,6 +124,6 @@ class ConflictResolutionAgent:
 
     def resolve(self) -> List[Dict[str, Any]]:
         events = self.load_events()
-        overlaps = self.detect_overlaps(events)
-        decisions = self.analyze_conflicts(overlaps)
+        components = self.conflict_components(events)
+        decisions = self.decide(components)
         return decisions
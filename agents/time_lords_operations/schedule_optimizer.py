@@ -0,0 +1,193 @@
+# schedule_optimizer.py
+
+import logging
+import math
+from datetime import datetime as dt, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from scipy.optimize import Bounds, LinearConstraint, milp
+    from scipy.sparse import coo_matrix
+except ImportError:  # optional: SmartSchedulerAgent keeps its greedy placement without scipy
+    milp = None
+
+logger = logging.getLogger("ScheduleOptimizer")
+logger.setLevel(logging.INFO)
+
+SLOT_MINUTES = 15                   # placement grid inside free blocks
+TIME_LIMIT_SECONDS = 10.0
+MIN_SPLIT_MINUTES = 30              # default piece size for splittable tasks
+TASK_BONUS_MINUTES = 30             # value of fitting a task at all, on top of its minutes
+DELAY_COST = 0.05                   # share of a task's value lost by starting at the horizon end
+OFF_HOURS_COST = 0.10               # share lost by running outside the task's preferred hours
+MAX_VARIABLES = 250_000             # larger models are not built; greedy placement stands
+
+# (task, start, end, part, parts)
+Placement = Tuple[Dict, dt, dt, int, int]
+
+class ScheduleOptimizer:
+    """
+    Places tasks into free time by solving a time-indexed 0/1 program with HiGHS
+    (scipy.optimize.milp).
+
+    Free blocks are cut into SLOT_MINUTES cells; a variable per (task piece, start cell)
+    says the piece starts there and covers the next ceil(minutes / slot) cells of the
+    same block. Every cell holds at most one piece, a task is placed only if all its
+    pieces are (splittable tasks have several, kept in order), and pieces start on or
+    before the task's deadline day. The objective maximizes priority-weighted minutes
+    placed, minus small penalties for starting late in the horizon or outside preferred
+    hours, so no penalty ever outweighs placing a task.
+
+    scipy's HiGHS interface takes no MIP start, so the greedy schedule is scored with
+    the same objective and kept unless the solver finds something strictly better
+    within the time limit.
+    """
+
+    def __init__(self, priority_weight: Dict[str, int], slot_minutes: int = SLOT_MINUTES,
+                 time_limit: float = TIME_LIMIT_SECONDS):
+        self.priority_weight = priority_weight
+        self.slot = timedelta(minutes=slot_minutes)
+        self.time_limit = time_limit
+
+    @staticmethod
+    def available() -> bool:
+        return milp is not None
+
+    # --- Objective ---
+    def value(self, task: Dict) -> float:
+        weight = self.priority_weight.get(task['priority'].lower(), 1)
+        return weight * (task['estimated_minutes'] + TASK_BONUS_MINUTES)
+
+    def cost(self, task: Dict, start: dt, end: dt, today: dt, horizon: timedelta) -> float:
+        """Penalty for one piece; a task's pieces share its DELAY/OFF_HOURS budget."""
+        share = DELAY_COST * (start - today) / horizon
+        preferred = task.get('preferred_hours')
+        if preferred:
+            first_hour, last_hour = preferred
+            day = start.replace(hour=0, minute=0, second=0, microsecond=0)
+            if start < day + timedelta(hours=first_hour) or end > day + timedelta(hours=last_hour):
+                share += OFF_HOURS_COST
+        return self.value(task) * share / len(self._pieces(task))
+
+    def score(self, placements: List[Placement], today: dt, horizon: timedelta) -> float:
+        placed = {}
+        total = 0.0
+        for task, start, end, _, _ in placements:
+            placed[id(task)] = task
+            total -= self.cost(task, start, end, today, horizon)
+        return total + sum(self.value(task) for task in placed.values())
+
+    # --- Model ---
+    @staticmethod
+    def _pieces(task: Dict) -> List[int]:
+        minutes = task['estimated_minutes']
+        size = task.get('min_split_minutes', MIN_SPLIT_MINUTES)
+        if not task.get('splittable') or minutes < 2 * size:
+            return [minutes]
+        count = minutes // size
+        return [size] * (count - 1) + [minutes - size * (count - 1)]
+
+    def _cells(self, blocks_by_day: List[List[Tuple[dt, dt]]]):
+        """Cell start times and, per cell, the index of the last cell in its block."""
+        starts, block_last = [], []
+        for blocks in blocks_by_day:
+            for block_start, block_end in blocks:
+                first = len(starts)
+                cell = block_start
+                while cell + self.slot <= block_end:
+                    starts.append(cell)
+                    cell += self.slot
+                block_last.extend([len(starts) - 1] * (len(starts) - first))
+        return starts, block_last
+
+    def solve(self, tasks: List[Dict], blocks_by_day: List[List[Tuple[dt, dt]]], today: dt,
+              greedy: List[Placement]) -> Optional[List[Placement]]:
+        """
+        An optimized schedule, or None when the greedy one should stand (no solver,
+        model too large, nothing found in time, or no improvement).
+        """
+        if not self.available():
+            logger.warning("scipy is not installed; keeping the greedy schedule.")
+            return None
+        horizon = timedelta(days=len(blocks_by_day))
+        cell_starts, block_last = self._cells(blocks_by_day)
+        if not tasks or not cell_starts:
+            return None
+        cell_days = np.array([(start.date() - today.date()).days for start in cell_starts])
+
+        # Variables: one "placed" flag per task, then (piece, start cell) pairs
+        costs: List[float] = [-self.value(task) for task in tasks]
+        variables: List[Tuple[int, int, int, int]] = []     # (task, piece, cell, cells)
+        piece_rows: List[Tuple[int, int]] = []              # (task, piece) per equality row
+        piece_cells: Dict[Tuple[int, int], int] = {}
+        for t, task in enumerate(tasks):
+            last_day = (dt.strptime(task['deadline'], "%Y-%m-%d").date() - today.date()).days
+            allowed = np.flatnonzero(cell_days <= last_day)
+            for p, minutes in enumerate(self._pieces(task)):
+                cells = math.ceil(minutes / (self.slot.total_seconds() / 60))
+                piece_rows.append((t, p))
+                piece_cells[(t, p)] = cells
+                for c in allowed:
+                    if c + cells - 1 > block_last[c]:
+                        continue
+                    start = cell_starts[c]
+                    variables.append((t, p, int(c), cells))
+                    costs.append(self.cost(task, start, start + timedelta(minutes=minutes), today, horizon))
+            if len(variables) > MAX_VARIABLES:
+                logger.warning("Schedule model exceeds %d variables; keeping the greedy schedule.", MAX_VARIABLES)
+                return None
+
+        offset = len(tasks)
+        piece_index = {key: row for row, key in enumerate(piece_rows)}
+        entries: List[Tuple[int, int, float]] = []          # (row, column, coefficient)
+        # Each piece starts exactly once if its task is placed, never otherwise
+        entries.extend((row, t, -1.0) for row, (t, _) in enumerate(piece_rows))
+        # Each cell is covered by at most one piece
+        cell_base = len(piece_rows)
+        for v, (t, p, c, cells) in enumerate(variables):
+            entries.append((piece_index[(t, p)], offset + v, 1.0))
+            entries.extend((cell_base + covered, offset + v, 1.0) for covered in range(c, c + cells))
+        # Pieces of a split task run in order: start(p + 1) - start(p) >= cells(p) * placed
+        order_base = cell_base + len(cell_starts)
+        ordered = [key for key in piece_rows if (key[0], key[1] + 1) in piece_index]
+        order_index = {key: order_base + row for row, key in enumerate(ordered)}
+        entries.extend((row, t, -float(piece_cells[(t, p)])) for (t, p), row in order_index.items())
+        for v, (t, p, c, _) in enumerate(variables):
+            if (t, p) in order_index:
+                entries.append((order_index[(t, p)], offset + v, -float(c)))
+            if (t, p - 1) in order_index:
+                entries.append((order_index[(t, p - 1)], offset + v, float(c)))
+        order_rows = len(order_index)
+
+        size = len(costs)
+        rows, cols, values = zip(*entries)
+        matrix = coo_matrix((values, (rows, cols)), shape=(order_base + order_rows, size)).tocsr()
+        lower = np.concatenate([np.zeros(len(piece_rows)), np.full(len(cell_starts), -np.inf), np.zeros(order_rows)])
+        upper = np.concatenate([np.zeros(len(piece_rows)), np.ones(len(cell_starts)), np.full(order_rows, np.inf)])
+        result = milp(
+            c=np.array(costs),
+            integrality=np.ones(size),
+            bounds=Bounds(0, 1),
+            constraints=[LinearConstraint(matrix, lower, upper)],
+            options={"time_limit": self.time_limit, "disp": False},
+        )
+        if result.x is None:
+            logger.info("No schedule found within %.1fs (%s); keeping the greedy schedule.",
+                        self.time_limit, result.message)
+            return None
+
+        chosen = np.flatnonzero(result.x[offset:] > 0.5)
+        placements = []
+        for v in chosen:
+            t, p, c, _ = variables[v]
+            task = tasks[t]
+            pieces = self._pieces(task)
+            start = cell_starts[c]
+            placements.append((task, start, start + timedelta(minutes=pieces[p]), p + 1, len(pieces)))
+        placements.sort(key=lambda placement: placement[1])
+
+        optimized, baseline = -result.fun, self.score(greedy, today, horizon)
+        logger.info("Optimized schedule scores %.1f vs greedy %.1f (%s).", optimized, baseline, result.message)
+        return placements if optimized > baseline + 1e-6 else None
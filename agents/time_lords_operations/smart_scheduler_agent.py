@@ -1,9 +1,86 @@
 import datetime
+from bisect import bisect_right
+from collections import defaultdict
 from datetime import datetime as dt, timedelta
 
+from agents.time_lords_operations.schedule_optimizer import ScheduleOptimizer, TIME_LIMIT_SECONDS
+
+class FreeSlots:
+    """
+    One day's free time as sorted, disjoint intervals (parallel start/end lists) with a
+    max-gap segment tree over their lengths.
+
+    first_fit descends the tree to the leftmost interval long enough, and reserve
+    bisects to the containing interval: both O(log k). Trimming an interval at either
+    end, or using it up (left as a zero-length entry), updates one leaf; carving from
+    the middle inserts an interval and rebuilds the tree in O(k). Greedy placement
+    always reserves from an interval's start, so it never rebuilds.
+    """
+
+    def __init__(self, blocks):
+        self.starts = [start for start, _ in blocks]
+        self.ends = [end for _, end in blocks]
+        self._build()
+
+    def _build(self):
+        self.size = 1
+        while self.size < len(self.starts):
+            self.size *= 2
+        self.tree = [timedelta(0)] * (2 * self.size)
+        for i, (start, end) in enumerate(zip(self.starts, self.ends)):
+            self.tree[self.size + i] = end - start
+        for node in range(self.size - 1, 0, -1):
+            self.tree[node] = max(self.tree[2 * node], self.tree[2 * node + 1])
+
+    def _update(self, i):
+        node = self.size + i
+        self.tree[node] = self.ends[i] - self.starts[i]
+        node //= 2
+        while node:
+            self.tree[node] = max(self.tree[2 * node], self.tree[2 * node + 1])
+            node //= 2
+
+    @property
+    def longest(self):
+        return self.tree[1]
+
+    def __bool__(self):
+        return self.longest > timedelta(0)
+
+    def blocks(self):
+        return [(start, end) for start, end in zip(self.starts, self.ends) if start < end]
+
+    def first_fit(self, duration):
+        """Start of the earliest free interval that can hold `duration`, or None."""
+        if not self.starts or self.longest < duration:
+            return None
+        node = 1
+        while node < self.size:
+            node = 2 * node if self.tree[2 * node] >= duration else 2 * node + 1
+        return self.starts[node - self.size]
+
+    def reserve(self, start, end):
+        """Removes [start, end), which must lie inside one free interval."""
+        i = bisect_right(self.starts, start) - 1
+        if i < 0 or end > self.ends[i]:
+            raise ValueError(f"{start}..{end} is not free")
+        block_start, block_end = self.starts[i], self.ends[i]
+        if start > block_start and end < block_end:
+            self.starts[i:i + 1] = [block_start, end]
+            self.ends[i:i + 1] = [start, block_end]
+            self._build()
+        elif start > block_start:
+            self.ends[i] = start
+            self._update(i)
+        else:
+            # Trimmed from the start; a used-up interval stays as a zero-length entry
+            self.starts[i] = min(end, block_end)
+            self._update(i)
+
 class SmartSchedulerAgent:
     WORK_START_HOUR = 8
     WORK_END_HOUR = 22
+    HORIZON_DAYS = 7
 
     PRIORITY_WEIGHT = {
         "high": 3,
@@ -18,91 +95,103 @@ class SmartSchedulerAgent:
         events = self.calendar_memory.get_events(start_date, end_date)
         busy_blocks = []
         for event in events:
-            start = self._parse_datetime(event['start'])
-            end = self._parse_datetime(event['end'])
+            # Stored events use start_time/end_time; older callers passed start/end
+            start = self._parse_datetime(event.get('start_time', event.get('start')))
+            end = self._parse_datetime(event.get('end_time', event.get('end')))
             busy_blocks.append((start, end))
         busy_blocks.sort()
         return busy_blocks
 
-    def propose_schedule(self, pending_tasks):
-        today = dt.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        end_day = today + timedelta(days=7)
+    def propose_schedule(self, pending_tasks, horizon_days=HORIZON_DAYS, start_date=None,
+                         optimize=False, time_limit=TIME_LIMIT_SECONDS):
+        """
+        Proposes slots for pending tasks: greedy first-fit by priority and deadline, or
+        with `optimize` an ILP over the whole horizon (see ScheduleOptimizer) that honours
+        `preferred_hours` and `splittable` tasks, falling back to greedy when it cannot
+        improve on it within `time_limit` seconds.
+        """
+        today = (start_date or dt.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+        end_day = today + timedelta(days=horizon_days)
         busy_blocks = self.load_events(today, end_day)
         free_blocks_by_day = self._get_free_blocks(today, end_day, busy_blocks)
-        tasks_sorted = self._sort_tasks(pending_tasks)
-        scheduled = []
-        used_blocks = []
+        days = [free_blocks_by_day.get((today + timedelta(days=n)).strftime("%Y-%m-%d"))
+                for n in range(horizon_days)]
+        open_blocks = [slots.blocks() if slots else [] for slots in days]
+        placements = self._place_greedy(pending_tasks, days, today, horizon_days)
+        if optimize:
+            optimizer = ScheduleOptimizer(self.PRIORITY_WEIGHT, time_limit=time_limit)
+            placements = optimizer.solve(pending_tasks, open_blocks, today, placements) or placements
+        return [self._entry(*placement) for placement in placements]
+
+    def _entry(self, task, start, end, part=1, parts=1):
+        entry = {
+            "task": task['name'],
+            "proposed_start_time": start.isoformat(),
+            "proposed_end_time": end.isoformat(),
+            "reason": self._get_reason(task, start)
+        }
+        if parts > 1:
+            entry["part"] = f"{part}/{parts}"
+        return entry
 
-        for task in tasks_sorted:
+    def _place_greedy(self, pending_tasks, days, today, horizon_days):
+        placements = []
+        for task in self._sort_tasks(pending_tasks):
             duration = timedelta(minutes=task['estimated_minutes'])
-            deadline = dt.strptime(task['deadline'], "%Y-%m-%d").replace(hour=23, minute=59, second=59)
-            found = False
-            for single_date in (today + timedelta(days=n) for n in range(0, 7)):
-                if single_date > deadline:
-                    continue
-                day_str = single_date.strftime("%Y-%m-%d")
-                if day_str not in free_blocks_by_day:
+            deadline = dt.strptime(task['deadline'], "%Y-%m-%d")
+            last_day = min(horizon_days, (deadline - today).days + 1)
+            # The free lists are authoritative: whatever fits is not yet taken
+            for slots in days[:max(last_day, 0)]:
+                proposed_start = slots.first_fit(duration) if slots else None
+                if proposed_start is None:
                     continue
-                for block in free_blocks_by_day[day_str]:
-                    block_start, block_end = block
-                    if block_end - block_start >= duration:
-                        proposed_start = block_start
-                        proposed_end = block_start + duration
-                        overlap = False
-                        for used in used_blocks:
-                            if not (proposed_end <= used[0] or proposed_start >= used[1]):
-                                overlap = True
-                                break
-                        if not overlap:
-                            reason = self._get_reason(task, proposed_start)
-                            scheduled.append({
-                                "task": task['name'],
-                                "proposed_start_time": proposed_start.isoformat(),
-                                "proposed_end_time": proposed_end.isoformat(),
-                                "reason": reason
-                            })
-                            used_blocks.append((proposed_start, proposed_end))
-                            # Update free_blocks_by_day to remove used time
-                            self._update_free_blocks(free_blocks_by_day, day_str, block, proposed_start, proposed_end)
-                            found = True
-                            break
-                if found:
-                    break
-        return scheduled
+                proposed_end = proposed_start + duration
+                slots.reserve(proposed_start, proposed_end)
+                placements.append((task, proposed_start, proposed_end, 1, 1))
+                break
+        return placements
 
     def _get_free_blocks(self, start_date, end_date, busy_blocks):
+        """
+        FreeSlots per day ("YYYY-MM-DD") within working hours, for days with free time.
+        Busy blocks are bucketed onto every day they touch in one pass.
+        """
+        busy_by_day = defaultdict(list)
+        first_day, last_day = start_date.date(), (end_date - timedelta(days=1)).date()
+        for start, end in busy_blocks:
+            day = max(start.date(), first_day)
+            while day <= min(end.date(), last_day):
+                busy_by_day[day].append((start, end))
+                day += timedelta(days=1)
+
         free_blocks_by_day = {}
         for n in range((end_date - start_date).days):
             day = start_date + timedelta(days=n)
-            day_str = day.strftime("%Y-%m-%d")
             work_start = day.replace(hour=self.WORK_START_HOUR, minute=0, second=0, microsecond=0)
             work_end = day.replace(hour=self.WORK_END_HOUR, minute=0, second=0, microsecond=0)
-            day_busy = []
-            for start, end in busy_blocks:
-                if start.date() == day.date() or end.date() == day.date():
-                    # Clip busy block to working hours
-                    busy_start = max(start, work_start)
-                    busy_end = min(end, work_end)
-                    if busy_start < busy_end:
-                        day_busy.append((busy_start, busy_end))
-            day_busy.sort()
             free_blocks = []
             cursor = work_start
-            for busy_start, busy_end in day_busy:
+            for start, end in sorted(busy_by_day.get(day.date(), ())):
+                # Clip busy block to working hours
+                busy_start, busy_end = max(start, work_start), min(end, work_end)
+                if busy_start >= busy_end:
+                    continue
                 if busy_start > cursor:
                     free_blocks.append((cursor, busy_start))
                 cursor = max(cursor, busy_end)
             if cursor < work_end:
                 free_blocks.append((cursor, work_end))
             if free_blocks:
-                free_blocks_by_day[day_str] = free_blocks
+                free_blocks_by_day[day.strftime("%Y-%m-%d")] = FreeSlots(free_blocks)
         return free_blocks_by_day
 
     def _sort_tasks(self, tasks):
+        now = dt.now()
+
         def task_score(task):
             priority = self.PRIORITY_WEIGHT.get(task['priority'].lower(), 1)
             deadline = dt.strptime(task['deadline'], "%Y-%m-%d")
-            days_until_deadline = (deadline - dt.now()).days
+            days_until_deadline = (deadline - now).days
             return (
                 -priority,
                 days_until_deadline,
@@ -111,30 +200,21 @@ class SmartSchedulerAgent:
         return sorted(tasks, key=task_score)
 
     def _parse_datetime(self, value):
-        if isinstance(value, dt):
-            return value
-        try:
-            return dt.fromisoformat(value)
-        except Exception:
-            return dt.strptime(value, "%Y-%m-%dT%H:%M:%S")
+        if not isinstance(value, dt):
+            try:
+                value = dt.fromisoformat(value)
+            except Exception:
+                value = dt.strptime(value, "%Y-%m-%dT%H:%M:%S")
+        # Working hours are local wall time; imported events may carry an offset
+        return value.astimezone().replace(tzinfo=None) if value.tzinfo else value
 
     def _get_reason(self, task, proposed_start):
         if task['priority'].lower() == 'high':
             return "High priority task fit into earliest available slot"
         deadline = dt.strptime(task['deadline'], "%Y-%m-%d")
-        days_left = (deadline - proposed_start.date()).days
+        days_left = (deadline.date() - proposed_start.date()).days
         if days_left <= 1:
             return "Task scheduled soon due to approaching deadline"
         if task['priority'].lower() == 'medium':
             return "Medium priority task scheduled in early available slot"
         return "Task scheduled in available slot before deadline"
-
-    def _update_free_blocks(self, free_blocks_by_day, day_str, block, start, end):
-        blocks = free_blocks_by_day[day_str]
-        blocks.remove(block)
-        if block[0] < start:
-            blocks.append((block[0], start))
-        if end < block[1]:
-            blocks.append((end, block[1]))
-        blocks.sort()
-        free_blocks_by_day[day_str] = blocks
\ No newline at end of file
@@ -0,0 +1,122 @@
+# shipmate_ai/core/chart_renderer.py
+
+import io
+import calendar
+import hashlib
+import threading
+from collections import OrderedDict
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+CHART_CACHE_SIZE = 64
+DEFAULT_DPI = 100
+
+class ChartRenderer:
+    """
+    Renders Shipmate charts to PNG bytes with the object-oriented Agg backend.
+
+    No pyplot state is touched: each thread reuses a single Figure (cleared between
+    renders) and finished PNGs are kept in a bounded LRU cache keyed by a hash of the
+    plotted data, so regenerating unchanged reports costs a dictionary lookup.
+    """
+
+    def __init__(self, cache_size: int = CHART_CACHE_SIZE):
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def render_line_chart(self, labels, values, title: str, xlabel: str, ylabel: str,
+                          figsize=(10, 5), dpi: int = DEFAULT_DPI) -> bytes:
+        """
+        Returns a PNG line chart of values over labels.
+        """
+        labels = [str(label) for label in labels]
+        values = [float(value) for value in values]
+        key = self._cache_key('line', labels, values, title, xlabel, ylabel, figsize, dpi)
+
+        def draw(fig):
+            ax = fig.add_subplot(1, 1, 1)
+            ax.plot(labels, values, marker='o')
+            ax.set_title(title)
+            ax.set_xlabel(xlabel)
+            ax.set_ylabel(ylabel)
+            ax.tick_params(axis='x', labelrotation=45)
+
+        return self._render(key, draw, figsize, dpi)
+
+    def render_profit_loss_heatmap(self, year: int, month: int, profit_map: dict,
+                                   figsize=(8, 5), dpi: int = DEFAULT_DPI) -> bytes:
+        """
+        Returns a PNG calendar heatmap of daily P/L for a month.
+
+        Args:
+            profit_map (dict): { 'YYYY-MM-DD': profit_loss } as produced by heatmap_data.
+        """
+        weeks = calendar.Calendar().monthdayscalendar(year, month)
+        daily = {int(day[-2:]): float(pl or 0.0) for day, pl in profit_map.items()}
+        key = self._cache_key('heatmap', year, month, sorted(daily.items()), figsize, dpi)
+
+        def draw(fig):
+            grid = [[daily.get(day, 0.0) if day else float('nan') for day in week] for week in weeks]
+            limit = max([abs(v) for v in daily.values()] + [1.0])
+
+            ax = fig.add_subplot(1, 1, 1)
+            image = ax.imshow(grid, cmap='RdYlGn', vmin=-limit, vmax=limit, aspect='auto')
+            for row, week in enumerate(weeks):
+                for col, day in enumerate(week):
+                    if day:
+                        ax.text(col, row, str(day), ha='center', va='center', fontsize=9)
+            ax.set_xticks(range(7))
+            ax.set_xticklabels(['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun'])
+            ax.set_yticks([])
+            ax.set_title(f"{calendar.month_name[month]} {year} Daily P/L")
+            fig.colorbar(image, ax=ax, label='Profit/Loss ($)')
+
+        return self._render(key, draw, figsize, dpi)
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+
+    def _render(self, key: str, draw, figsize, dpi) -> bytes:
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+
+        fig = self._figure(figsize, dpi)
+        try:
+            draw(fig)
+            fig.tight_layout()
+            buffer = io.BytesIO()
+            fig.savefig(buffer, format='png')
+            png = buffer.getvalue()
+        finally:
+            # Drop the axes but keep the Figure/canvas for the next render on this thread
+            fig.clear()
+
+        with self._lock:
+            self._cache[key] = png
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return png
+
+    def _figure(self, figsize, dpi) -> Figure:
+        fig = getattr(self._local, 'figure', None)
+        if fig is None:
+            fig = Figure(figsize=figsize, dpi=dpi)
+            FigureCanvasAgg(fig)
+            self._local.figure = fig
+        else:
+            fig.set_size_inches(figsize, forward=False)
+            fig.set_dpi(dpi)
+        return fig
+
+    def _cache_key(self, *parts) -> str:
+        return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+
+# Shared renderer so PDF reports and the dashboard hit the same cache
+chart_renderer = ChartRenderer()
@@ -1,33 +1,31 @@
 # shipmate_ai/core/daily_auto_reset.py
 
 from agents.casino_royale_division.trade_journal_agent import TradeJournalAgent
-from agents.casino_royale_division.risk_manager_agent import RiskManagerAgent
-import schedule
-import time
+from core.risk_state_store import get_risk_state_store
+from core.job_scheduler import JobScheduler, daily_at
 from datetime import datetime
 
 class DailyAutoReset:
     def __init__(self):
         self.journal = TradeJournalAgent()
-        self.risk_manager = RiskManagerAgent()
+        self.risk_state = get_risk_state_store()
 
     def reset_all_systems(self):
         print(f"🛳️ [Shipmate Reset] Resetting systems at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         self.journal.reset_journal()
-        self.risk_manager.reset_daily_trade_log()
+        self.risk_state.reset_daily()
         print("✅ [Shipmate Reset] Trade Journal and Risk Manager reset successfully.\n")
 
     def start_daily_scheduler(self, reset_time="21:00"):
         """
         Schedules the reset at the given time every day (default: 9 PM).
         """
-        schedule.every().day.at(reset_time).do(self.reset_all_systems)
+        scheduler = JobScheduler()
+        # Not "daily_reset": that is core.scheduler's DailyResetManager job in the same scheduler_jobs table
+        scheduler.add_job("daily_auto_reset", self.reset_all_systems, daily_at(reset_time))
 
         print(f"🛡️ Shipmate Daily Reset Scheduler active. Will reset systems daily at {reset_time}.")
-
-        while True:
-            schedule.run_pending()
-            time.sleep(30)  # Check every 30 seconds
+        scheduler.run_forever()
 
 if __name__ == "__main__":
     resetter = DailyAutoReset()
@@ -44,8 +44,8 @@ class DailyBriefingGenerator:
 
         # Sector Risk Status
         sector_statuses = []
-        for sector_name, sector_data in self.risk_manager.sectors.items():
-            lock_status = "Locked" if sector_data['trading_locked'] else "Active"
+        for sector_name in self.risk_manager.sectors:
+            lock_status = "Locked" if self.risk_manager.is_sector_locked(sector_name) else "Active"
             sector_statuses.append(f"{sector_name}: {lock_status}")
         
         sector_report = "\n".join(sector_statuses)
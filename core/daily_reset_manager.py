@@ -1,12 +1,12 @@
 # shipmate_ai/core/daily_reset_manager.py
 
 from agents.casino_royale_division.trade_journal_agent import TradeJournalAgent
-from agents.casino_royale_division.risk_manager_agent import RiskManagerAgent
+from core.risk_state_store import get_risk_state_store
 
 class DailyResetManager:
     def __init__(self):
         self.journal = TradeJournalAgent()
-        self.risk_manager = RiskManagerAgent()
+        self.risk_state = get_risk_state_store()
 
     def reset_all_systems(self):
         """
@@ -19,8 +19,8 @@ class DailyResetManager:
         print("📜 Trade Journal cleared.")
 
         # Reset Risk Management Logs
-        self.risk_manager.reset_daily_trade_log()
-        print("🛡️ Risk Manager daily log cleared.")
+        unlocked = self.risk_state.reset_daily()
+        print(f"🛡️ Risk Manager daily log cleared. Sectors unlocked: {', '.join(unlocked) or 'none'}.")
 
         print("✅ Shipmate reset complete. Ready for tomorrow's orders.")
 
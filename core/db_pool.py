@@ -0,0 +1,103 @@
+# shipmate_ai/core/db_pool.py
+
+import os
+import sqlite3
+import threading
+
+DATABASE_PATH = os.path.join(os.getcwd(), 'shipmate_ledger.db')
+
+# Pragmas applied once to every pooled connection
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL;",
+    "PRAGMA synchronous=NORMAL;",
+    "PRAGMA mmap_size=268435456;",   # 256 MB memory-mapped reads
+    "PRAGMA cache_size=-20000;",     # ~20 MB page cache (negative = KiB)
+    "PRAGMA temp_store=MEMORY;",
+)
+STATEMENT_CACHE_SIZE = 256
+BUSY_TIMEOUT_SECONDS = 10
+
+class ConnectionPool:
+    """
+    Hands out one long-lived SQLite connection per (thread, database) pair.
+
+    Connections keep their compiled statements in sqlite3's statement cache, so
+    callers that reuse the same query text skip re-preparing it on every call.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._all_connections = []
+        self._lock = threading.Lock()
+
+    def get_connection(self, db_path: str = DATABASE_PATH) -> sqlite3.Connection:
+        """
+        Returns this thread's pooled connection for db_path, opening it on first use.
+        """
+        connections = getattr(self._local, 'connections', None)
+        if connections is None:
+            connections = self._local.connections = {}
+
+        db_path = os.path.abspath(db_path)
+        conn = connections.get(db_path)
+        if conn is None:
+            conn = self._open(db_path)
+            connections[db_path] = conn
+            with self._lock:
+                self._all_connections.append(conn)
+        return conn
+
+    def _open(self, db_path: str) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            db_path,
+            timeout=BUSY_TIMEOUT_SECONDS,
+            cached_statements=STATEMENT_CACHE_SIZE,
+            check_same_thread=False
+        )
+        for pragma in CONNECTION_PRAGMAS:
+            try:
+                conn.execute(pragma)
+            except sqlite3.DatabaseError as e:
+                print(f"[ConnectionPool] Could not apply '{pragma}' to {db_path}: {e}")
+        return conn
+
+    def close_thread_connections(self):
+        """
+        Closes the calling thread's connections (e.g. at the end of a worker thread).
+        """
+        connections = getattr(self._local, 'connections', None) or {}
+        for conn in connections.values():
+            self._close(conn)
+        connections.clear()
+
+    def close_all_connections(self):
+        """
+        Closes every pooled connection. Call on process shutdown only.
+        """
+        with self._lock:
+            connections, self._all_connections = self._all_connections, []
+        for conn in connections:
+            self._close(conn)
+        self._local = threading.local()
+
+    def _close(self, conn: sqlite3.Connection):
+        with self._lock:
+            if conn in self._all_connections:
+                self._all_connections.remove(conn)
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+# Process-wide pool shared by all core modules
+connection_pool = ConnectionPool()
+
+def get_connection(db_path: str = DATABASE_PATH) -> sqlite3.Connection:
+    """
+    Returns the calling thread's pooled connection to the Shipmate ledger database.
+    Do not close it; use `with conn:` to commit or roll back writes.
+    """
+    return connection_pool.get_connection(db_path)
+
+def close_all_connections():
+    connection_pool.close_all_connections()
@@ -1,28 +1,22 @@
 # shipmate_ai/core/email_dispatcher.py
 
 import os
-import smtplib
-import ssl
-from email.message import EmailMessage
 from dotenv import load_dotenv
+from core.mail_transport import get_mail_transport
 
 # Load environment variables
 load_dotenv()
 
-SMTP_SERVER = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
-SMTP_PORT = int(os.getenv('SMTP_PORT', 465))
-SMTP_USER = os.getenv('SMTP_USER')
-SMTP_PASS = os.getenv('SMTP_PASS')
 ADMIN_EMAIL = os.getenv('ADMIN_EMAIL')
+# Comma-separated list of extra report recipients (ADMIN_EMAIL is always included)
+REPORT_RECIPIENTS = [r.strip() for r in os.getenv('REPORT_RECIPIENTS', '').split(',') if r.strip()]
 
 class EmailDispatcher:
-    def __init__(self):
-        context = ssl.create_default_context()
-        self.server = smtplib.SMTP_SSL(SMTP_SERVER, SMTP_PORT, context=context)
-        self.server.login(SMTP_USER, SMTP_PASS)
-        print("[EmailDispatcher] Email server authenticated.")
+    def __init__(self, transport=None):
+        # The SMTP session is shared and opened lazily on first send
+        self.transport = transport or get_mail_transport()
 
-    def send_monthly_reports(self, year: int, month: int):
+    def send_monthly_reports(self, year: int, month: int, recipients: list = None):
         """
         Sends the generated monthly CSV and PDF reports to the Captain's inbox.
         """
@@ -30,35 +24,42 @@ class EmailDispatcher:
         csv_path = os.path.join(os.getcwd(), 'shipmate_ai', 'reports', f"shipmate_monthly_report_{month_str}.csv")
         pdf_path = os.path.join(os.getcwd(), 'shipmate_ai', 'reports', f"Commander_Report_{month_str}.pdf")
 
-        msg = EmailMessage()
-        msg['Subject'] = f"🛡️ Shipmate Monthly Commander Report - {month_str}"
-        msg['From'] = SMTP_USER
-        msg['To'] = ADMIN_EMAIL
-        msg.set_content(f"Captain,\n\nAttached are the Shipmate monthly reports for {month_str}.\n\nNEVER STOP ADVANCING.\n\n- Shipmate")
+        attachments = []
 
         # Attach CSV
         if os.path.exists(csv_path):
-            with open(csv_path, 'rb') as f:
-                msg.add_attachment(f.read(), maintype='application', subtype='csv', filename=os.path.basename(csv_path))
+            attachments.append({'path': csv_path, 'content_type': 'application/csv'})
             print(f"[EmailDispatcher] Attached {csv_path}")
         else:
             print(f"[EmailDispatcher] CSV file missing: {csv_path}")
 
         # Attach PDF
         if os.path.exists(pdf_path):
-            with open(pdf_path, 'rb') as f:
-                msg.add_attachment(f.read(), maintype='application', subtype='pdf', filename=os.path.basename(pdf_path))
+            attachments.append({'path': pdf_path, 'content_type': 'application/pdf'})
             print(f"[EmailDispatcher] Attached {pdf_path}")
         else:
             print(f"[EmailDispatcher] PDF file missing: {pdf_path}")
 
+        recipients = recipients or [ADMIN_EMAIL] + [r for r in REPORT_RECIPIENTS if r != ADMIN_EMAIL]
+        self.transport.enqueue(
+            recipients,
+            f"🛡️ Shipmate Monthly Commander Report - {month_str}",
+            f"Captain,\n\nAttached are the Shipmate monthly reports for {month_str}.\n\nNEVER STOP ADVANCING.\n\n- Shipmate",
+            attachments,
+            report_type='monthly_commander'
+        )
+
         try:
-            self.server.send_message(msg)
-            print("[EmailDispatcher] Monthly reports dispatched to Captain.")
+            result = self.transport.flush()
+            if result['failed']:
+                print(f"[EmailDispatcher] {result['failed']} email(s) left in the outbox for retry.")
+            else:
+                print("[EmailDispatcher] Monthly reports dispatched to Captain.")
         except Exception as e:
             print(f"[EmailDispatcher] Failed to send email: {e}")
 
     def close_connection(self):
-        if self.server:
-            self.server.quit()
-            print("[EmailDispatcher] Email server connection closed.")
+        """
+        Ends the shared SMTP session; the next send reconnects.
+        """
+        self.transport.close()
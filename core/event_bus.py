@@ -0,0 +1,163 @@
+# shipmate_ai/core/event_bus.py
+
+import os
+import json
+import time
+import uuid
+import itertools
+import queue
+import threading
+from datetime import datetime, timedelta
+from core.db_pool import get_connection
+
+DATABASE_PATH = os.path.join(os.getcwd(), 'shipmate_ledger.db')
+RELAY_POLL_SECONDS = 0.5            # how often subscribing processes pick up other processes' events
+EVENT_RETENTION_SECONDS = 60 * 60   # relayed events older than this are pruned
+PRUNE_EVERY = 500                   # publishes between prunes
+
+CREATE_EVENT_LOG_TABLE = '''
+    CREATE TABLE IF NOT EXISTS event_log (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        origin TEXT NOT NULL,
+        event_type TEXT NOT NULL,
+        timestamp TEXT NOT NULL,
+        data TEXT NOT NULL
+    )
+'''
+INSERT_EVENT_QUERY = "INSERT INTO event_log (origin, event_type, timestamp, data) VALUES (?, ?, ?, ?)"
+LAST_EVENT_ID_QUERY = "SELECT COALESCE(MAX(id), 0) FROM event_log"
+FOREIGN_EVENTS_QUERY = '''
+    SELECT id, event_type, timestamp, data FROM event_log
+    WHERE id > ? AND origin != ? ORDER BY id ASC
+'''
+PRUNE_EVENTS_QUERY = "DELETE FROM event_log WHERE timestamp < ?"
+
+class EventBus:
+    """
+    Publish/subscribe bus for live dashboard updates, shared across processes.
+
+    Publishers (notifications, ledger inserts, risk lockouts, the trading daemon) call
+    publish() once; every subscriber gets its own bounded queue, so the fan-out cost is
+    paid per event instead of per client page reload.
+
+    Each event is also appended to the event_log table. Subscribers in this process get
+    it directly; a relay thread, started by the first subscriber, polls the table for
+    events other processes published (e.g. the trading daemon's, for the dashboard's
+    SSE clients) and fans them out here.
+    """
+
+    def __init__(self, max_queue_size: int = 100, db_path: str = DATABASE_PATH):
+        self.max_queue_size = max_queue_size
+        self.db_path = db_path
+        self.origin = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._sequence = itertools.count(1)
+        self._table_ready = False
+        self._published = 0
+        self._relay = None
+
+    def _connection(self):
+        conn = get_connection(self.db_path)
+        if not self._table_ready:
+            with conn:
+                conn.execute(CREATE_EVENT_LOG_TABLE)
+            self._table_ready = True
+        return conn
+
+    def subscribe(self) -> queue.Queue:
+        """
+        Registers a new subscriber and returns the queue its events arrive on.
+        """
+        subscriber = queue.Queue(maxsize=self.max_queue_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+            if self._relay is None:
+                self._relay = threading.Thread(target=self._run_relay, name="EventBusRelay", daemon=True)
+                self._relay.start()
+        return subscriber
+
+    def unsubscribe(self, subscriber: queue.Queue):
+        """
+        Removes a subscriber queue (e.g. when an SSE client disconnects).
+        """
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, event_type: str, data: dict) -> dict:
+        """
+        Publishes an event to every subscriber without blocking the caller, and to the
+        event log for other processes. Slow subscribers drop their oldest pending event
+        instead of stalling publishers.
+        """
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        try:
+            event_id = self._append(event_type, timestamp, data)
+        except Exception as e:
+            # Local subscribers still get it; only other processes miss this one
+            print(f"[EventBus] Failed to log {event_type} event: {e}")
+            event_id = f"local-{next(self._sequence)}"
+        event = {'id': event_id, 'type': event_type, 'timestamp': timestamp, 'data': data}
+        self._fan_out(event)
+        return event
+
+    def _append(self, event_type: str, timestamp: str, data: dict) -> int:
+        conn = self._connection()
+        with conn:
+            event_id = conn.execute(INSERT_EVENT_QUERY, (
+                self.origin, event_type, timestamp, json.dumps(data, default=str)
+            )).lastrowid
+            self._published += 1
+            if self._published % PRUNE_EVERY == 0:
+                cutoff = datetime.now() - timedelta(seconds=EVENT_RETENTION_SECONDS)
+                conn.execute(PRUNE_EVENTS_QUERY, (cutoff.strftime("%Y-%m-%d %H:%M:%S"),))
+        return event_id
+
+    def _run_relay(self):
+        """
+        Fans out events logged by other processes. Starts at the newest event, so only
+        events published after the first subscription are relayed.
+        """
+        last_id = None
+        while True:
+            try:
+                conn = self._connection()
+                if last_id is None:
+                    last_id = conn.execute(LAST_EVENT_ID_QUERY).fetchone()[0]
+                for event_id, event_type, timestamp, data in conn.execute(FOREIGN_EVENTS_QUERY, (last_id, self.origin)).fetchall():
+                    last_id = event_id
+                    self._fan_out({'id': event_id, 'type': event_type, 'timestamp': timestamp, 'data': json.loads(data)})
+            except Exception as e:
+                print(f"[EventBus] Relay error: {e}")
+            time.sleep(RELAY_POLL_SECONDS)
+
+    def _fan_out(self, event: dict):
+        with self._lock:
+            subscribers = list(self._subscribers)
+
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                try:
+                    subscriber.get_nowait()
+                    subscriber.put_nowait(event)
+                except (queue.Empty, queue.Full):
+                    pass
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+# Process-wide bus; events from other processes sharing the ledger are relayed in
+event_bus = EventBus()
+
+def publish_event(event_type: str, data: dict) -> dict:
+    """
+    Publishes an event on the shared Shipmate event bus.
+    """
+    try:
+        return event_bus.publish(event_type, data)
+    except Exception as e:
+        print(f"[EventBus] Failed to publish {event_type} event: {e}")
+        return {}
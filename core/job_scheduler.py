@@ -0,0 +1,491 @@
+# shipmate_ai/core/job_scheduler.py
+
+import os
+import heapq
+import signal
+import calendar
+import itertools
+import threading
+import time as clock
+from datetime import datetime, date, time, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from core.db_pool import get_connection
+from core.market_calendar import MarketCalendar
+
+DATABASE_PATH = os.path.join(os.getcwd(), 'shipmate_ledger.db')
+SCHEDULER_WORKER_THREADS = int(os.getenv('SCHEDULER_WORKER_THREADS', 4))
+
+CREATE_JOB_STATE_TABLE = '''
+    CREATE TABLE IF NOT EXISTS scheduler_jobs (
+        name TEXT PRIMARY KEY,
+        last_run TEXT,
+        last_status TEXT,
+        last_error TEXT,
+        last_duration REAL,
+        runs INTEGER NOT NULL DEFAULT 0
+    )
+'''
+SELECT_JOB_STATE_QUERY = "SELECT name, last_run, runs FROM scheduler_jobs"
+UPSERT_JOB_STATE_QUERY = '''
+    INSERT INTO scheduler_jobs (name, last_run, last_status, last_error, last_duration, runs)
+    VALUES (?, ?, ?, ?, ?, 1)
+    ON CONFLICT(name) DO UPDATE SET
+        last_run = excluded.last_run, last_status = excluded.last_status,
+        last_error = excluded.last_error, last_duration = excluded.last_duration, runs = runs + 1
+'''
+
+# How far ahead a trigger searches before giving up (e.g. "0 0 30 2 *" never fires)
+MAX_LOOKAHEAD_DAYS = 366 * 5
+MAX_MISSED_SCAN = 10000
+
+MONTH_NAMES = {name: i for i, name in enumerate(
+    ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'], start=1)}
+WEEKDAY_NAMES = {name: i for i, name in enumerate(['sun', 'mon', 'tue', 'wed', 'thu', 'fri', 'sat'])}
+
+def _localize(moment: datetime, tz) -> datetime:
+    """
+    Aware datetime in `tz` (system local time when tz is None).
+    """
+    if moment.tzinfo is None:
+        moment = moment.astimezone()
+    return moment.astimezone(tz) if tz else moment.astimezone()
+
+def _attach(naive: datetime, tz) -> datetime:
+    return naive.replace(tzinfo=tz) if tz else naive.astimezone()
+
+# --- Triggers: next_fire(after) -> first fire time strictly after `after`, or None ---
+
+class CronTrigger:
+    """
+    Standard five-field cron expression: minute hour day-of-month month day-of-week.
+    Supports *, lists, ranges, steps and month/weekday names. As in Vixie cron, when both
+    day fields are restricted a day matches if either does.
+    """
+
+    FIELDS = (('minute', 0, 59, {}), ('hour', 0, 23, {}), ('day', 1, 31, {}),
+              ('month', 1, 12, MONTH_NAMES), ('weekday', 0, 7, WEEKDAY_NAMES))
+
+    def __init__(self, expression: str, tz=None):
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: '{expression}'")
+        self.expression = expression
+        self.tz = tz
+        values = {}
+        for text, (name, low, high, names) in zip(parts, self.FIELDS):
+            values[name] = self._parse_field(text, low, high, names)
+        self.minutes = sorted(values['minute'])
+        self.hours = sorted(values['hour'])
+        self.days = values['day']
+        self.months = values['month']
+        self.weekdays = {d % 7 for d in values['weekday']}   # 7 is also Sunday
+        self.any_day = parts[2] == '*'
+        self.any_weekday = parts[4] == '*'
+
+    @staticmethod
+    def _parse_field(text: str, low: int, high: int, names: dict) -> set:
+        def value(token):
+            token = token.lower()
+            number = names[token] if token in names else int(token)
+            if not low <= number <= high:
+                raise ValueError(f"Cron value {token} outside {low}-{high}")
+            return number
+
+        result = set()
+        for item in text.split(','):
+            span, _, step = item.partition('/')
+            step = int(step) if step else 1
+            if span == '*':
+                start, end = low, high
+            elif '-' in span:
+                start, end = (value(token) for token in span.split('-', 1))
+            else:
+                start = value(span)
+                end = high if step > 1 else start
+            result.update(range(start, end + 1, step))
+        return result
+
+    def _day_matches(self, day: date) -> bool:
+        if day.month not in self.months:
+            return False
+        in_days = day.day in self.days
+        in_weekdays = (day.weekday() + 1) % 7 in self.weekdays
+        if self.any_day and self.any_weekday:
+            return True
+        if self.any_day:
+            return in_weekdays
+        if self.any_weekday:
+            return in_days
+        return in_days or in_weekdays
+
+    def next_fire(self, after: datetime):
+        local = _localize(after, self.tz).replace(tzinfo=None)
+        candidate = local.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        day = candidate.date()
+        for _ in range(MAX_LOOKAHEAD_DAYS):
+            if self._day_matches(day):
+                start = (candidate.hour, candidate.minute) if day == candidate.date() else (0, 0)
+                for hour in self.hours:
+                    if hour < start[0]:
+                        continue
+                    for minute in self.minutes:
+                        if (hour, minute) >= start:
+                            return _attach(datetime.combine(day, time(hour, minute)), self.tz)
+            day += timedelta(days=1)
+        return None
+
+    def __repr__(self):
+        return f"cron({self.expression})"
+
+class IntervalTrigger:
+    """
+    Every `seconds`, aligned to clock multiples (bar closes) unless align=False. With a
+    market calendar, only fire times inside a session, (open, close], count. `delay` shifts
+    each fire past the boundary, e.g. so a venue has published the closed bar.
+    """
+
+    def __init__(self, seconds: float, align: bool = True, calendar: MarketCalendar = None, delay: float = 0.0):
+        if seconds <= 0:
+            raise ValueError("Interval must be positive")
+        self.seconds = seconds
+        self.align = align
+        self.calendar = calendar
+        self.delay = delay
+
+    def next_fire(self, after: datetime):
+        after = _localize(after, timezone.utc) - timedelta(seconds=self.delay)
+        epoch = after.timestamp()
+        if self.align:
+            boundary = datetime.fromtimestamp((epoch // self.seconds + 1) * self.seconds, timezone.utc)
+            if boundary <= after:
+                # Float rounding on sub-second intervals can land back on `after`
+                boundary += timedelta(seconds=self.seconds)
+        else:
+            boundary = after + timedelta(seconds=self.seconds)
+        if self.calendar is not None and not self.calendar.always_open:
+            for _ in range(MAX_LOOKAHEAD_DAYS):
+                session = self.calendar.session(self.calendar._localize(boundary).date())
+                if session and session[0] < boundary <= session[1]:
+                    break
+                boundary = self.calendar.next_open(boundary) + timedelta(seconds=self.seconds)
+            else:
+                return None
+        return boundary + timedelta(seconds=self.delay)
+
+    def __repr__(self):
+        return f"every({self.seconds}s)"
+
+class MonthlyTrigger:
+    """
+    Once a month on `day` at `at` local time. Days past the month's end (or -1) mean the last day.
+    """
+
+    def __init__(self, day: int = 1, at: time = time(0, 0), tz=None):
+        if day == 0 or not -1 <= day <= 31:
+            raise ValueError("day must be 1-31 or -1 for the last day")
+        self.day = day
+        self.at = at
+        self.tz = tz
+
+    def _fire_in(self, year: int, month: int) -> datetime:
+        last = calendar.monthrange(year, month)[1]
+        day = last if self.day == -1 else min(self.day, last)
+        return _attach(datetime.combine(date(year, month, day), self.at), self.tz)
+
+    def next_fire(self, after: datetime):
+        local = _localize(after, self.tz)
+        year, month = local.year, local.month
+        for _ in range(13):
+            fire = self._fire_in(year, month)
+            if fire > after:
+                return fire
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        return None
+
+    def __repr__(self):
+        return f"monthly(day={self.day}, at={self.at})"
+
+class MarketCalendarTrigger:
+    """
+    Fires relative to each trading session: `offset` after the open (event='open') or the
+    close (event='close'). Negative offsets fire before the bell, e.g. a pre-market sit-rep.
+    """
+
+    def __init__(self, calendar: MarketCalendar, event: str = 'open', offset: timedelta = timedelta(0)):
+        if event not in ('open', 'close'):
+            raise ValueError("event must be 'open' or 'close'")
+        self.calendar = calendar
+        self.event = event
+        self.offset = offset
+
+    def next_fire(self, after: datetime):
+        after = self.calendar._localize(after)
+        # Start a day early so a negative offset can fire before today's open
+        day = after.date() - timedelta(days=1)
+        for _ in range(MAX_LOOKAHEAD_DAYS):
+            session = self.calendar.session(day)
+            if session:
+                fire = session[0 if self.event == 'open' else 1] + self.offset
+                if fire > after:
+                    return fire
+            day += timedelta(days=1)
+        return None
+
+    def __repr__(self):
+        return f"{self.calendar.name} {self.event} {'-' if self.offset < timedelta(0) else '+'}{abs(self.offset)}"
+
+class ScheduledJob:
+    """
+    A registered job and its run bookkeeping.
+
+    misfire: what to do when fire times were missed (process down, loop stalled):
+        'run_once' runs once now for all missed fires; 'skip' waits for the next one.
+    grace: missed fires older than this many seconds are skipped even under 'run_once'.
+    """
+
+    def __init__(self, name, func, trigger, args=(), kwargs=None, executor='thread',
+                 misfire='run_once', grace: float = None):
+        if executor not in ('thread', 'process'):
+            raise ValueError("executor must be 'thread' or 'process'")
+        if misfire not in ('run_once', 'skip'):
+            raise ValueError("misfire must be 'run_once' or 'skip'")
+        self.name = name
+        self.func = func
+        self.trigger = trigger
+        self.args = tuple(args)
+        self.kwargs = dict(kwargs or {})
+        self.executor = executor
+        self.misfire = misfire
+        self.grace = grace
+
+        self.next_run = None
+        self.last_run = None
+        self.running = False
+        self.runs = 0
+        self.failures = 0
+        self.overlaps = 0
+        self.missed = 0
+        self.last_status = None
+        self.last_error = None
+        self.last_duration = None
+        self.version = 0          # bumps on reschedule/removal; stale heap entries are ignored
+
+    def status(self) -> dict:
+        return {
+            'trigger': repr(self.trigger),
+            'next_run': self.next_run.isoformat() if self.next_run else None,
+            'last_run': self.last_run.isoformat() if self.last_run else None,
+            'running': self.running,
+            'runs': self.runs,
+            'failures': self.failures,
+            'overlaps': self.overlaps,
+            'missed': self.missed,
+            'last_status': self.last_status,
+            'last_error': self.last_error,
+            'last_duration': round(self.last_duration, 3) if self.last_duration is not None else None
+        }
+
+class JobScheduler:
+    """
+    Single in-process scheduler for Shipmate's recurring work (resets, reports, sit-reps).
+
+    Next fire times live in a heap; the dispatcher thread sleeps on a condition until
+    the earliest one (or until a job is added), so idle cost is one blocked thread and
+    timing is limited only by the OS timer. Jobs run on a thread pool, or a process pool
+    for CPU-heavy picklable callables. A job still running when it comes due again is
+    not started twice. Last-run times persist in SQLite so fires missed while the process
+    was down are caught up on start, according to each job's misfire policy.
+    """
+
+    def __init__(self, db_path: str = DATABASE_PATH, max_workers: int = SCHEDULER_WORKER_THREADS,
+                 process_workers: int = 2):
+        self.db_path = db_path
+        self.jobs = {}
+        self._heap = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._threads = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ScheduledJob")
+        self._process_workers = process_workers
+        self._processes = None
+        self._dispatcher = None
+        self._running = False
+        self._ensure_table()
+        self._history = self._load_history()
+
+    def _ensure_table(self):
+        conn = get_connection(self.db_path)
+        with conn:
+            conn.execute(CREATE_JOB_STATE_TABLE)
+
+    def _load_history(self) -> dict:
+        rows = get_connection(self.db_path).execute(SELECT_JOB_STATE_QUERY).fetchall()
+        return {name: (datetime.fromisoformat(last_run) if last_run else None, runs) for name, last_run, runs in rows}
+
+    # --- Registration ---
+    def add_job(self, name: str, func, trigger, args=(), kwargs=None, executor: str = 'thread',
+                misfire: str = 'run_once', grace: float = None) -> ScheduledJob:
+        job = ScheduledJob(name, func, trigger, args, kwargs, executor, misfire, grace)
+        now = datetime.now(timezone.utc)
+        last_run, runs = self._history.get(name, (None, 0))
+        job.last_run, job.runs = last_run, runs
+        with self._condition:
+            if name in self.jobs:
+                self.jobs[name].version += 1
+            self.jobs[name] = job
+            # Catch-up: resume from the last recorded run so fires missed while down are seen
+            self._schedule(job, job.trigger.next_fire(last_run) if last_run else job.trigger.next_fire(now), now)
+            self._condition.notify()
+        print(f"[JobScheduler] Job '{name}' scheduled ({job.trigger!r}), next run {job.next_run}.")
+        return job
+
+    def remove_job(self, name: str) -> bool:
+        with self._condition:
+            job = self.jobs.pop(name, None)
+            if job is None:
+                return False
+            job.version += 1
+            self._condition.notify()
+        return True
+
+    def run_job_now(self, name: str) -> bool:
+        with self._condition:
+            job = self.jobs.get(name)
+            if job is None:
+                return False
+            job.version += 1
+            job.next_run = datetime.now(timezone.utc)
+            heapq.heappush(self._heap, (job.next_run.timestamp(), next(self._sequence), job.version, job))
+            self._condition.notify()
+        return True
+
+    def _schedule(self, job: ScheduledJob, fire: datetime, now: datetime):
+        """
+        Pushes the job's next fire. Fires already in the past are missed runs: coalesced
+        into a single immediate run, or skipped per the job's misfire policy and grace.
+        """
+        if fire is not None and fire <= now:
+            missed = 0
+            latest = fire
+            while fire is not None and fire <= now:
+                missed += 1
+                latest = fire
+                fire = job.trigger.next_fire(fire)
+                if missed >= MAX_MISSED_SCAN:
+                    # Long outage on a short interval: stop counting individual fires
+                    latest = now
+                    fire = job.trigger.next_fire(now)
+                    break
+            late = (now - latest).total_seconds()
+            if job.misfire == 'run_once' and (job.grace is None or late <= job.grace):
+                missed -= 1
+                fire = now
+            job.missed += missed
+            if missed:
+                print(f"[JobScheduler] ⏭️ Job '{job.name}' skipped {missed} missed run(s).")
+        job.version += 1
+        job.next_run = fire
+        if fire is not None:
+            heapq.heappush(self._heap, (fire.timestamp(), next(self._sequence), job.version, job))
+
+    # --- Dispatch ---
+    def _dispatch_loop(self):
+        with self._condition:
+            while self._running:
+                if not self._heap:
+                    self._condition.wait()
+                    continue
+                fire_at, _, version, job = self._heap[0]
+                if version != job.version or self.jobs.get(job.name) is not job:
+                    heapq.heappop(self._heap)          # rescheduled or removed
+                    continue
+                delay = fire_at - clock.time()
+                if delay > 0:
+                    self._condition.wait(timeout=delay)
+                    continue
+                heapq.heappop(self._heap)
+                now = datetime.now(timezone.utc)
+                if job.running:
+                    job.overlaps += 1
+                    print(f"[JobScheduler] ⚠️ Job '{job.name}' still running; skipping this run.")
+                else:
+                    self._start(job)
+                self._schedule(job, job.trigger.next_fire(now), now)
+
+    def _start(self, job: ScheduledJob):
+        job.running = True
+        started_at = datetime.now(timezone.utc)
+        started = clock.perf_counter()
+        if job.executor == 'process':
+            if self._processes is None:
+                self._processes = ProcessPoolExecutor(max_workers=self._process_workers)
+            future = self._processes.submit(job.func, *job.args, **job.kwargs)
+        else:
+            future = self._threads.submit(job.func, *job.args, **job.kwargs)
+        future.add_done_callback(lambda f: self._finish(job, f, started_at, started))
+
+    def _finish(self, job: ScheduledJob, future, started_at: datetime, started: float):
+        job.last_duration = clock.perf_counter() - started
+        job.last_run = started_at
+        job.runs += 1
+        error = future.exception()
+        if error is None:
+            job.last_status, job.last_error = 'ok', None
+        else:
+            job.failures += 1
+            job.last_status, job.last_error = 'error', str(error)
+            print(f"[JobScheduler] ❌ Job '{job.name}' failed: {error}")
+        job.running = False
+        conn = get_connection(self.db_path)
+        with conn:
+            conn.execute(UPSERT_JOB_STATE_QUERY, (
+                job.name, started_at.isoformat(), job.last_status, job.last_error, job.last_duration
+            ))
+
+    # --- Lifecycle ---
+    def start(self):
+        """
+        Starts the dispatcher in a background thread.
+        """
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name="JobScheduler", daemon=True)
+        self._dispatcher.start()
+        print("[JobScheduler] Shipmate job scheduler operational...")
+
+    def shutdown(self, wait: bool = True):
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._dispatcher:
+            self._dispatcher.join()
+        self._threads.shutdown(wait=wait)
+        if self._processes:
+            self._processes.shutdown(wait=wait)
+        print("[JobScheduler] Scheduler stopped.")
+
+    def run_forever(self):
+        """
+        Runs in the foreground until SIGINT/SIGTERM.
+        """
+        stop = threading.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, lambda *_: stop.set())
+        self.start()
+        stop.wait()
+        self.shutdown()
+
+    def status(self) -> dict:
+        with self._condition:
+            return {name: job.status() for name, job in self.jobs.items()}
+
+def cron(expression: str, tz=None) -> CronTrigger:
+    return CronTrigger(expression, tz)
+
+def daily_at(hhmm: str, tz=None) -> CronTrigger:
+    """
+    Cron trigger for a "HH:MM" time of day.
+    """
+    hour, minute = (int(part) for part in hhmm.split(':'))
+    return CronTrigger(f"{minute} {hour} * * *", tz)
@@ -43,6 +43,20 @@ class KrakenConnector:
         except Exception as e:
             return f"Exception occurred: {e}"
 
+    def get_ohlc(self, pair, interval=1):
+        """
+        Public OHLC rows [time, open, high, low, close, vwap, volume, count], oldest first;
+        the last row is the bar still forming.
+        interval: bar length in minutes
+        """
+        try:
+            response = self.api.query_public('OHLC', {'pair': pair, 'interval': interval})
+            if response['error']:
+                return f"Error retrieving OHLC: {response['error']}"
+            return next(rows for key, rows in response['result'].items() if key != 'last')
+        except Exception as e:
+            return f"Exception occurred: {e}"
+
     def get_open_orders(self):
         """
         Retrieves all currently open orders.
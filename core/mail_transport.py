@@ -0,0 +1,337 @@
+# shipmate_ai/core/mail_transport.py
+
+import os
+import ssl
+import json
+import time
+import uuid
+import atexit
+import base64
+import smtplib
+import threading
+import mimetypes
+import tempfile
+from datetime import datetime
+from email.header import Header
+from email.utils import formatdate, make_msgid
+from dotenv import load_dotenv
+from core.db_pool import get_connection
+
+# Load environment variables
+load_dotenv()
+
+DATABASE_PATH = os.path.join(os.getcwd(), 'shipmate_ledger.db')
+
+SMTP_SERVER = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
+SMTP_PORT = int(os.getenv('SMTP_PORT', 465))
+SMTP_USER = os.getenv('SMTP_USER')
+SMTP_PASS = os.getenv('SMTP_PASS')
+ADMIN_EMAIL = os.getenv('ADMIN_EMAIL')
+# Set SMTP_USE_SSL=0 (and SMTP_PORT=1025) to talk to a local debugging server,
+# e.g. `python -m aiosmtpd -n -l localhost:1025`
+SMTP_USE_SSL = os.getenv('SMTP_USE_SSL', '1').lower() not in ('0', 'false', 'no')
+SMTP_TIMEOUT = float(os.getenv('SMTP_TIMEOUT', 30))
+SMTP_IDLE_CHECK_SECONDS = 60
+MAX_SEND_ATTEMPTS = 5
+CLAIM_TIMEOUT_SECONDS = 15 * 60       # a 'sending' row older than this belongs to a dead flush
+
+ATTACHMENT_READ_SIZE = 57 * 1024       # multiple of 57 bytes -> whole 76-char base64 lines
+SPOOL_MEMORY_LIMIT = 1024 * 1024       # spill MIME bodies above 1 MB to a temp file
+STREAM_CHUNK_SIZE = 64 * 1024
+
+CREATE_MAIL_OUTBOX_TABLE = '''
+    CREATE TABLE IF NOT EXISTS mail_outbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        report_type TEXT,
+        sender TEXT,
+        recipients TEXT NOT NULL,
+        subject TEXT NOT NULL,
+        body TEXT NOT NULL,
+        attachments TEXT,
+        status TEXT DEFAULT 'pending',
+        attempts INTEGER DEFAULT 0,
+        last_error TEXT,
+        created_at TEXT NOT NULL,
+        claimed_by TEXT,
+        claimed_at REAL
+    )
+'''
+# Outboxes created before rows were claimed
+MAIL_COLUMN_MIGRATIONS = (
+    ("claimed_by", "ALTER TABLE mail_outbox ADD COLUMN claimed_by TEXT"),
+    ("claimed_at", "ALTER TABLE mail_outbox ADD COLUMN claimed_at REAL"),
+)
+INSERT_MAIL_QUERY = '''
+    INSERT INTO mail_outbox (report_type, sender, recipients, subject, body, attachments, created_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+# One statement, so each message is claimed by exactly one flush across processes
+CLAIM_MAIL_QUERY = '''
+    UPDATE mail_outbox SET status = 'sending', claimed_by = ?, claimed_at = ?
+    WHERE status = 'pending' OR (status = 'sending' AND claimed_at <= ?)
+'''
+CLAIMED_MAIL_QUERY = '''
+    SELECT id, sender, recipients, subject, body, attachments, attempts
+    FROM mail_outbox WHERE status = 'sending' AND claimed_by = ? ORDER BY id ASC
+'''
+PENDING_COUNT_QUERY = "SELECT COUNT(*) FROM mail_outbox WHERE status IN ('pending', 'sending')"
+MARK_SENT_QUERY = '''
+    UPDATE mail_outbox SET status = 'sent', attempts = attempts + 1, last_error = NULL, claimed_by = NULL
+    WHERE id = ? AND claimed_by = ?
+'''
+MARK_FAILED_QUERY = '''
+    UPDATE mail_outbox SET status = ?, attempts = ?, last_error = ?, claimed_by = NULL, claimed_at = NULL
+    WHERE id = ? AND claimed_by = ?
+'''
+
+class MailTransport:
+    """
+    Reusable, authenticated SMTP session plus a persistent outbox.
+
+    The session is opened on first use, checked with NOOP after it has been idle,
+    and transparently re-established if the server dropped it. Messages are written
+    as MIME into a spooled temp file with attachments base64-encoded chunk by chunk,
+    then streamed to the server, so large PDFs are never held in memory whole.
+    """
+
+    def __init__(self, host: str = SMTP_SERVER, port: int = SMTP_PORT, username: str = SMTP_USER,
+                 password: str = SMTP_PASS, use_ssl: bool = SMTP_USE_SSL, db_path: str = DATABASE_PATH):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_ssl = use_ssl
+        self.db_path = db_path
+        self.default_sender = username or ADMIN_EMAIL
+        self._server = None
+        self._last_used = 0.0
+        self._lock = threading.RLock()
+        self._ensure_table()
+
+    def _ensure_table(self):
+        conn = get_connection(self.db_path)
+        with conn:
+            conn.execute(CREATE_MAIL_OUTBOX_TABLE)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(mail_outbox)")}
+            for column, migration in MAIL_COLUMN_MIGRATIONS:
+                if column not in columns:
+                    conn.execute(migration)
+
+    # --- Session management ---
+
+    def _connect(self):
+        if self.use_ssl:
+            context = ssl.create_default_context()
+            server = smtplib.SMTP_SSL(self.host, self.port, context=context, timeout=SMTP_TIMEOUT)
+        else:
+            server = smtplib.SMTP(self.host, self.port, timeout=SMTP_TIMEOUT)
+        server.ehlo()
+        if self.username and self.password:
+            server.login(self.username, self.password)
+        print(f"[MailTransport] SMTP session established with {self.host}:{self.port}.")
+        return server
+
+    def _session(self):
+        if self._server is not None and time.time() - self._last_used > SMTP_IDLE_CHECK_SECONDS:
+            try:
+                code, _ = self._server.noop()
+                if code != 250:
+                    raise smtplib.SMTPServerDisconnected(f"NOOP returned {code}")
+            except (smtplib.SMTPException, OSError):
+                self._drop_session()
+        if self._server is None:
+            self._server = self._connect()
+        return self._server
+
+    def _drop_session(self):
+        if self._server is not None:
+            try:
+                self._server.close()
+            except Exception:
+                pass
+        self._server = None
+
+    def close(self):
+        """
+        Politely ends the SMTP session (process shutdown).
+        """
+        with self._lock:
+            if self._server is not None:
+                try:
+                    self._server.quit()
+                except Exception:
+                    pass
+                self._server = None
+                print("[MailTransport] SMTP session closed.")
+
+    # --- Sending ---
+
+    def send_now(self, recipients, subject: str, body: str, attachments=None, sender: str = None):
+        """
+        Sends one message immediately over the shared session, reconnecting once if the
+        session went stale. Raises on failure.
+        """
+        sender = sender or self.default_sender
+        recipients = [r for r in recipients if r]
+        if not recipients:
+            raise ValueError("No recipients configured for email.")
+
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_LIMIT) as message_file:
+            self._write_mime(message_file, sender, recipients, subject, body, attachments or [])
+            with self._lock:
+                for attempt in range(2):
+                    try:
+                        message_file.seek(0)
+                        self._stream_message(self._session(), sender, recipients, message_file)
+                        self._last_used = time.time()
+                        return
+                    except (smtplib.SMTPServerDisconnected, ConnectionError, OSError) as e:
+                        self._drop_session()
+                        if attempt == 1:
+                            raise
+                        print(f"[MailTransport] Session lost ({e}). Reconnecting...")
+
+    def enqueue(self, recipients, subject: str, body: str, attachments=None,
+                report_type: str = None, sender: str = None) -> int:
+        """
+        Persists a message in the mail outbox. Attachments are stored by path and read at send time.
+        """
+        conn = get_connection(self.db_path)
+        with conn:
+            cursor = conn.execute(INSERT_MAIL_QUERY, (
+                report_type, sender or self.default_sender, json.dumps(list(recipients)),
+                subject, body, json.dumps(attachments or []), datetime.now().isoformat()
+            ))
+        return cursor.lastrowid
+
+    def pending_count(self) -> int:
+        return get_connection(self.db_path).execute(PENDING_COUNT_QUERY).fetchone()[0]
+
+    def flush(self) -> dict:
+        """
+        Claims and sends every pending outbox message. Failures go back to pending (up to
+        MAX_SEND_ATTEMPTS) for the next flush, including after a restart; the scheduler's
+        mail_outbox_retry job flushes periodically. Concurrent flushes, in this process or
+        another, never send the same message twice.
+        """
+        claim_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        conn = get_connection(self.db_path)
+        now = time.time()
+        with conn:
+            conn.execute(CLAIM_MAIL_QUERY, (claim_id, now, now - CLAIM_TIMEOUT_SECONDS))
+        claimed = conn.execute(CLAIMED_MAIL_QUERY, (claim_id,)).fetchall()
+        sent, failed = 0, 0
+        for message_id, sender, recipients, subject, body, attachments, attempts in claimed:
+            try:
+                self.send_now(json.loads(recipients), subject, body, json.loads(attachments or '[]'), sender=sender)
+                with conn:
+                    conn.execute(MARK_SENT_QUERY, (message_id, claim_id))
+                sent += 1
+            except Exception as e:
+                attempts += 1
+                status = 'failed' if attempts >= MAX_SEND_ATTEMPTS else 'pending'
+                with conn:
+                    conn.execute(MARK_FAILED_QUERY, (status, attempts, str(e)[:500], message_id, claim_id))
+                failed += 1
+                print(f"[MailTransport] Failed to send outbox message {message_id}: {e}")
+        return {'sent': sent, 'failed': failed}
+
+    # --- Streaming MIME ---
+
+    def _write_mime(self, out, sender, recipients, subject, body, attachments):
+        boundary = f"=_shipmate_{make_msgid().strip('<>').replace('@', '.')}"
+        headers = [
+            f"From: {sender}",
+            f"To: {', '.join(recipients)}",
+            f"Subject: {Header(subject, 'utf-8').encode()}",
+            f"Date: {formatdate(localtime=True)}",
+            f"Message-ID: {make_msgid()}",
+            "MIME-Version: 1.0",
+            f'Content-Type: multipart/mixed; boundary="{boundary}"',
+        ]
+        out.write(("\r\n".join(headers) + "\r\n\r\n").encode('ascii'))
+
+        out.write((
+            f"--{boundary}\r\n"
+            'Content-Type: text/plain; charset="utf-8"\r\n'
+            "Content-Transfer-Encoding: base64\r\n\r\n"
+        ).encode('ascii'))
+        out.write(base64.encodebytes(body.encode('utf-8')).replace(b"\n", b"\r\n"))
+
+        for attachment in attachments:
+            path = attachment['path'] if isinstance(attachment, dict) else attachment
+            filename = (attachment.get('filename') if isinstance(attachment, dict) else None) or os.path.basename(path)
+            content_type = (attachment.get('content_type') if isinstance(attachment, dict) else None) \
+                or mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+            out.write((
+                f"--{boundary}\r\n"
+                f'Content-Type: {content_type}; name="{filename}"\r\n'
+                "Content-Transfer-Encoding: base64\r\n"
+                f'Content-Disposition: attachment; filename="{filename}"\r\n\r\n'
+            ).encode('ascii'))
+            with open(path, 'rb') as f:
+                while True:
+                    chunk = f.read(ATTACHMENT_READ_SIZE)
+                    if not chunk:
+                        break
+                    out.write(base64.encodebytes(chunk).replace(b"\n", b"\r\n"))
+
+        out.write(f"--{boundary}--\r\n".encode('ascii'))
+
+    def _stream_message(self, server, sender, recipients, message_file):
+        """
+        Runs the SMTP DATA exchange by hand so the body is sent in chunks from the spool file.
+        """
+        server.ehlo_or_helo_if_needed()
+        code, resp = server.mail(sender)
+        if code != 250:
+            raise smtplib.SMTPSenderRefused(code, resp, sender)
+        accepted = 0
+        for recipient in recipients:
+            code, resp = server.rcpt(recipient)
+            if code in (250, 251):
+                accepted += 1
+            else:
+                print(f"[MailTransport] Recipient refused {recipient}: {code} {resp}")
+        if not accepted:
+            server.rset()
+            raise smtplib.SMTPRecipientsRefused({r: (code, resp) for r in recipients})
+
+        server.putcmd("data")
+        code, resp = server.getreply()
+        if code != 354:
+            server.rset()
+            raise smtplib.SMTPDataError(code, resp)
+
+        buffer = []
+        size = 0
+        for line in message_file:
+            # Dot-stuffing (RFC 5321 4.5.2); base64 lines never start with '.', headers may
+            if line.startswith(b"."):
+                line = b"." + line
+            buffer.append(line)
+            size += len(line)
+            if size >= STREAM_CHUNK_SIZE:
+                server.send(b"".join(buffer))
+                buffer, size = [], 0
+        if buffer:
+            server.send(b"".join(buffer))
+        server.send(b".\r\n")
+
+        code, resp = server.getreply()
+        if code != 250:
+            raise smtplib.SMTPDataError(code, resp)
+
+_transport = None
+_transport_lock = threading.Lock()
+
+def get_mail_transport() -> MailTransport:
+    """
+    Returns the process-wide mail transport (one SMTP session per process).
+    """
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            _transport = MailTransport()
+            atexit.register(_transport.close)
+    return _transport
@@ -0,0 +1,175 @@
+# shipmate_ai/core/market_calendar.py
+
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+MARKET_TIMEZONE = ZoneInfo("America/New_York")
+REGULAR_OPEN = time(9, 30)
+REGULAR_CLOSE = time(16, 0)
+EARLY_CLOSE = time(13, 0)
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """
+    n-th given weekday (Mon=0) of a month; n=-1 for the last one.
+    """
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+def _easter(year: int) -> date:
+    # Anonymous Gregorian algorithm
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month = (h + l - 7 * m + 114) // 31
+    day = (h + l - 7 * m + 114) % 31 + 1
+    return date(year, month, day)
+
+def _observed(day: date) -> date:
+    # Saturday holidays are observed Friday, Sunday holidays Monday
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+@lru_cache(maxsize=32)
+def nyse_holidays(year: int) -> frozenset:
+    """
+    NYSE full-day closures for a year (standard rules; ad-hoc closures are not modelled).
+    """
+    holidays = {
+        _nth_weekday(year, 1, 0, 3),          # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),          # Washington's Birthday
+        _easter(year) - timedelta(days=2),    # Good Friday
+        _nth_weekday(year, 5, 0, -1),         # Memorial Day
+        _observed(date(year, 7, 4)),          # Independence Day
+        _nth_weekday(year, 9, 0, 1),          # Labor Day
+        _nth_weekday(year, 11, 3, 4),         # Thanksgiving
+        _observed(date(year, 12, 25)),        # Christmas
+    }
+    # New Year's Day falling on a Saturday is not observed on the prior Friday
+    new_year = _observed(date(year, 1, 1))
+    if new_year.year == year:
+        holidays.add(new_year)
+    if year >= 2022:
+        holidays.add(_observed(date(year, 6, 19)))    # Juneteenth
+    return frozenset(holidays)
+
+@lru_cache(maxsize=32)
+def nyse_early_closes(year: int) -> frozenset:
+    """
+    1:00 PM closes: July 3rd, the day after Thanksgiving and Christmas Eve (when trading days).
+    """
+    candidates = {
+        date(year, 7, 3),
+        _nth_weekday(year, 11, 3, 4) + timedelta(days=1),
+        date(year, 12, 24),
+    }
+    holidays = nyse_holidays(year)
+    return frozenset(day for day in candidates if day.weekday() < 5 and day not in holidays)
+
+class MarketCalendar:
+    """
+    Regular-session calendar for US equities (NYSE hours in America/New_York).
+
+    All methods accept naive datetimes (taken as local system time) or aware ones, and
+    return aware datetimes in the market timezone.
+    """
+
+    name = "NYSE"
+    always_open = False
+
+    def __init__(self, timezone: ZoneInfo = MARKET_TIMEZONE):
+        self.timezone = timezone
+
+    def _localize(self, moment: datetime = None) -> datetime:
+        if moment is None:
+            return datetime.now(self.timezone)
+        if moment.tzinfo is None:
+            moment = moment.astimezone()
+        return moment.astimezone(self.timezone)
+
+    def is_trading_day(self, day: date) -> bool:
+        return day.weekday() < 5 and day not in nyse_holidays(day.year)
+
+    def session(self, day: date):
+        """
+        (open, close) for a trading day, or None when the market is closed all day.
+        """
+        if not self.is_trading_day(day):
+            return None
+        close = EARLY_CLOSE if day in nyse_early_closes(day.year) else REGULAR_CLOSE
+        return (datetime.combine(day, REGULAR_OPEN, self.timezone),
+                datetime.combine(day, close, self.timezone))
+
+    def is_open(self, moment: datetime = None) -> bool:
+        moment = self._localize(moment)
+        session = self.session(moment.date())
+        return bool(session) and session[0] <= moment < session[1]
+
+    def next_open(self, moment: datetime = None) -> datetime:
+        """
+        Start of the next session strictly after `moment` (a session in progress does not count).
+        """
+        moment = self._localize(moment)
+        day = moment.date()
+        while True:
+            session = self.session(day)
+            if session and session[0] > moment:
+                return session[0]
+            day += timedelta(days=1)
+
+    def next_close(self, moment: datetime = None) -> datetime:
+        """
+        End of the current session if open, else end of the next one.
+        """
+        moment = self._localize(moment)
+        day = moment.date()
+        while True:
+            session = self.session(day)
+            if session and session[1] > moment:
+                return session[1]
+            day += timedelta(days=1)
+
+    def current_session(self, moment: datetime = None):
+        """
+        (open, close) of the session in progress, or None.
+        """
+        moment = self._localize(moment)
+        session = self.session(moment.date())
+        if session and session[0] <= moment < session[1]:
+            return session
+        return None
+
+class AlwaysOpenCalendar(MarketCalendar):
+    """
+    24/7 venues (crypto): every moment is in session; sessions are UTC calendar days.
+    """
+
+    name = "24/7"
+    always_open = True
+
+    def __init__(self, timezone: ZoneInfo = ZoneInfo("UTC")):
+        super().__init__(timezone)
+
+    def is_trading_day(self, day: date) -> bool:
+        return True
+
+    def session(self, day: date):
+        start = datetime.combine(day, time(0, 0), self.timezone)
+        return start, start + timedelta(days=1)
+
+    def is_open(self, moment: datetime = None) -> bool:
+        return True
+
+NYSE_CALENDAR = MarketCalendar()
+CRYPTO_CALENDAR = AlwaysOpenCalendar()
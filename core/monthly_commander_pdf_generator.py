@@ -1,10 +1,11 @@
 # shipmate_ai/core/monthly_commander_pdf_generator.py
 
+import io
 import os
 import sqlite3
 from datetime import datetime
 from fpdf import FPDF
-import matplotlib.pyplot as plt
+from core.chart_renderer import chart_renderer
 
 DATABASE_PATH = os.path.join(os.getcwd(), 'shipmate_ledger.db')
 REPORTS_DIR = os.path.join(os.getcwd(), 'shipmate_ai', 'reports')
@@ -26,7 +27,7 @@ class MonthlyCommanderPDFGenerator:
 
         # Pull data
         total_profit = self._fetch_total_profit(year, month)
-        chart_path = self._create_performance_chart(year, month)
+        chart_png = self._create_performance_chart(year, month)
 
         # Initialize PDF
         pdf = FPDF()
@@ -42,9 +43,9 @@ class MonthlyCommanderPDFGenerator:
         pdf.cell(0, 10, f"Total Net Profit/Loss: ${total_profit:.2f}", ln=True)
 
         # Chart Section
-        if chart_path:
+        if chart_png:
             pdf.ln(10)
-            pdf.image(chart_path, w=180)
+            pdf.image(io.BytesIO(chart_png), w=180)
 
         # Placeholder Risk Summary
         pdf.ln(10)
@@ -74,7 +75,10 @@ class MonthlyCommanderPDFGenerator:
         result = self.cursor.fetchone()[0]
         return result if result else 0.0
 
-    def _create_performance_chart(self, year: int, month: int) -> str:
+    def _create_performance_chart(self, year: int, month: int) -> bytes:
+        """
+        Returns the monthly P/L trend as PNG bytes (cached by data), or None when there is no data.
+        """
         try:
             query = '''
             SELECT date, profit_loss FROM trades
@@ -90,18 +94,12 @@ class MonthlyCommanderPDFGenerator:
             dates = [row[0] for row in data]
             profits = [row[1] for row in data]
 
-            plt.figure(figsize=(10, 5))
-            plt.plot(dates, profits, marker='o')
-            plt.title("Monthly Profit/Loss Trend")
-            plt.xlabel("Date")
-            plt.ylabel("Profit/Loss ($)")
-            plt.xticks(rotation=45)
-            plt.tight_layout()
-
-            chart_path = os.path.join(REPORTS_DIR, f"performance_chart_{year}-{month:02d}.png")
-            plt.savefig(chart_path)
-            plt.close()
-            return chart_path
+            return chart_renderer.render_line_chart(
+                dates, profits,
+                title="Monthly Profit/Loss Trend",
+                xlabel="Date",
+                ylabel="Profit/Loss ($)"
+            )
         except Exception as e:
             print(f"[MonthlyCommanderPDFGenerator] Chart creation failed: {e}")
             return None
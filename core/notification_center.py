@@ -1,11 +1,23 @@
 # shipmate_ai/core/notification_center.py
 
 import os
-import sqlite3
 from datetime import datetime
+from core.db_pool import get_connection
+from core.event_bus import publish_event
 
 DATABASE_PATH = os.path.join(os.getcwd(), 'shipmate_ledger.db')
 
+LATEST_NOTIFICATIONS_QUERY = '''
+    SELECT timestamp, message
+    FROM notifications
+    ORDER BY timestamp DESC
+    LIMIT ?
+'''
+INSERT_NOTIFICATION_QUERY = '''
+    INSERT INTO notifications (timestamp, message)
+    VALUES (?, ?)
+'''
+
 def get_latest_notifications(limit=5):
     """
     Retrieves the latest notifications from the database.
@@ -16,24 +28,14 @@ def get_latest_notifications(limit=5):
     Returns:
         List of dictionaries with 'timestamp' and 'message'.
     """
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
+    conn = get_connection(DATABASE_PATH)
 
     try:
-        query = '''
-            SELECT timestamp, message
-            FROM notifications
-            ORDER BY timestamp DESC
-            LIMIT ?
-        '''
-        cursor.execute(query, (limit,))
-        rows = cursor.fetchall()
+        rows = conn.execute(LATEST_NOTIFICATIONS_QUERY, (limit,)).fetchall()
         notifications = [{'timestamp': row[0], 'message': row[1]} for row in rows]
     except Exception as e:
         print(f"[NotificationCenter] Error fetching notifications: {e}")
         notifications = []
-    finally:
-        conn.close()
 
     return notifications
 
@@ -44,19 +46,13 @@ def add_notification(message):
     Args:
         message (str): Notification message content.
     """
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
+    conn = get_connection(DATABASE_PATH)
 
     try:
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        query = '''
-            INSERT INTO notifications (timestamp, message)
-            VALUES (?, ?)
-        '''
-        cursor.execute(query, (timestamp, message))
-        conn.commit()
+        with conn:
+            conn.execute(INSERT_NOTIFICATION_QUERY, (timestamp, message))
         print(f"[NotificationCenter] Notification added: {message}")
+        publish_event('notification', {'timestamp': timestamp, 'message': message})
     except Exception as e:
         print(f"[NotificationCenter] Error inserting notification: {e}")
-    finally:
-        conn.close()
@@ -0,0 +1,403 @@
+# shipmate_ai/core/notification_outbox.py
+
+import os
+import json
+import time
+import uuid
+import queue
+import random
+import atexit
+import threading
+from datetime import datetime
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+from core.db_pool import get_connection
+
+# Load environment variables
+load_dotenv()
+
+DATABASE_PATH = os.path.join(os.getcwd(), 'shipmate_ledger.db')
+
+PUSHOVER_USER_KEY = os.getenv("PUSHOVER_USER_KEY")
+PUSHOVER_API_TOKEN = os.getenv("PUSHOVER_API_TOKEN")
+TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
+TELEGRAM_USER_ID = os.getenv("TELEGRAM_USER_ID")
+
+# Endpoints are overridable so a local HTTP stub can stand in for the real providers
+PUSHOVER_API_URL = os.getenv("PUSHOVER_API_URL", "https://api.pushover.net/1/messages.json")
+TELEGRAM_API_BASE = os.getenv("TELEGRAM_API_BASE", "https://api.telegram.org")
+
+HTTP_CONNECT_TIMEOUT = float(os.getenv("NOTIFY_CONNECT_TIMEOUT", 3))
+HTTP_READ_TIMEOUT = float(os.getenv("NOTIFY_READ_TIMEOUT", 10))
+BATCH_WINDOW_SECONDS = float(os.getenv("NOTIFY_BATCH_WINDOW", 2))
+MAX_ATTEMPTS = int(os.getenv("NOTIFY_MAX_ATTEMPTS", 6))
+BACKOFF_BASE_SECONDS = 2
+BACKOFF_MAX_SECONDS = 300
+CLAIM_BATCH_SIZE = 100
+CLAIM_TIMEOUT_SECONDS = 300       # claims older than this belong to a dead worker and are taken over
+WORKER_ERROR_PAUSE_SECONDS = 1
+
+PUSHOVER_MAX_MESSAGE_LENGTH = 1024
+TELEGRAM_MAX_MESSAGE_LENGTH = 4096
+
+CREATE_OUTBOX_TABLE = '''
+    CREATE TABLE IF NOT EXISTS notification_outbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        channel TEXT NOT NULL,
+        title TEXT,
+        message TEXT NOT NULL,
+        payload TEXT,
+        coalescible INTEGER DEFAULT 1,
+        status TEXT DEFAULT 'pending',
+        attempts INTEGER DEFAULT 0,
+        next_attempt_at REAL NOT NULL,
+        created_at TEXT NOT NULL,
+        last_error TEXT,
+        claimed_by TEXT,
+        claimed_at REAL
+    )
+'''
+# Outboxes created before rows were claimed
+OUTBOX_COLUMN_MIGRATIONS = (
+    ("claimed_by", "ALTER TABLE notification_outbox ADD COLUMN claimed_by TEXT"),
+    ("claimed_at", "ALTER TABLE notification_outbox ADD COLUMN claimed_at REAL"),
+)
+CREATE_OUTBOX_INDEX = '''
+    CREATE INDEX IF NOT EXISTS idx_notification_outbox_due
+    ON notification_outbox (status, next_attempt_at)
+'''
+INSERT_OUTBOX_QUERY = '''
+    INSERT INTO notification_outbox (channel, title, message, payload, coalescible, next_attempt_at, created_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+# One statement, so each due row is claimed by exactly one worker across processes
+CLAIM_OUTBOX_QUERY = '''
+    UPDATE notification_outbox
+    SET status = 'sending', claimed_by = ?, claimed_at = ?
+    WHERE id IN (
+        SELECT id FROM notification_outbox
+        WHERE (status = 'pending' AND next_attempt_at <= ?) OR (status = 'sending' AND claimed_at <= ?)
+        ORDER BY id ASC
+        LIMIT ?
+    )
+'''
+CLAIMED_OUTBOX_QUERY = '''
+    SELECT id, channel, title, message, payload, coalescible, attempts
+    FROM notification_outbox
+    WHERE status = 'sending' AND claimed_by = ?
+    ORDER BY id ASC
+'''
+NEXT_DUE_QUERY = '''
+    SELECT MIN(CASE WHEN status = 'pending' THEN next_attempt_at ELSE claimed_at + ? END)
+    FROM notification_outbox
+    WHERE status IN ('pending', 'sending')
+'''
+DELETE_OUTBOX_QUERY = "DELETE FROM notification_outbox WHERE id = ? AND claimed_by = ?"
+RETRY_OUTBOX_QUERY = '''
+    UPDATE notification_outbox
+    SET attempts = ?, next_attempt_at = ?, status = ?, last_error = ?, claimed_by = NULL, claimed_at = NULL
+    WHERE id = ? AND claimed_by = ?
+'''
+
+class ChannelSender:
+    """
+    Delivers a batch of outbox messages for one channel. Raises on failure so the
+    outbox can retry the whole batch.
+    """
+    max_message_length = None
+
+    def __init__(self):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=4)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.timeout = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+
+    def is_configured(self) -> bool:
+        return True
+
+    def send(self, title: str, message: str, payload: dict):
+        raise NotImplementedError
+
+class PushoverSender(ChannelSender):
+    max_message_length = PUSHOVER_MAX_MESSAGE_LENGTH
+
+    def is_configured(self) -> bool:
+        return bool(PUSHOVER_USER_KEY and PUSHOVER_API_TOKEN)
+
+    def send(self, title, message, payload):
+        data = {
+            "token": PUSHOVER_API_TOKEN,
+            "user": PUSHOVER_USER_KEY,
+            "title": title,
+            "message": message,
+            "priority": payload.get("priority", 1)
+        }
+        response = self.session.post(PUSHOVER_API_URL, data=data, timeout=self.timeout)
+        if response.status_code != 200:
+            raise RuntimeError(f"Pushover returned {response.status_code}: {response.text[:200]}")
+
+class TelegramSender(ChannelSender):
+    max_message_length = TELEGRAM_MAX_MESSAGE_LENGTH
+
+    def is_configured(self) -> bool:
+        return bool(TELEGRAM_BOT_TOKEN and TELEGRAM_USER_ID)
+
+    def send(self, title, message, payload):
+        body = {
+            "chat_id": TELEGRAM_USER_ID,
+            "text": message,
+            "parse_mode": payload.get("parse_mode", "Markdown")
+        }
+        if payload.get("reply_markup"):
+            body["reply_markup"] = payload["reply_markup"]
+        url = f"{TELEGRAM_API_BASE}/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
+        response = self.session.post(url, json=body, timeout=self.timeout)
+        if response.status_code != 200:
+            raise RuntimeError(f"Telegram returned {response.status_code}: {response.text[:200]}")
+
+class NotificationOutbox:
+    """
+    Non-blocking outbound notification queue.
+
+    enqueue() only touches an in-memory queue. A background worker persists each
+    message to the notification_outbox table, coalesces whatever is due per channel
+    into a single provider call, and retries failures with exponential backoff.
+    Undelivered rows are picked up again after a restart.
+
+    Several processes can share the table: each worker claims due rows with one UPDATE
+    before sending, so a row goes out once. A claim left by a worker that died is taken
+    over after CLAIM_TIMEOUT_SECONDS.
+    """
+
+    def __init__(self, senders: dict = None, db_path: str = DATABASE_PATH, batch_window: float = BATCH_WINDOW_SECONDS):
+        self.senders = senders or {
+            'pushover': PushoverSender(),
+            'telegram': TelegramSender()
+        }
+        self.db_path = db_path
+        self.batch_window = batch_window
+        self._incoming = queue.Queue()
+        self._stop = threading.Event()
+        self._worker = None
+        self._lock = threading.Lock()
+        self._unsaved = []          # taken off the queue but not yet committed to the table
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+    def start(self):
+        with self._lock:
+            if self._worker and self._worker.is_alive():
+                return
+            self._stop.clear()
+            self._worker = threading.Thread(target=self._run, name="NotificationOutbox", daemon=True)
+            self._worker.start()
+
+    def stop(self, timeout: float = 5.0):
+        """
+        Stops the worker after persisting anything still sitting in memory.
+        """
+        self._stop.set()
+        self._incoming.put(None)
+        if self._worker:
+            self._worker.join(timeout)
+
+    def enqueue(self, channel: str, title: str, message: str, payload: dict = None, coalesce: bool = True):
+        """
+        Queues a notification for background delivery. Never blocks on the network.
+        """
+        if channel not in self.senders:
+            print(f"[NotificationOutbox] Unknown channel '{channel}', message dropped.")
+            return
+        self._incoming.put({
+            'channel': channel,
+            'title': title,
+            'message': message,
+            'payload': payload or {},
+            'coalesce': coalesce
+        })
+        if not self._worker or not self._worker.is_alive():
+            self.start()
+
+    def _run(self):
+        ready = False
+        while not self._stop.is_set():
+            # A locked database (SQLITE_BUSY) or a failed send must not kill the worker;
+            # messages already taken off the queue stay in _unsaved until they are persisted
+            try:
+                if not ready:
+                    self._ensure_table()
+                    ready = True
+                self._persist_incoming(self._wait_timeout())
+                self._deliver_due()
+            except Exception as e:
+                print(f"[NotificationOutbox] Worker pass failed: {e}")
+                self._stop.wait(WORKER_ERROR_PAUSE_SECONDS)
+        try:
+            self._persist_incoming(0)
+        except Exception as e:
+            print(f"[NotificationOutbox] {len(self._unsaved)} message(s) not persisted at shutdown: {e}")
+
+    def _ensure_table(self):
+        conn = get_connection(self.db_path)
+        with conn:
+            conn.execute(CREATE_OUTBOX_TABLE)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(notification_outbox)")}
+            for column, migration in OUTBOX_COLUMN_MIGRATIONS:
+                if column not in columns:
+                    conn.execute(migration)
+            conn.execute(CREATE_OUTBOX_INDEX)
+
+    def _wait_timeout(self) -> float:
+        if self._unsaved:
+            return 0
+        conn = get_connection(self.db_path)
+        next_due = conn.execute(NEXT_DUE_QUERY, (CLAIM_TIMEOUT_SECONDS,)).fetchone()[0]
+        if next_due is None:
+            return None
+        return max(0.0, next_due - time.time())
+
+    def _persist_incoming(self, timeout):
+        """
+        Blocks until a message arrives (or a retry falls due), then keeps collecting
+        for the batch window so bursts become a single delivery.
+        """
+        batch = []
+        try:
+            item = self._incoming.get(timeout=timeout) if timeout != 0 else self._incoming.get_nowait()
+            batch.append(item)
+            deadline = time.time() + self.batch_window
+            while True:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                batch.append(self._incoming.get(timeout=remaining))
+        except queue.Empty:
+            pass
+
+        # Drain anything else already waiting without extending the window
+        while True:
+            try:
+                batch.append(self._incoming.get_nowait())
+            except queue.Empty:
+                break
+
+        self._unsaved.extend(item for item in batch if item is not None)
+        rows = self._unsaved
+        if not rows:
+            return
+
+        now = time.time()
+        created_at = datetime.now().isoformat()
+        conn = get_connection(self.db_path)
+        with conn:
+            conn.executemany(INSERT_OUTBOX_QUERY, [
+                (r['channel'], r['title'], r['message'], json.dumps(r['payload']), 1 if r['coalesce'] else 0, now, created_at)
+                for r in rows
+            ])
+        self._unsaved = []
+
+    def _deliver_due(self):
+        """
+        Claims due rows (and rows abandoned by a dead worker), then delivers only those.
+        """
+        conn = get_connection(self.db_path)
+        now = time.time()
+        with conn:
+            conn.execute(CLAIM_OUTBOX_QUERY, (self.worker_id, now, now, now - CLAIM_TIMEOUT_SECONDS, CLAIM_BATCH_SIZE))
+        # Includes rows this worker claimed on a pass that failed part-way
+        due = conn.execute(CLAIMED_OUTBOX_QUERY, (self.worker_id,)).fetchall()
+        if not due:
+            return
+
+        by_channel = {}
+        for row in due:
+            by_channel.setdefault(row[1], []).append(row)
+
+        for channel, rows in by_channel.items():
+            sender = self.senders.get(channel)
+            if sender is None or not sender.is_configured():
+                print(f"[NotificationOutbox] {channel} credentials not configured. Holding {len(rows)} message(s).")
+                self._schedule_retry(rows, f"{channel} not configured")
+                continue
+            for batch_rows, title, message, payload in self._coalesce(rows, sender.max_message_length):
+                try:
+                    sender.send(title, message, payload)
+                    with conn:
+                        conn.executemany(DELETE_OUTBOX_QUERY, [(r[0], self.worker_id) for r in batch_rows])
+                    print(f"✅ [NotificationOutbox] Delivered {len(batch_rows)} {channel} message(s).")
+                except Exception as e:
+                    print(f"⚠️ [NotificationOutbox] {channel} delivery failed: {e}")
+                    self._schedule_retry(batch_rows, str(e))
+
+    def _coalesce(self, rows, max_length):
+        """
+        Merges coalescible messages into as few sends as the provider's length limit allows.
+        Messages carrying their own payload (e.g. Telegram inline keyboards) go out alone.
+        """
+        pending = []
+        for row in rows:
+            payload = json.loads(row[4] or '{}')
+            if not row[5]:
+                yield [row], row[2], row[3], payload
+                continue
+            pending.append((row, payload))
+
+        group, parts, length = [], [], 0
+        for row, payload in pending:
+            part = f"{row[2]}\n{row[3]}" if row[2] else row[3]
+            if group and max_length and length + len(part) + 2 > max_length:
+                yield self._merged(group, parts)
+                group, parts, length = [], [], 0
+            group.append((row, payload))
+            parts.append(part)
+            length += len(part) + 2
+        if group:
+            yield self._merged(group, parts)
+
+    def _merged(self, group, parts):
+        rows = [row for row, _ in group]
+        if len(rows) == 1:
+            row, payload = group[0]
+            return rows, row[2], row[3], payload
+        payload = dict(group[0][1])
+        return rows, f"🛳️ Shipmate: {len(rows)} alerts", "\n\n".join(parts), payload
+
+    def _schedule_retry(self, rows, error: str):
+        now = time.time()
+        # One jitter per batch keeps rows that failed together due together
+        jitter = random.uniform(0, 1)
+        updates = []
+        for row in rows:
+            attempts = row[6] + 1
+            if attempts >= MAX_ATTEMPTS:
+                status, next_attempt = 'failed', now
+                print(f"❌ [NotificationOutbox] Giving up on {row[1]} message {row[0]} after {attempts} attempts.")
+            else:
+                delay = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** attempts))
+                status, next_attempt = 'pending', now + delay + jitter
+            updates.append((attempts, next_attempt, status, error[:500], row[0], self.worker_id))
+        conn = get_connection(self.db_path)
+        with conn:
+            conn.executemany(RETRY_OUTBOX_QUERY, updates)
+
+_outbox = None
+_outbox_lock = threading.Lock()
+
+def get_notification_outbox() -> NotificationOutbox:
+    """
+    Returns the process-wide outbox, starting its worker on first use.
+    """
+    global _outbox
+    with _outbox_lock:
+        if _outbox is None:
+            _outbox = NotificationOutbox()
+            _outbox.start()
+            atexit.register(_outbox.stop)
+    return _outbox
+
+def enqueue_notification(channel: str, title: str, message: str, payload: dict = None, coalesce: bool = True):
+    """
+    Queues a Pushover or Telegram notification for background delivery.
+    """
+    get_notification_outbox().enqueue(channel, title, message, payload=payload, coalesce=coalesce)
@@ -1,8 +1,8 @@
 # shipmate_ai/core/push_notifications.py
 
 import os
-import requests
 from dotenv import load_dotenv
+from core.notification_outbox import enqueue_notification
 
 # Load environment variables
 load_dotenv()
@@ -11,23 +11,12 @@ PUSHOVER_USER_KEY = os.getenv("PUSHOVER_USER_KEY")
 PUSHOVER_API_TOKEN = os.getenv("PUSHOVER_API_TOKEN")
 
 def send_push_notification(title, message):
+    """
+    Queues a Pushover notification. Delivery, batching and retries happen on the
+    notification outbox worker, so callers on trading hot paths never wait on the network.
+    """
     if not PUSHOVER_USER_KEY or not PUSHOVER_API_TOKEN:
         print("Pushover credentials not configured.")
         return
 
-    data = {
-        "token": PUSHOVER_API_TOKEN,
-        "user": PUSHOVER_USER_KEY,
-        "title": title,
-        "message": message,
-        "priority": 1
-    }
-
-    try:
-        response = requests.post("https://api.pushover.net/1/messages.json", data=data)
-        if response.status_code == 200:
-            print("✅ Push notification sent successfully.")
-        else:
-            print(f"⚠️ Failed to send push notification. Status Code: {response.status_code}")
-    except Exception as e:
-        print(f"⚠️ Exception while sending notification: {e}")
+    enqueue_notification('pushover', title, message, payload={"priority": 1})
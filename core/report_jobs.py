@@ -0,0 +1,301 @@
+# shipmate_ai/core/report_jobs.py
+
+import os
+import json
+import uuid
+import queue
+import threading
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from core.db_pool import get_connection
+
+DATABASE_PATH = os.path.join(os.getcwd(), 'shipmate_ledger.db')
+REPORT_WORKER_PROCESSES = int(os.getenv('REPORT_WORKER_PROCESSES', 2))
+STALE_JOB_SECONDS = 60 * 60         # a running job silent this long lost its worker (every stage saves progress)
+RECOVERY_INTERVAL_SECONDS = 5 * 60  # idle dispatchers look for orphaned jobs this often
+
+CREATE_JOBS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS report_jobs (
+        job_id TEXT PRIMARY KEY,
+        year INTEGER NOT NULL,
+        month INTEGER NOT NULL,
+        status TEXT NOT NULL,
+        progress INTEGER NOT NULL,
+        stage TEXT,
+        results TEXT,
+        error TEXT,
+        created_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL,
+        claimed_by TEXT
+    )
+'''
+# Tables created before jobs were claimed by a worker
+JOB_COLUMN_MIGRATIONS = (
+    ("claimed_by", "ALTER TABLE report_jobs ADD COLUMN claimed_by TEXT"),
+)
+UPSERT_JOB_QUERY = '''
+    INSERT OR REPLACE INTO report_jobs
+        (job_id, year, month, status, progress, stage, results, error, created_at, updated_at, claimed_by)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+# Every process sharing the database may hold the same queued job; the first claim wins
+CLAIM_JOB_QUERY = '''
+    UPDATE report_jobs SET claimed_by = ?, updated_at = ?
+    WHERE job_id = ? AND status = 'queued' AND claimed_by IS NULL
+'''
+FAIL_STALE_JOBS_QUERY = '''
+    UPDATE report_jobs SET status = 'failed', stage = 'Failed', error = ?, updated_at = ?
+    WHERE status = 'running' AND updated_at < ? AND (claimed_by IS NULL OR claimed_by != ?)
+'''
+# Queued rows whose claimer died before marking them running go back to the pool
+RELEASE_STALE_CLAIMS_QUERY = '''
+    UPDATE report_jobs SET claimed_by = NULL
+    WHERE status = 'queued' AND claimed_by IS NOT NULL AND claimed_by != ? AND updated_at < ?
+'''
+QUEUED_JOBS_QUERY = '''
+    SELECT job_id, year, month, status, progress, stage, results, error, created_at, updated_at
+    FROM report_jobs WHERE status = 'queued' AND claimed_by IS NULL ORDER BY created_at ASC
+'''
+SELECT_JOB_QUERY = '''
+    SELECT job_id, year, month, status, progress, stage, results, error, created_at, updated_at
+    FROM report_jobs WHERE job_id = ?
+'''
+RECENT_JOBS_QUERY = '''
+    SELECT job_id, year, month, status, progress, stage, results, error, created_at, updated_at
+    FROM report_jobs ORDER BY created_at DESC LIMIT ?
+'''
+
+def _generate_csv_report(year: int, month: int) -> str:
+    """
+    Worker-process entry point for the monthly CSV report.
+    """
+    from core.monthly_report_generator import MonthlyReportGenerator
+    generator = MonthlyReportGenerator()
+    try:
+        return generator.generate_monthly_report(year, month)
+    finally:
+        generator.close_connection()
+
+def _generate_pdf_report(year: int, month: int) -> str:
+    """
+    Worker-process entry point for the monthly Commander PDF (chart rendering included).
+    """
+    from core.monthly_commander_pdf_generator import MonthlyCommanderPDFGenerator
+    generator = MonthlyCommanderPDFGenerator()
+    try:
+        return generator.generate_monthly_pdf(year, month)
+    finally:
+        generator.close_connection()
+
+def _row_to_job(row) -> dict:
+    return {
+        'job_id': row[0],
+        'year': row[1],
+        'month': row[2],
+        'status': row[3],
+        'progress': row[4],
+        'stage': row[5],
+        'results': json.loads(row[6]) if row[6] else {},
+        'error': row[7],
+        'created_at': row[8],
+        'updated_at': row[9]
+    }
+
+class ReportJobQueue:
+    """
+    Runs monthly report generation as tracked background jobs.
+
+    CSV and PDF are built in parallel in worker processes (so matplotlib and FPDF
+    never run inside a request thread), then the email is dispatched once both finish.
+    Job status is written to the report_jobs table so any web worker can report progress.
+
+    Jobs outlive the process that queued them: on start, and whenever the dispatcher
+    idles, running jobs silent for STALE_JOB_SECONDS are marked failed and queued ones
+    are picked up again. A queue claims a job before running it, so when several
+    processes share the database each job still runs once.
+    """
+
+    def __init__(self, db_path: str = DATABASE_PATH, max_workers: int = REPORT_WORKER_PROCESSES):
+        self.db_path = db_path
+        self.max_workers = max_workers
+        self._jobs = queue.Queue()
+        self._executor = None
+        self._dispatcher = None
+        self._lock = threading.Lock()
+        self._known = set()         # job IDs already in self._jobs
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._ensure_table()
+
+    def _ensure_table(self):
+        conn = get_connection(self.db_path)
+        with conn:
+            conn.execute(CREATE_JOBS_TABLE)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(report_jobs)")}
+            for column, migration in JOB_COLUMN_MIGRATIONS:
+                if column not in columns:
+                    conn.execute(migration)
+
+    def start(self):
+        with self._lock:
+            if self._dispatcher and self._dispatcher.is_alive():
+                return
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            self._dispatcher = threading.Thread(target=self._run, name="ReportJobQueue", daemon=True)
+            self._dispatcher.start()
+
+    def recover(self) -> int:
+        """
+        Fails running jobs whose worker went away and queues unclaimed queued ones left
+        by a previous run. Returns the number of jobs queued.
+        """
+        now = datetime.now()
+        cutoff = datetime.fromtimestamp(now.timestamp() - STALE_JOB_SECONDS).isoformat()
+        conn = get_connection(self.db_path)
+        with conn:
+            failed = conn.execute(FAIL_STALE_JOBS_QUERY, (
+                "Interrupted: the report worker stopped before finishing", now.isoformat(), cutoff, self.worker_id
+            )).rowcount
+            conn.execute(RELEASE_STALE_CLAIMS_QUERY, (self.worker_id, cutoff))
+        if failed:
+            print(f"[ReportJobQueue] Marked {failed} interrupted job(s) as failed.")
+
+        requeued = 0
+        for row in conn.execute(QUEUED_JOBS_QUERY).fetchall():
+            job = _row_to_job(row)
+            with self._lock:
+                if job['job_id'] in self._known:
+                    continue
+                self._known.add(job['job_id'])
+            job['claimed_by'] = None
+            self._jobs.put(job)
+            requeued += 1
+        if requeued:
+            print(f"[ReportJobQueue] Requeued {requeued} job(s) left queued by a previous run.")
+        return requeued
+
+    def submit(self, year: int, month: int) -> str:
+        """
+        Queues a report job and returns its ID immediately.
+        """
+        job_id = uuid.uuid4().hex[:12]
+        now = datetime.now().isoformat()
+        job = {
+            'job_id': job_id, 'year': year, 'month': month, 'status': 'queued', 'progress': 0,
+            'stage': 'Waiting for a report worker', 'results': {}, 'error': None,
+            'created_at': now, 'updated_at': now, 'claimed_by': None
+        }
+        self._save(job)
+        self.start()
+        with self._lock:
+            self._known.add(job_id)
+        self._jobs.put(job)
+        print(f"[ReportJobQueue] Job {job_id} queued for {year}-{month:02d}.")
+        return job_id
+
+    def get_job(self, job_id: str) -> dict:
+        row = get_connection(self.db_path).execute(SELECT_JOB_QUERY, (job_id,)).fetchone()
+        return _row_to_job(row) if row else None
+
+    def list_jobs(self, limit: int = 10) -> list:
+        rows = get_connection(self.db_path).execute(RECENT_JOBS_QUERY, (limit,)).fetchall()
+        return [_row_to_job(row) for row in rows]
+
+    def _save(self, job: dict):
+        job['updated_at'] = datetime.now().isoformat()
+        conn = get_connection(self.db_path)
+        with conn:
+            conn.execute(UPSERT_JOB_QUERY, (
+                job['job_id'], job['year'], job['month'], job['status'], job['progress'],
+                job['stage'], json.dumps(job['results']), job['error'],
+                job['created_at'], job['updated_at'], job.get('claimed_by')
+            ))
+
+    def _update(self, job: dict, **changes):
+        job.update(changes)
+        self._save(job)
+
+    def _claim(self, job: dict) -> bool:
+        conn = get_connection(self.db_path)
+        with conn:
+            claimed = conn.execute(CLAIM_JOB_QUERY, (self.worker_id, datetime.now().isoformat(), job['job_id'])).rowcount
+        if claimed:
+            job['claimed_by'] = self.worker_id
+        return bool(claimed)
+
+    def _run(self):
+        try:
+            self.recover()
+        except Exception as e:
+            print(f"[ReportJobQueue] Job recovery failed: {e}")
+        while True:
+            try:
+                job = self._jobs.get(timeout=RECOVERY_INTERVAL_SECONDS)
+            except queue.Empty:
+                try:
+                    self.recover()
+                except Exception as e:
+                    print(f"[ReportJobQueue] Job recovery failed: {e}")
+                continue
+            try:
+                if not self._claim(job):
+                    continue        # another process took it
+                self._process(job)
+            except Exception as e:
+                print(f"[ReportJobQueue] Job {job['job_id']} failed: {e}")
+                self._update(job, status='failed', stage='Failed', error=str(e))
+            finally:
+                with self._lock:
+                    self._known.discard(job['job_id'])
+
+    def _process(self, job: dict):
+        year, month = job['year'], job['month']
+        self._update(job, status='running', progress=10, stage='Generating CSV and PDF reports')
+
+        futures = {
+            self._executor.submit(_generate_csv_report, year, month): 'csv',
+            self._executor.submit(_generate_pdf_report, year, month): 'pdf'
+        }
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                report = futures[future]
+                job['results'][report] = future.result()
+                remaining = ', '.join(sorted(futures[f].upper() for f in pending))
+                self._update(
+                    job,
+                    progress=job['progress'] + 40,
+                    stage=f"{report.upper()} ready" + (f", waiting on {remaining}" if remaining else "")
+                )
+
+        self._update(job, progress=90, stage='Dispatching email')
+        from core.email_dispatcher import EmailDispatcher
+        dispatcher = EmailDispatcher()
+        try:
+            dispatcher.send_monthly_reports(year, month)
+        finally:
+            dispatcher.close_connection()
+
+        self._update(job, status='completed', progress=100, stage='Reports generated and dispatched')
+        print(f"[ReportJobQueue] Job {job['job_id']} completed.")
+
+_report_queue = None
+_report_queue_lock = threading.Lock()
+
+def get_report_job_queue() -> ReportJobQueue:
+    global _report_queue
+    with _report_queue_lock:
+        if _report_queue is None:
+            _report_queue = ReportJobQueue()
+            _report_queue.start()   # picks up jobs a previous run left behind
+    return _report_queue
+
+def submit_report_job(year: int, month: int) -> str:
+    """
+    Queues CSV + PDF generation and email dispatch for the given month. Returns the job ID.
+    """
+    return get_report_job_queue().submit(year, month)
+
+def get_report_job(job_id: str) -> dict:
+    return get_report_job_queue().get_job(job_id)
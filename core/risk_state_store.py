@@ -0,0 +1,326 @@
+# shipmate_ai/core/risk_state_store.py
+
+import os
+import threading
+from datetime import datetime
+from core.db_pool import get_connection
+from core.event_bus import publish_event
+
+DATABASE_PATH = os.path.join(os.getcwd(), 'shipmate_ledger.db')
+
+CREATE_LOCKOUTS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS sector_lockouts (
+        sector TEXT PRIMARY KEY,
+        is_locked INTEGER NOT NULL DEFAULT 0,
+        daily_loss REAL NOT NULL DEFAULT 0,
+        reason TEXT,
+        updated_at TEXT,
+        reset_at TEXT
+    )
+'''
+CREATE_TRADE_LOG_TABLE = '''
+    CREATE TABLE IF NOT EXISTS risk_trade_log (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        sector TEXT NOT NULL,
+        timestamp TEXT NOT NULL,
+        trade_type TEXT,
+        asset TEXT,
+        quantity REAL,
+        price_per_unit REAL,
+        action_amount REAL,
+        is_profit INTEGER
+    )
+'''
+CREATE_TRADE_LOG_INDEX = "CREATE INDEX IF NOT EXISTS idx_risk_trade_log_sector ON risk_trade_log (sector, id)"
+# One-row counter bumped by every risk write; the ledger database is shared with the
+# outbox, calendar and reports, so its data_version changes far more often than risk does
+CREATE_VERSION_TABLE = '''
+    CREATE TABLE IF NOT EXISTS risk_state_version (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL
+    )
+'''
+INSERT_VERSION_QUERY = "INSERT OR IGNORE INTO risk_state_version (id, version) VALUES (1, 0)"
+SELECT_VERSION_QUERY = "SELECT version FROM risk_state_version WHERE id = 1"
+BUMP_VERSION_QUERY = "UPDATE risk_state_version SET version = version + 1 WHERE id = 1"
+# Databases created before the store only had (sector, is_locked)
+LOCKOUT_COLUMN_MIGRATIONS = (
+    ("daily_loss", "ALTER TABLE sector_lockouts ADD COLUMN daily_loss REAL NOT NULL DEFAULT 0"),
+    ("reason", "ALTER TABLE sector_lockouts ADD COLUMN reason TEXT"),
+    ("updated_at", "ALTER TABLE sector_lockouts ADD COLUMN updated_at TEXT"),
+    ("reset_at", "ALTER TABLE sector_lockouts ADD COLUMN reset_at TEXT"),
+)
+
+INSERT_SECTOR_QUERY = "INSERT OR IGNORE INTO sector_lockouts (sector, updated_at) VALUES (?, ?)"
+SELECT_SECTORS_QUERY = "SELECT sector, is_locked, daily_loss, reason, updated_at, reset_at FROM sector_lockouts"
+SELECT_TRADE_LOG_QUERY = '''
+    SELECT sector, timestamp, trade_type, asset, quantity, price_per_unit, action_amount, is_profit
+    FROM risk_trade_log ORDER BY id ASC
+'''
+SET_LOCK_QUERY = "UPDATE sector_lockouts SET is_locked = ?, reason = ?, updated_at = ? WHERE sector = ?"
+INSERT_TRADE_QUERY = '''
+    INSERT INTO risk_trade_log (sector, timestamp, trade_type, asset, quantity, price_per_unit, action_amount, is_profit)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+ADD_DAILY_LOSS_QUERY = "UPDATE sector_lockouts SET daily_loss = daily_loss + ?, updated_at = ? WHERE sector = ?"
+CLEAR_TRADE_LOG_QUERY = "DELETE FROM risk_trade_log"
+RESET_SECTORS_QUERY = '''
+    UPDATE sector_lockouts SET is_locked = 0, daily_loss = 0, reason = NULL, updated_at = ?, reset_at = ?
+'''
+
+class RiskStateStore:
+    """
+    Persisted sector risk state (lockouts, daily loss, daily trade log) shared by every
+    process that reads or writes risk: trading agents, the scheduler, the Flask apps and
+    voice commands.
+
+    SQLite is the source of truth; an in-memory copy is written through on every change
+    and re-read only when the risk_state_version counter shows another writer changed
+    risk state, so lock checks cost a dictionary lookup plus one primary-key read.
+    """
+
+    def __init__(self, db_path: str = DATABASE_PATH):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._sectors = {}
+        self._trade_logs = {}
+        self._version = None
+        self._ensure_tables()
+        self._reload(get_connection(self.db_path))
+
+    def _ensure_tables(self):
+        conn = get_connection(self.db_path)
+        with conn:
+            conn.execute(CREATE_LOCKOUTS_TABLE)
+            conn.execute(CREATE_TRADE_LOG_TABLE)
+            conn.execute(CREATE_TRADE_LOG_INDEX)
+            conn.execute(CREATE_VERSION_TABLE)
+            conn.execute(INSERT_VERSION_QUERY)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(sector_lockouts)")}
+            for column, migration in LOCKOUT_COLUMN_MIGRATIONS:
+                if column not in columns:
+                    conn.execute(migration)
+
+    # --- Cache maintenance ---
+    def _reload(self, conn):
+        # Read the counter first: a write landing mid-reload leaves it behind the data,
+        # which only costs one extra reload
+        version = self._read_version(conn)
+        sectors = {
+            sector: {
+                'locked': bool(is_locked),
+                'daily_loss': daily_loss or 0.0,
+                'reason': reason,
+                'updated_at': updated_at,
+                'reset_at': reset_at
+            }
+            for sector, is_locked, daily_loss, reason, updated_at, reset_at in conn.execute(SELECT_SECTORS_QUERY)
+        }
+        trade_logs = {sector: [] for sector in sectors}
+        for sector, timestamp, trade_type, asset, quantity, price, amount, is_profit in conn.execute(SELECT_TRADE_LOG_QUERY):
+            trade_logs.setdefault(sector, []).append({
+                'timestamp': timestamp,
+                'trade_type': trade_type,
+                'asset': asset,
+                'quantity': quantity,
+                'price_per_unit': price,
+                'action_amount': amount,
+                'is_profit': bool(is_profit)
+            })
+        self._sectors = sectors
+        self._trade_logs = trade_logs
+        self._version = version
+
+    @staticmethod
+    def _read_version(conn) -> int:
+        row = conn.execute(SELECT_VERSION_QUERY).fetchone()
+        return row[0] if row else 0
+
+    @staticmethod
+    def _bump_version(conn) -> int:
+        """
+        Bumps the counter inside the caller's write transaction and returns the new value.
+        The UPDATE takes the write lock, so no other writer can commit in between.
+        """
+        conn.execute(BUMP_VERSION_QUERY)
+        return conn.execute(SELECT_VERSION_QUERY).fetchone()[0]
+
+    def _refresh(self):
+        """
+        Reloads the cache if another writer (thread or process) changed risk state since
+        it was loaded. Commits to other tables in the ledger leave the counter alone.
+        """
+        conn = get_connection(self.db_path)
+        if self._read_version(conn) != self._version:
+            self._reload(conn)
+        return conn
+
+    def _after_write(self, conn, version: int) -> bool:
+        """
+        Called after committing a write that bumped the counter to `version`. Anything but
+        one past the cached version means another writer committed in between: reload (the
+        reload already includes our write) and tell the caller to skip its write-through update.
+        """
+        if version != self._version + 1:
+            self._reload(conn)
+            return True
+        self._version = version
+        return False
+
+    # --- Reads (memory speed) ---
+    def is_locked(self, sector: str) -> bool:
+        with self._lock:
+            self._refresh()
+            state = self._sectors.get(sector)
+            return bool(state and state['locked'])
+
+    def any_locked(self) -> bool:
+        with self._lock:
+            self._refresh()
+            return any(state['locked'] for state in self._sectors.values())
+
+    def lockouts(self) -> dict:
+        """
+        { 'Crypto': True/False, 'Tech Stocks': True/False, ... }
+        """
+        with self._lock:
+            self._refresh()
+            return {sector: state['locked'] for sector, state in self._sectors.items()}
+
+    def daily_loss(self, sector: str) -> float:
+        with self._lock:
+            self._refresh()
+            state = self._sectors.get(sector)
+            return state['daily_loss'] if state else 0.0
+
+    def trade_log(self, sector: str) -> list:
+        with self._lock:
+            self._refresh()
+            return list(self._trade_logs.get(sector, []))
+
+    def trade_log_since(self, sector: str, offset: int) -> list:
+        """
+        The sector's daily log entries after the first `offset` (only the new ones are copied).
+        """
+        with self._lock:
+            self._refresh()
+            return self._trade_logs.get(sector, [])[offset:]
+
+    def version(self) -> int:
+        """
+        The risk state version: unchanged means no lock, loss, trade or reset since last read.
+        """
+        with self._lock:
+            self._refresh()
+            return self._version
+
+    def last_reset(self):
+        """
+        Timestamp of the most recent daily reset (any process), or None.
+        """
+        with self._lock:
+            self._refresh()
+            return max((state['reset_at'] for state in self._sectors.values() if state['reset_at']), default=None)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            self._refresh()
+            return {sector: dict(state) for sector, state in self._sectors.items()}
+
+    # --- Writes (SQLite first, then cache) ---
+    def ensure_sectors(self, sectors):
+        with self._lock:
+            conn = self._refresh()
+            missing = [sector for sector in sectors if sector not in self._sectors]
+            if not missing:
+                return
+            now = datetime.now().isoformat()
+            with conn:
+                conn.executemany(INSERT_SECTOR_QUERY, [(sector, now) for sector in missing])
+                self._bump_version(conn)
+            self._reload(conn)
+
+    def set_locked(self, sector: str, locked: bool, reason: str = None) -> bool:
+        """
+        Locks or unlocks a sector. Returns True if the state changed (and publishes a lockout event).
+        """
+        with self._lock:
+            conn = self._refresh()
+            if sector not in self._sectors:
+                self.ensure_sectors([sector])
+            state = self._sectors[sector]
+            if state['locked'] == locked:
+                return False
+            now = datetime.now().isoformat()
+            with conn:
+                conn.execute(SET_LOCK_QUERY, (1 if locked else 0, reason, now, sector))
+                version = self._bump_version(conn)
+            if not self._after_write(conn, version):
+                state.update(locked=locked, reason=reason, updated_at=now)
+        publish_event('lockout', {'sector': sector, 'locked': locked})
+        return True
+
+    def set_all_locked(self, locked: bool, reason: str = None) -> list:
+        """
+        Locks or unlocks every known sector. Returns the sectors whose state changed.
+        """
+        with self._lock:
+            self._refresh()
+            sectors = list(self._sectors)
+        return [sector for sector in sectors if self.set_locked(sector, locked, reason)]
+
+    def record_trade(self, sector: str, entry: dict, loss: float = 0.0):
+        """
+        Appends a trade to the sector's daily log and adds `loss` (positive dollars) to its
+        daily loss, in one transaction.
+        """
+        with self._lock:
+            conn = self._refresh()
+            if sector not in self._sectors:
+                self.ensure_sectors([sector])
+            now = datetime.now().isoformat()
+            with conn:
+                conn.execute(INSERT_TRADE_QUERY, (
+                    sector, entry['timestamp'], entry.get('trade_type'), entry.get('asset'),
+                    entry.get('quantity'), entry.get('price_per_unit'), entry.get('action_amount'),
+                    1 if entry.get('is_profit') else 0
+                ))
+                if loss:
+                    conn.execute(ADD_DAILY_LOSS_QUERY, (loss, now, sector))
+                version = self._bump_version(conn)
+            if not self._after_write(conn, version):
+                self._trade_logs.setdefault(sector, []).append(dict(entry))
+                self._sectors[sector]['daily_loss'] += loss
+                self._sectors[sector]['updated_at'] = now
+
+    def reset_daily(self) -> list:
+        """
+        Clears every sector's daily log and loss and lifts all locks. Returns the sectors that were locked.
+        """
+        with self._lock:
+            conn = self._refresh()
+            unlocked = [sector for sector, state in self._sectors.items() if state['locked']]
+            now = datetime.now().isoformat()
+            with conn:
+                conn.execute(CLEAR_TRADE_LOG_QUERY)
+                conn.execute(RESET_SECTORS_QUERY, (now, now))
+                version = self._bump_version(conn)
+            if not self._after_write(conn, version):
+                for sector, state in self._sectors.items():
+                    state.update(locked=False, daily_loss=0.0, reason=None, updated_at=now, reset_at=now)
+                    self._trade_logs[sector] = []
+        for sector in unlocked:
+            publish_event('lockout', {'sector': sector, 'locked': False})
+        return unlocked
+
+# One store per database file, shared by every caller in the process
+_stores = {}
+_stores_lock = threading.Lock()
+
+def get_risk_state_store(db_path: str = DATABASE_PATH) -> RiskStateStore:
+    db_path = os.path.abspath(db_path)
+    with _stores_lock:
+        store = _stores.get(db_path)
+        if store is None:
+            store = _stores[db_path] = RiskStateStore(db_path)
+        return store
@@ -1,66 +1,83 @@
 # shipmate_ai/core/scheduler.py
 
-import schedule
-import time
-from datetime import datetime
-from monthly_report_generator import MonthlyReportGenerator
-from monthly_commander_pdf_generator import MonthlyCommanderPDFGenerator
-from email_dispatcher import EmailDispatcher
+from datetime import datetime, time, timedelta
+from core.job_scheduler import JobScheduler, IntervalTrigger, MonthlyTrigger, MarketCalendarTrigger, daily_at
+from core.market_calendar import NYSE_CALENDAR
+from core.report_jobs import submit_report_job
+
+DAILY_RESET_TIME = "21:00"
+SITREP_LEAD = timedelta(minutes=30)     # morning sit-rep ahead of the opening bell
+SITREP_GRACE = 2 * 60 * 60              # a sit-rep more than two hours late is skipped
+MAIL_RETRY_SECONDS = 10 * 60            # resend outbox mail that failed on its first flush
 
 class Scheduler:
-    def __init__(self):
+    def __init__(self, job_scheduler: JobScheduler = None):
+        self.jobs = job_scheduler or JobScheduler()
         self.setup_tasks()
 
     def setup_tasks(self):
         """
         Define scheduled Shipmate tasks.
         """
-        schedule.every().day.at("21:00").do(self.reset_daily_systems)
-        schedule.every().month.at("00:05").do(self.generate_and_dispatch_monthly_reports)
+        self.jobs.add_job("daily_reset", self.reset_daily_systems, daily_at(DAILY_RESET_TIME))
+        self.jobs.add_job("monthly_reports", self.generate_and_dispatch_monthly_reports,
+                          MonthlyTrigger(day=1, at=time(0, 5)))
+        self.jobs.add_job("morning_sitrep", self.send_morning_sitrep,
+                          MarketCalendarTrigger(NYSE_CALENDAR, 'open', -SITREP_LEAD), grace=SITREP_GRACE)
+        self.jobs.add_job("mail_outbox_retry", self.retry_mail_outbox, IntervalTrigger(MAIL_RETRY_SECONDS))
 
     def reset_daily_systems(self):
         """
         Resets systems for a new operational day.
         """
         print("[Scheduler] Resetting daily Shipmate systems...")
+        from core.daily_reset_manager import DailyResetManager
+        DailyResetManager().reset_all_systems()
 
-    def generate_and_dispatch_monthly_reports(self):
+    def retry_mail_outbox(self):
         """
-        Generates CSV and PDF reports and emails them to the Captain.
+        Flushes report emails still waiting in the mail outbox.
         """
-        now = datetime.now()
-        year = now.year
-        month = now.month
+        from core.mail_transport import get_mail_transport
+        transport = get_mail_transport()
+        if not transport.pending_count():
+            return
+        result = transport.flush()
+        print(f"[Scheduler] 📧 Mail outbox retry: {result['sent']} sent, {result['failed']} failed.")
+        return result
 
-        try:
-            # Generate CSV Report
-            csv_generator = MonthlyReportGenerator()
-            csv_result = csv_generator.generate_monthly_report(year, month)
-            csv_generator.close_connection()
-            print(f"[Scheduler] {csv_result}")
-
-            # Generate PDF Commander Report
-            pdf_generator = MonthlyCommanderPDFGenerator()
-            pdf_result = pdf_generator.generate_monthly_pdf(year, month)
-            pdf_generator.close_connection()
-            print(f"[Scheduler] {pdf_result}")
+    def send_morning_sitrep(self):
+        """
+        Generates the morning briefing and pushes the summary to the Captain's mobile.
+        """
+        from core.daily_briefing_generator import DailyBriefingGenerator
+        from core.sitrep_push import push_sitrep_summary
+        print("[Scheduler] 📜 Generating Morning Sit-Rep...")
+        print(DailyBriefingGenerator().generate_briefing())
+        push_sitrep_summary()
 
-            # Dispatch Email with Attachments
-            dispatcher = EmailDispatcher()
-            dispatcher.send_monthly_reports(year, month)
-            dispatcher.close_connection()
+    def generate_and_dispatch_monthly_reports(self):
+        """
+        Queues CSV and PDF report generation and the Captain's email as a background job.
+        Runs just after midnight on the 1st, so it reports on the month that just ended.
+        """
+        last_month = datetime.now().replace(day=1) - timedelta(days=1)
+        year = last_month.year
+        month = last_month.month
 
+        try:
+            job_id = submit_report_job(year, month)
+            print(f"[Scheduler] Monthly report job {job_id} queued for {year}-{month:02d}.")
+            return job_id
         except Exception as e:
-            print(f"[Scheduler] Failed to generate and dispatch monthly reports: {e}")
+            print(f"[Scheduler] Failed to queue monthly reports: {e}")
 
     def run(self):
         """
-        Runs the scheduler loop.
+        Runs the scheduler in the foreground until interrupted.
         """
         print("[Scheduler] Shipmate scheduler operational...")
-        while True:
-            schedule.run_pending()
-            time.sleep(30)  # Tactical heartbeat
+        self.jobs.run_forever()
 
 if __name__ == "__main__":
     shipmate_scheduler = Scheduler()
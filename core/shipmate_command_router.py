@@ -1,7 +1,5 @@
 # shipmate_ai/core/shipmate_command_router.py
 
-import random
-
 # Financial Division Imports
 from core.finance.financial_tracker_agent import FinancialTrackerAgent
 from core.tax.tax_specialist_agent import TaxSpecialistAgent
@@ -93,10 +91,7 @@ class ShipmateCommandRouter:
 
         # Risk Management Commands
         elif "risk check" in command:
-            current_value = self.hedge_fund_manager.cash_reserve + sum([
-                random.uniform(50, 1000) * qty for asset, qty in self.hedge_fund_manager.portfolio.items()
-            ])
-            return self.risk_manager.assess_risk(current_value, 100000)
+            return self.risk_manager.assess_portfolio_risk()
 
         elif "daily loss check" in command:
             return self.risk_manager.assess_daily_loss()
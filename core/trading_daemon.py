@@ -0,0 +1,440 @@
+# shipmate_ai/core/trading_daemon.py
+
+import os
+import sys
+import hmac
+import json
+import time
+import signal
+import socket
+import asyncio
+import argparse
+from datetime import datetime, timedelta, timezone
+
+from core.event_bus import publish_event
+from core.job_scheduler import JobScheduler, IntervalTrigger, MarketCalendarTrigger, SCHEDULER_WORKER_THREADS
+from core.market_calendar import NYSE_CALENDAR, CRYPTO_CALENDAR, MarketCalendar
+from core.notification_center import add_notification
+from core.risk_state_store import get_risk_state_store
+from agents.casino_royale_division.day_trader_agent import DayTraderAgent
+from agents.casino_royale_division.crypto_trader_agent import CryptoTraderAgent
+from agents.casino_royale_division.hedge_fund_manager_agent import HedgeFundManagerAgent
+from agents.casino_royale_division.risk_manager_agent import RiskManagerAgent as SectorRiskManager
+from utils.agents import TradeJournalAgent, RiskManagerAgent, TransactionLedgerAgent
+from utils.bar_aggregator import TIMEFRAME_SECONDS
+from utils.instrumentation import render_prometheus, latency_snapshot
+from utils.memory import TradeMemory
+from utils.order_router import build_default_router
+from utils.strategy import SimpleMomentumStrategy
+
+DATABASE_PATH = os.path.join(os.getcwd(), 'shipmate_ledger.db')
+CONTROL_SOCKET_PATH = os.environ.get('SHIPMATE_CONTROL_SOCKET', os.path.join(os.getcwd(), 'shipmate_control.sock'))
+CONTROL_PORT = 8765                 # loopback TCP fallback where Unix sockets are unavailable
+CONTROL_TOKEN_ENV = 'SHIPMATE_CONTROL_TOKEN'
+
+# Sector names as registered by the casino RiskManagerAgent
+CRYPTO_SECTOR = "Crypto"
+STOCK_SECTOR = "Tech Stocks"
+KILL_SWITCH_REASON = "Kill switch"
+
+STOCK_CYCLE_SECONDS = 300           # one cycle per closed 5-minute bar while the market is open
+CRYPTO_TIMEFRAME = "15m"
+CRYPTO_SYMBOLS = ["BTC/USD", "ETH/USD"]
+HEDGE_FUND_OPEN_OFFSET = timedelta(minutes=30)   # once per session, after the opening auction settles
+BAR_CLOSE_DELAY = 2.0               # seconds after a bar closes before polling, so the venue has published it
+AGENT_JOB_THREADS = 3               # one scheduler worker per agent, so a long report never delays a bar-close cycle
+AGENT_JOB_PREFIX = "trading_"       # agent job names in the shared scheduler_jobs table
+
+class AgentRunner:
+    """
+    One agent on its own cadence, registered as a JobScheduler job. The agent object
+    lives for the whole daemon, and the scheduler never starts a job that is still
+    running, so cycles never overlap and agent state (memory, indicator rings,
+    covariance) stays warm between them.
+
+    Cadence comes from the job's trigger: bar closes (IntervalTrigger, optionally
+    limited to a market calendar's sessions) or once per session (MarketCalendarTrigger).
+    """
+
+    def __init__(self, name: str, cycle, trigger, sector: str = None, requires_authorization: bool = False):
+        self.name = name
+        self.cycle = cycle
+        self.trigger = trigger
+        self.sector = sector
+        self.requires_authorization = requires_authorization
+        self.job = None
+        self.run_now = False
+
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+        self.running = False
+        self.last_started = None
+        self.last_duration = None
+        self.last_status = None
+        self.last_error = None
+
+    @property
+    def job_name(self) -> str:
+        return AGENT_JOB_PREFIX + self.name
+
+    def status(self) -> dict:
+        next_run = self.job.next_run if self.job else None
+        return {
+            'running': self.running,
+            'runs': self.runs,
+            'failures': self.failures,
+            'skipped': self.skipped,
+            'next_run': next_run.isoformat() if next_run else None,
+            'last_started': self.last_started.isoformat() if self.last_started else None,
+            'last_duration': round(self.last_duration, 3) if self.last_duration is not None else None,
+            'last_status': self.last_status,
+            'last_error': self.last_error
+        }
+
+class TradingDaemon:
+    """
+    Long-running trading process: runs each agent as a JobScheduler job on its own
+    cadence (bar closes for crypto 24/7, bar closes during market hours for stocks, once
+    per session for the hedge fund) and takes authorization and kill-switch commands on
+    a local control socket. Resets, reports and sit-reps share the scheduler when one is
+    handed in.
+
+    Trading starts unauthorized: crypto runs in simulation mode and the stock agents
+    stand down until `authorize` arrives. `kill` revokes authorization, locks every
+    sector in the shared risk store and pauses all agents until `resume`; agents check
+    the locks right before each order, so cycles already running stop placing orders.
+    """
+
+    def __init__(self, broker=None, stock_universe=None, crypto_symbols=None, crypto_timeframe: str = CRYPTO_TIMEFRAME,
+                 stock_interval: float = STOCK_CYCLE_SECONDS, stock_calendar: MarketCalendar = NYSE_CALENDAR,
+                 crypto_calendar: MarketCalendar = CRYPTO_CALENDAR, socket_path: str = CONTROL_SOCKET_PATH,
+                 memory_dir: str = "memory", db_path: str = DATABASE_PATH, job_scheduler: JobScheduler = None):
+        self.broker = broker or build_default_router(paper=True)
+        self.socket_path = socket_path
+        self.token = os.environ.get(CONTROL_TOKEN_ENV)
+        self.risk_state = get_risk_state_store(db_path)
+        self.risk_state.ensure_sectors([CRYPTO_SECTOR, STOCK_SECTOR])
+        # Sector locks and loss limits, checked right before every live order and fed every
+        # fill, so loss lockouts and the kill switch stop orders from cycles already running
+        self.sector_risk = SectorRiskManager(state=self.risk_state)
+        self.authorized = False
+        self.killed = False
+        self.started_at = None
+        self._stopping = None
+        self._server = None
+
+        self.day_trader = DayTraderAgent(
+            broker_api=self.broker, strategy=SimpleMomentumStrategy(), stock_universe=stock_universe,
+            memory_path=os.path.join(memory_dir, "day_trader_memory.json"), risk_manager=RiskManagerAgent(),
+            journal_agent=TradeJournalAgent(), ledger_agent=TransactionLedgerAgent(), sector_risk=self.sector_risk
+        )
+        self.hedge_fund = HedgeFundManagerAgent(
+            broker=self.broker, strategy=SimpleMomentumStrategy(),
+            memory=TradeMemory(os.path.join(memory_dir, "hedge_fund_memory.json")), journal=TradeJournalAgent(),
+            risk_manager=RiskManagerAgent(), ledger=TransactionLedgerAgent(), simulation_mode=False,
+            sector_risk=self.sector_risk
+        )
+        self.crypto_trader = CryptoTraderAgent(
+            broker=self.broker, strategy=SimpleMomentumStrategy(),
+            trade_memory=TradeMemory(os.path.join(memory_dir, "crypto_memory.json")),
+            trade_journal=TradeJournalAgent(), risk_manager=RiskManagerAgent(),
+            transaction_ledger=TransactionLedgerAgent(), simulation_mode=True, sector_risk=self.sector_risk
+        )
+        self.crypto_symbols = list(crypto_symbols or CRYPTO_SYMBOLS)
+        self.sector_risk.assign_assets(STOCK_SECTOR, self.day_trader.stock_universe)
+        self.sector_risk.assign_assets(CRYPTO_SECTOR, self.crypto_symbols)
+        self.crypto_timeframe = crypto_timeframe
+        # Poll at most hourly: each cycle's 1m refresh window must cover the gap since the last one
+        crypto_interval = min(TIMEFRAME_SECONDS[crypto_timeframe], 3600)
+
+        self.runners = {
+            runner.name: runner for runner in (
+                AgentRunner("crypto", self._crypto_cycle,
+                            IntervalTrigger(crypto_interval, calendar=crypto_calendar, delay=BAR_CLOSE_DELAY),
+                            sector=CRYPTO_SECTOR),
+                AgentRunner("day_trader", self.day_trader.run,
+                            IntervalTrigger(stock_interval, calendar=stock_calendar, delay=BAR_CLOSE_DELAY),
+                            sector=STOCK_SECTOR, requires_authorization=True),
+                AgentRunner("hedge_fund", self._hedge_fund_cycle,
+                            MarketCalendarTrigger(stock_calendar, 'open', HEDGE_FUND_OPEN_OFFSET),
+                            sector=STOCK_SECTOR, requires_authorization=True),
+            )
+        }
+        self.job_scheduler = job_scheduler or JobScheduler(
+            db_path=db_path, max_workers=SCHEDULER_WORKER_THREADS + AGENT_JOB_THREADS)
+        for runner in self.runners.values():
+            # A missed bar close is not worth trading late: wait for the next one
+            runner.job = self.job_scheduler.add_job(runner.job_name, self._run_cycle, runner.trigger,
+                                                    args=(runner,), misfire='skip')
+
+    # --- Agent cycles (worker threads) ---
+    def _crypto_cycle(self):
+        self.crypto_trader.simulation_mode = not self.authorized
+        return self.crypto_trader.run(self.crypto_symbols, timeframe=self.crypto_timeframe)
+
+    def _hedge_fund_cycle(self):
+        return self.hedge_fund.run_daily_strategy(self.day_trader.stock_universe)
+
+    # --- Scheduling ---
+    def _gate(self, runner: AgentRunner):
+        """
+        Reason a due cycle must not run, or None.
+        """
+        if self.killed:
+            return "killed"
+        if runner.requires_authorization and not self.authorized:
+            return "awaiting authorization"
+        if runner.sector and self.risk_state.is_locked(runner.sector):
+            return f"{runner.sector} sector locked"
+        return None
+
+    def _run_cycle(self, runner: AgentRunner):
+        """
+        Job body for one agent cycle (scheduler worker thread): gates, runs and records it.
+        """
+        forced, runner.run_now = runner.run_now, False
+        reason = self._gate(runner)
+        if reason:
+            runner.skipped += 1
+            runner.last_status = f"skipped: {reason}"
+            if forced:
+                print(f"[TradingDaemon] ⏭️ {runner.name} not run: {reason}")
+            return runner.last_status
+
+        runner.running = True
+        runner.last_started = datetime.now(timezone.utc)
+        started = time.perf_counter()
+        try:
+            results = runner.cycle()
+            runner.runs += 1
+            runner.last_status = "ok"
+            runner.last_error = None
+            if isinstance(results, str):
+                runner.last_status = results
+        except Exception as e:
+            runner.failures += 1
+            runner.last_status = "error"
+            runner.last_error = str(e)
+            print(f"[TradingDaemon] ❌ {runner.name} cycle failed: {e}")
+        finally:
+            runner.running = False
+            runner.last_duration = time.perf_counter() - started
+        publish_event('trading_cycle', {'agent': runner.name, 'status': runner.last_status,
+                                        'duration': round(runner.last_duration, 3)})
+        return runner.last_status
+
+    # --- Control commands ---
+    def authorize(self) -> str:
+        if self.killed:
+            return "Kill switch engaged. Resume before authorizing."
+        self.authorized = True
+        self.hedge_fund.authorize_trading()
+        self._notify("Live trading authorized via control socket.")
+        return "Live trading authorized."
+
+    def revoke(self) -> str:
+        self.authorized = False
+        self.hedge_fund.live_trading_enabled = False
+        self._notify("Live trading authorization revoked.")
+        return "Live trading authorization revoked. Crypto continues in simulation mode."
+
+    def kill(self) -> str:
+        self.killed = True
+        self.revoke()
+        for sector in (CRYPTO_SECTOR, STOCK_SECTOR):
+            self.risk_state.set_locked(sector, True, reason=KILL_SWITCH_REASON)
+        self.risk_state.set_all_locked(True, reason=KILL_SWITCH_REASON)
+        in_flight = [name for name, runner in self.runners.items() if runner.running]
+        self._notify("🚨 Kill switch engaged: all sectors locked, trading halted.")
+        message = "Kill switch engaged. All sectors locked."
+        if in_flight:
+            message += f" In-flight cycles place no further orders: {', '.join(in_flight)}."
+        return message
+
+    def resume(self) -> str:
+        """
+        Lifts the kill switch and the locks it placed; loss-limit lockouts stay in force.
+        """
+        if not self.killed:
+            return "Kill switch not engaged."
+        self.killed = False
+        for sector, state in self.risk_state.snapshot().items():
+            if state['locked'] and state['reason'] == KILL_SWITCH_REASON:
+                self.risk_state.set_locked(sector, False, reason="Kill switch lifted")
+        self._notify("Kill switch lifted. Live trading requires fresh authorization.")
+        return "Kill switch lifted. Authorize to resume live trading."
+
+    def run_now(self, name: str) -> str:
+        runner = self.runners.get(name)
+        if runner is None:
+            return f"Unknown agent '{name}'. Known: {', '.join(self.runners)}."
+        if runner.running:
+            return f"{name} cycle already running."
+        runner.run_now = True
+        self.job_scheduler.run_job_now(runner.job_name)
+        return f"{name} cycle triggered."
+
+    def status(self) -> dict:
+        status = {
+            'authorized': self.authorized,
+            'killed': self.killed,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'market_open': NYSE_CALENDAR.is_open(),
+            'lockouts': self.risk_state.lockouts(),
+            'agents': {name: runner.status() for name, runner in self.runners.items()}
+        }
+        if hasattr(self.broker, 'get_metrics'):
+            status['venues'] = self.broker.get_metrics()
+        agent_jobs = {runner.job_name for runner in self.runners.values()}
+        status['jobs'] = {name: job for name, job in self.job_scheduler.status().items() if name not in agent_jobs}
+        return status
+
+    def handle_command(self, command: str):
+        parts = command.strip().lower().split()
+        if not parts:
+            return {'ok': False, 'error': "Empty command."}
+        verb, args = parts[0], parts[1:]
+        if verb == 'status':
+            return {'ok': True, 'status': self.status()}
+        if verb == 'metrics':
+            # Stage latency lives in this process's registry; the dashboard proxies it from here
+            return {'ok': True, 'prometheus': render_prometheus(), 'latency': latency_snapshot()}
+        if verb == 'run' and args:
+            return {'ok': True, 'message': self.run_now(args[0])}
+        actions = {'authorize': self.authorize, 'revoke': self.revoke, 'kill': self.kill,
+                   'resume': self.resume, 'shutdown': self.shutdown}
+        if verb not in actions:
+            return {'ok': False, 'error': f"Unknown command '{verb}'."}
+        return {'ok': True, 'message': actions[verb]()}
+
+    def shutdown(self) -> str:
+        if self._stopping:
+            self._stopping.set()
+        return "Shipmate trading daemon shutting down."
+
+    def _notify(self, message: str):
+        print(f"[TradingDaemon] {message}")
+        publish_event('trading_daemon', {'message': message, 'authorized': self.authorized, 'killed': self.killed})
+        add_notification(message)
+
+    # --- Control socket ---
+    async def _handle_client(self, reader, writer):
+        try:
+            while not reader.at_eof():
+                line = await reader.readline()
+                if not line.strip():
+                    break
+                writer.write((json.dumps(self._dispatch(line.decode())) + "\n").encode())
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def _dispatch(self, line: str) -> dict:
+        """
+        Accepts `{"command": "...", "token": "..."}` or a bare command line.
+        """
+        try:
+            request = json.loads(line)
+        except ValueError:
+            request = {'command': line}
+        if not isinstance(request, dict):
+            request = {'command': str(request)}
+        if self.token and not hmac.compare_digest(str(request.get('token', '')), self.token):
+            return {'ok': False, 'error': "Unauthorized."}
+        try:
+            return self.handle_command(str(request.get('command', '')))
+        except Exception as e:
+            return {'ok': False, 'error': str(e)}
+
+    async def _start_control_server(self):
+        if hasattr(socket, 'AF_UNIX'):
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)   # stale socket from a previous run
+            self._server = await asyncio.start_unix_server(self._handle_client, path=self.socket_path)
+            os.chmod(self.socket_path, 0o600)
+            print(f"[TradingDaemon] 🎛️ Control socket listening on {self.socket_path}")
+        else:
+            self._server = await asyncio.start_server(self._handle_client, '127.0.0.1', CONTROL_PORT)
+            print(f"[TradingDaemon] 🎛️ Control socket listening on 127.0.0.1:{CONTROL_PORT}")
+
+    # --- Lifecycle ---
+    async def serve(self):
+        self._stopping = asyncio.Event()
+        self.started_at = datetime.now(timezone.utc)
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.shutdown)
+            except (NotImplementedError, RuntimeError):
+                pass   # Windows / non-main thread: rely on the shutdown command
+
+        await self._start_control_server()
+        self.job_scheduler.start()
+        print("[TradingDaemon] 🛳️ Trading daemon engaged. Awaiting authorization for live trading.")
+        try:
+            await self._stopping.wait()
+        finally:
+            self._server.close()
+            await self._server.wait_closed()
+            if hasattr(socket, 'AF_UNIX') and os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+            # Off the event loop: waits for in-flight cycles and jobs to finish
+            await asyncio.get_running_loop().run_in_executor(None, self.job_scheduler.shutdown)
+            if hasattr(self.broker, 'stop'):
+                self.broker.stop()
+            print("[TradingDaemon] ⚓ Trading daemon stopped.")
+
+    def run(self):
+        asyncio.run(self.serve())
+
+def send_control_command(command: str, socket_path: str = CONTROL_SOCKET_PATH, token: str = None,
+                         timeout: float = 10.0) -> dict:
+    """
+    Sends one command to a running daemon and returns its JSON reply.
+    """
+    token = token if token is not None else os.environ.get(CONTROL_TOKEN_ENV)
+    if hasattr(socket, 'AF_UNIX'):
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        address = socket_path
+    else:
+        conn = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        address = ('127.0.0.1', CONTROL_PORT)
+    with conn:
+        conn.settimeout(timeout)
+        conn.connect(address)
+        conn.sendall((json.dumps({'command': command, 'token': token}) + "\n").encode())
+        reply = b""
+        while not reply.endswith(b"\n"):
+            chunk = conn.recv(65536)
+            if not chunk:
+                break
+            reply += chunk
+    return json.loads(reply or b'{"ok": false, "error": "No reply."}')
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Shipmate trading daemon and control client.")
+    parser.add_argument("command", nargs="*", help="control command for a running daemon "
+                        "(status, metrics, authorize, revoke, kill, resume, run <agent>, shutdown); omit to start the daemon")
+    parser.add_argument("--socket", default=CONTROL_SOCKET_PATH)
+    parser.add_argument("--crypto-timeframe", default=CRYPTO_TIMEFRAME, choices=sorted(TIMEFRAME_SECONDS))
+    parser.add_argument("--stock-interval", type=float, default=STOCK_CYCLE_SECONDS)
+    args = parser.parse_args(argv)
+
+    if args.command:
+        try:
+            reply = send_control_command(" ".join(args.command), socket_path=args.socket)
+        except OSError as e:
+            print(f"❌ Trading daemon unreachable on {args.socket}: {e}")
+            return 1
+        print(json.dumps(reply, indent=2))
+        return 0 if reply.get('ok') else 1
+
+    TradingDaemon(crypto_timeframe=args.crypto_timeframe, stock_interval=args.stock_interval,
+                  socket_path=args.socket).run()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,28 +1,25 @@
 # shipmate_ai/core/transaction_summary.py
 
 import os
-import sqlite3
+from core.db_pool import get_connection
 
 DATABASE_PATH = os.path.join(os.getcwd(), 'shipmate_ledger.db')
 
+MONTHLY_PROFIT_LOSS_QUERY = '''
+    SELECT SUM(profit_loss) FROM trades
+    WHERE strftime('%Y', date) = ? AND strftime('%m', date) = ?
+'''
+
 def get_monthly_profit_loss(year: int, month: int) -> float:
     """
     Returns the total net profit/loss for the specified year and month.
     """
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
+    conn = get_connection(DATABASE_PATH)
 
     try:
-        query = '''
-            SELECT SUM(profit_loss) FROM trades
-            WHERE strftime('%Y', date) = ? AND strftime('%m', date) = ?
-        '''
-        cursor.execute(query, (str(year), f"{month:02d}"))
-        result = cursor.fetchone()[0]
+        result = conn.execute(MONTHLY_PROFIT_LOSS_QUERY, (str(year), f"{month:02d}")).fetchone()[0]
     except Exception as e:
         print(f"[TransactionSummary] Error retrieving P/L: {e}")
         result = 0.0
-    finally:
-        conn.close()
 
     return result if result else 0.0
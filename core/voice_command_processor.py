@@ -1,14 +1,18 @@
 # shipmate_ai/core/voice_command_processor.py
 
 import os
-import sqlite3
 import speech_recognition as sr
 from core.shipmate_command_router import ShipmateCommandRouter
 from core.sitrep_push import generate_and_send_sitrep
 from core.notification_center import add_notification
+from core.risk_state_store import get_risk_state_store
 
 DATABASE_PATH = os.path.join(os.getcwd(), 'shipmate_ledger.db')
 
+# Sector names as registered by the casino RiskManagerAgent
+CRYPTO_SECTOR = "Crypto"
+STOCK_SECTOR = "Tech Stocks"
+
 class VoiceCommandProcessor:
     """
     Battlefield processor for voice and text commands in Shipmate AI.
@@ -77,16 +81,16 @@ class VoiceCommandProcessor:
             return f"❌ Sit-Rep dispatch failed: {e}"
 
     def lock_crypto_sector(self) -> str:
-        return self._update_sector_lockout("Crypto", True)
+        return self._update_sector_lockout(CRYPTO_SECTOR, True)
 
     def unlock_crypto_sector(self) -> str:
-        return self._update_sector_lockout("Crypto", False)
+        return self._update_sector_lockout(CRYPTO_SECTOR, False)
 
     def lock_stock_sector(self) -> str:
-        return self._update_sector_lockout("Stocks", True)
+        return self._update_sector_lockout(STOCK_SECTOR, True)
 
     def unlock_stock_sector(self) -> str:
-        return self._update_sector_lockout("Stocks", False)
+        return self._update_sector_lockout(STOCK_SECTOR, False)
 
     def lock_all_sectors(self) -> str:
         return self._update_all_sectors(True)
@@ -99,35 +103,19 @@ class VoiceCommandProcessor:
         return "✅ Last field alerts displayed in dashboard."
 
     def _update_sector_lockout(self, sector: str, lock: bool) -> str:
-        conn = sqlite3.connect(DATABASE_PATH)
-        cursor = conn.cursor()
         try:
-            cursor.execute(
-                "UPDATE sector_lockouts SET is_locked = ? WHERE sector = ?;",
-                (1 if lock else 0, sector)
-            )
-            conn.commit()
+            get_risk_state_store(DATABASE_PATH).set_locked(sector, lock, reason="Captain command")
             status = "LOCKED" if lock else "UNLOCKED"
             add_notification(f"{sector} sector {status} by Captain command.")
             return f"✅ {sector} sector {status}."
         except Exception as e:
             return f"❌ Failed to update {sector}: {e}"
-        finally:
-            conn.close()
 
     def _update_all_sectors(self, lock: bool) -> str:
-        conn = sqlite3.connect(DATABASE_PATH)
-        cursor = conn.cursor()
         try:
-            cursor.execute(
-                "UPDATE sector_lockouts SET is_locked = ?;",
-                (1 if lock else 0,)
-            )
-            conn.commit()
+            get_risk_state_store(DATABASE_PATH).set_all_locked(lock, reason="Captain command")
             status = "LOCKED" if lock else "UNLOCKED"
             add_notification(f"All sectors {status} by Captain command.")
             return f"✅ All sectors {status}."
         except Exception as e:
             return f"❌ Failed to update all sectors: {e}"
-        finally:
-            conn.close()
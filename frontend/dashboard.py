@@ -1,26 +1,44 @@
 # shipmate_ai/frontend/dashboard.py
 
-from flask import Blueprint, render_template, send_from_directory, redirect, url_for, flash, request
+from flask import Blueprint, render_template, send_from_directory, redirect, url_for, flash, request, Response, stream_with_context, jsonify
 import os
+import json
+import queue
 from datetime import datetime
 from zipfile import ZipFile
-from core.monthly_report_generator import MonthlyReportGenerator
-from core.monthly_commander_pdf_generator import MonthlyCommanderPDFGenerator
-from core.email_dispatcher import EmailDispatcher
+from core.report_jobs import submit_report_job, get_report_job, get_report_job_queue
 from core.transaction_summary import get_monthly_profit_loss
 from core.risk_status import get_active_lockouts
 from core.voice_command_processor import VoiceCommandProcessor
 from core.notification_center import get_latest_notifications
 from core.heatmap_data import get_monthly_profit_loss_map
+from core.chart_renderer import chart_renderer
+from core.event_bus import event_bus
+from core.trading_daemon import send_control_command
+from utils.instrumentation import render_prometheus, latency_snapshot
+
+SSE_HEARTBEAT_SECONDS = 15
+DAEMON_METRICS_TIMEOUT = 2.0     # seconds to wait on the trading daemon's control socket
 
 # Initialize Blueprint
 dashboard_bp = Blueprint('dashboard', __name__)
 
+def _daemon_metrics():
+    """
+    Stage latency from the trading daemon, where the agents run, or None when it is not
+    reachable (the dashboard then shows its own process's registry).
+    """
+    try:
+        reply = send_control_command('metrics', timeout=DAEMON_METRICS_TIMEOUT)
+    except (OSError, ValueError):
+        return None
+    return reply if reply.get('ok') else None
+
 @dashboard_bp.route('/')
 def dashboard_home():
     """
     Shipmate Mobile Command Dashboard Home.
-    Displays live P/L, Risk Management Sector Lockouts, Notifications, and Heatmap.
+    Displays live P/L, Risk Management Sector Lockouts, Notifications, Heatmap and agent stage latency.
     """
     now = datetime.now()
     year = now.year
@@ -30,12 +48,66 @@ def dashboard_home():
     lockout_status = get_active_lockouts()
     notifications = get_latest_notifications()
     heatmap_data = get_monthly_profit_loss_map(year, month)
+    daemon_metrics = _daemon_metrics()
+    stage_latency = daemon_metrics['latency'] if daemon_metrics else latency_snapshot()
 
     return render_template('dashboard.html', 
                            net_profit_loss=net_profit_loss, 
                            lockout_status=lockout_status,
                            notifications=notifications,
-                           heatmap_data=heatmap_data)
+                           heatmap_data=heatmap_data,
+                           stage_latency=stage_latency)
+
+@dashboard_bp.route('/metrics')
+def metrics():
+    """
+    Trading cycle stage latency histograms in Prometheus text format (scrape target),
+    proxied from the trading daemon when it is running.
+    """
+    daemon_metrics = _daemon_metrics()
+    body = daemon_metrics['prometheus'] if daemon_metrics else render_prometheus()
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
+@dashboard_bp.route('/heatmap.png')
+def heatmap_image():
+    """
+    Current month's P/L calendar heatmap, rendered through the shared chart cache.
+    """
+    now = datetime.now()
+    heatmap_data = get_monthly_profit_loss_map(now.year, now.month)
+    png = chart_renderer.render_profit_loss_heatmap(now.year, now.month, heatmap_data)
+    return Response(png, mimetype='image/png', headers={'Cache-Control': 'no-cache'})
+
+@dashboard_bp.route('/events')
+def dashboard_events():
+    """
+    Server-Sent Events stream of live dashboard deltas.
+    Pushes notifications, ledger trades, sector lockouts and trading daemon updates as they are
+    published on the event bus, by this process or another one (the bus relays them).
+    """
+    def stream():
+        # Subscribed inside the generator, so the finally below always unsubscribes
+        subscriber = event_bus.subscribe()
+        try:
+            # Tell the browser how long to wait before reconnecting after a drop
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    event = subscriber.get(timeout=SSE_HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    # Comment line keeps proxies from closing an idle connection
+                    yield ": heartbeat\n\n"
+                    continue
+                payload = json.dumps({'timestamp': event['timestamp'], **event['data']})
+                yield f"id: {event['id']}\nevent: {event['type']}\ndata: {payload}\n\n"
+        finally:
+            event_bus.unsubscribe(subscriber)
+
+    return Response(
+        stream_with_context(stream()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 @dashboard_bp.route('/download-latest-reports')
 def download_latest_reports():
@@ -73,32 +145,48 @@ def download_latest_reports():
 @dashboard_bp.route('/force-generate-reports')
 def force_generate_reports():
     """
-    Emergency manual trigger: Generates and emails monthly reports.
+    Emergency manual trigger: Queues generation and emailing of monthly reports.
+    Returns immediately; progress is available from /report-jobs/<job_id>.
     """
     now = datetime.now()
     year = now.year
     month = now.month
 
     try:
-        csv_generator = MonthlyReportGenerator()
-        csv_generator.generate_monthly_report(year, month)
-        csv_generator.close_connection()
-
-        pdf_generator = MonthlyCommanderPDFGenerator()
-        pdf_generator.generate_monthly_pdf(year, month)
-        pdf_generator.close_connection()
-
-        dispatcher = EmailDispatcher()
-        dispatcher.send_monthly_reports(year, month)
-        dispatcher.close_connection()
-
-        flash("✅ Commander Reports generated and dispatched successfully!", "success")
+        job_id = submit_report_job(year, month)
     except Exception as e:
         print(f"[Dashboard] Error: {e}")
-        flash(f"❌ Failed to generate and dispatch reports: {e}", "error")
-
+        if request.accept_mimetypes.best == 'application/json':
+            return jsonify({'error': str(e)}), 500
+        flash(f"❌ Failed to queue report generation: {e}", "error")
+        return redirect(url_for('dashboard.dashboard_home'))
+
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify({
+            'job_id': job_id,
+            'status_url': url_for('dashboard.report_job_status', job_id=job_id)
+        }), 202
+
+    flash(f"🛡️ Commander Reports queued (job {job_id}). They will be emailed when ready.", "success")
     return redirect(url_for('dashboard.dashboard_home'))
 
+@dashboard_bp.route('/report-jobs')
+def report_jobs():
+    """
+    Lists the most recent report jobs and their progress.
+    """
+    return jsonify(get_report_job_queue().list_jobs())
+
+@dashboard_bp.route('/report-jobs/<job_id>')
+def report_job_status(job_id):
+    """
+    Returns status and progress for a single report job.
+    """
+    job = get_report_job(job_id)
+    if job is None:
+        return jsonify({'error': f"Unknown report job: {job_id}"}), 404
+    return jsonify(job)
+
 @dashboard_bp.route('/voice-command', methods=['POST'])
 def voice_command():
     """
@@ -0,0 +1,103 @@
+# shipmate_ai/replay_load_test.py
+
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+import statistics
+
+from utils.replay_broker import ReplayBroker
+from utils.strategy import BaseStrategy
+from utils.trade_utils import TradeAction
+from utils.memory import TradeMemory
+from utils.agents import TradeJournalAgent, RiskManagerAgent, TransactionLedgerAgent
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'agents'))
+from casino_royale_division.day_trader_agent import DayTraderAgent
+from casino_royale_division.crypto_trader_agent import CryptoTraderAgent
+from casino_royale_division.hedge_fund_manager_agent import HedgeFundManagerAgent
+
+class ChurnStrategy(BaseStrategy):
+    """
+    Trades whenever price crosses its SMA so the load test actually exercises order flow.
+    """
+
+    def decide(self, symbol, indicators, trade_history=None, account_info=None):
+        close, sma = indicators.get("close"), indicators.get("sma")
+        rationale = {"close": close, "sma": sma, "strategy": "ChurnStrategy"}
+        if not close or not sma:
+            return TradeAction.HOLD, 0.5, rationale
+        return (TradeAction.BUY if close > sma else TradeAction.SELL), 0.8, rationale
+
+def summarize(name, timings):
+    timings = sorted(timings)
+    p95 = timings[min(len(timings) - 1, int(0.95 * len(timings)))]
+    print(f"{name:<22} cycles={len(timings):<4} mean={statistics.mean(timings) * 1000:9.1f} ms"
+          f"  p95={p95 * 1000:9.1f} ms  max={timings[-1] * 1000:9.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the trading agents against the local replay broker.")
+    parser.add_argument("--symbols", type=int, default=500, help="equity universe size")
+    parser.add_argument("--crypto-symbols", type=int, default=50)
+    parser.add_argument("--cycles", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per broker call")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.01)
+    parser.add_argument("--partial-fill-rate", type=float, default=0.1)
+    parser.add_argument("--data-dir", default=None, help="directory of <SYMBOL>.csv OHLCV recordings")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    for name in ("Agents", "DayTraderAgent", "CryptoTraderAgent", "HedgeFundManagerAgent", "ReplayBroker"):
+        logging.getLogger(name).setLevel(logging.ERROR)
+    broker = ReplayBroker(
+        data_dir=args.data_dir, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        partial_fill_rate=args.partial_fill_rate, synthetic_bars=100 + args.cycles + 1
+    )
+    equities = [f"SYM{i:04d}" for i in range(args.symbols)]
+    cryptos = [f"C{i:03d}/USD" for i in range(args.crypto_symbols)]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        day_trader = DayTraderAgent(
+            broker_api=broker, strategy=ChurnStrategy(), stock_universe=equities,
+            memory_path=os.path.join(workdir, "day_trader.json"), risk_manager=RiskManagerAgent(),
+            journal_agent=TradeJournalAgent(), ledger_agent=TransactionLedgerAgent()
+        )
+        hedge_fund = HedgeFundManagerAgent(
+            broker=broker, strategy=ChurnStrategy(),
+            memory=TradeMemory(os.path.join(workdir, "hedge_fund.json")), journal=TradeJournalAgent(),
+            risk_manager=RiskManagerAgent(), ledger=TransactionLedgerAgent(), simulation_mode=False
+        )
+        hedge_fund.authorize_trading()
+        crypto_trader = CryptoTraderAgent(
+            broker=broker, strategy=ChurnStrategy(),
+            trade_memory=TradeMemory(os.path.join(workdir, "crypto.json")), trade_journal=TradeJournalAgent(),
+            risk_manager=RiskManagerAgent(), transaction_ledger=TransactionLedgerAgent(), simulation_mode=False
+        )
+
+        timings = {"DayTraderAgent": [], "HedgeFundManagerAgent": [], "CryptoTraderAgent": []}
+        for cycle in range(args.cycles):
+            start = time.perf_counter()
+            day_trader.run()
+            timings["DayTraderAgent"].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            hedge_fund.run_daily_strategy(equities)
+            timings["HedgeFundManagerAgent"].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            # Replay serves 1-minute bars; higher timeframes need hours of history to warm up
+            crypto_trader.run(cryptos, timeframe="1m")
+            timings["CryptoTraderAgent"].append(time.perf_counter() - start)
+
+            broker.advance()
+
+    print(f"🛳️ Replay load test: {args.symbols} equities, {args.crypto_symbols} crypto pairs, {args.cycles} cycles")
+    for name, samples in timings.items():
+        summarize(name, samples)
+    print(f"Broker stats: {broker.stats}")
+
+if __name__ == "__main__":
+    main()
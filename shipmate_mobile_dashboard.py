@@ -158,7 +158,7 @@ def view_journal():
 
 @app.route('/emergency_override', methods=['POST'])
 def emergency_override():
-    risk_manager.trading_locked = True
+    risk_manager.lock_all_sectors("Emergency override from mobile dashboard")
     return redirect(url_for('home'))
 
 if __name__ == '__main__':
@@ -1,7 +1,11 @@
 # agents.py
 
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from utils.trade_records import is_record, pack
 
 logger = logging.getLogger("Agents")
 logger.setLevel(logging.INFO)
@@ -10,14 +14,47 @@ class TradeJournalAgent:
     def __init__(self):
         self.name = "TradeJournalAgent"
 
-    def log_trade(self, symbol: str, metadata: Dict[str, Any]):
-        logger.info(f"[JOURNAL] {symbol} | {metadata}")
+    def log_trade(self, symbol: str, metadata: Any):
+        # Lazy %-formatting: records and dicts are only rendered when INFO is enabled
+        logger.info("[JOURNAL] %s | %s", symbol, metadata)
+
+    def log(self, symbol: str, action: str, rationale: Any):
+        # CryptoTraderAgent's call style
+        self.log_trade(symbol, {"action": action, "rationale": rationale})
+
+
+class RiskDecision(NamedTuple):
+    """
+    Outcome of a batch pre-trade check for one proposed order.
+    `quantity` is the approved (possibly resized) size; 0 when vetoed.
+    """
+    symbol: str
+    approved: bool
+    quantity: int
+    reason: str
 
 
 class RiskManagerAgent:
-    def __init__(self, max_loss_threshold: float = 0.05):
+    def __init__(
+        self,
+        max_loss_threshold: float = 0.05,
+        max_atr: float = 20,
+        max_position_pct: float = 0.10,
+        max_sector_pct: float = 0.30,
+        max_correlated_pct: float = 0.25,
+        correlation_threshold: float = 0.8,
+        min_cash_reserve: float = 0.05,
+        sector_map: Optional[Dict[str, str]] = None,
+    ):
         self.name = "RiskManagerAgent"
         self.max_loss_threshold = max_loss_threshold  # Max 5% loss allowed by default
+        self.max_atr = max_atr
+        self.max_position_pct = max_position_pct            # Single name, post-trade, as % of equity
+        self.max_sector_pct = max_sector_pct                # Per sector, post-trade, as % of equity
+        self.max_correlated_pct = max_correlated_pct        # Names moving together (|corr| >= threshold)
+        self.correlation_threshold = correlation_threshold
+        self.min_cash_reserve = min_cash_reserve            # Buys may not spend the last 5% of equity
+        self.sector_map = sector_map or {}
 
     def evaluate_trade(
         self,
@@ -36,12 +73,148 @@ class RiskManagerAgent:
         # Allow by default
         return False, "Approved."
 
+    def veto(self, symbol: str, action: str, indicators: Dict[str, Any], rationale: Any) -> tuple[bool, str]:
+        # CryptoTraderAgent's call style: no sizing or account context
+        return self.evaluate_trade(symbol, action, 0, indicators, {}, [])
+
+    def evaluate_orders(
+        self,
+        orders: Sequence[Any],
+        indicators: Dict[str, Dict[str, Any]],
+        account_info: Dict[str, Any],
+        price_history: Optional[Dict[str, Sequence[float]]] = None,
+    ) -> List[RiskDecision]:
+        """
+        Batch pre-trade check over a whole cycle's proposed orders (TradeOrder-like objects).
+
+        One pass evaluates, in order: per-symbol volatility veto, single-name concentration,
+        sector caps, correlated exposure (when `price_history` closes are supplied) and
+        aggregate cash usage. Buys that breach a portfolio-level limit are scaled down rather
+        than dropped; sells reduce exposure and are only subject to the volatility veto.
+        Returns one RiskDecision per order, in input order.
+        """
+        n = len(orders)
+        if n == 0:
+            return []
+
+        symbols = [order.symbol for order in orders]
+        is_buy = np.array([str(order.action).upper() == "BUY" for order in orders])
+        quantity = np.array([max(order.quantity, 0) for order in orders], dtype=float)
+        prices = np.array([float(indicators.get(symbol, {}).get("close") or 0.0) for symbol in symbols])
+        atr = np.array([float(indicators.get(symbol, {}).get("atr") or 0.0) for symbol in symbols])
+
+        positions = account_info.get("positions", {}) or {}
+        held = np.array([_position_quantity(positions.get(symbol)) for symbol in symbols])
+        equity = float(account_info.get("equity", 0) or 0)
+        cash = float(account_info.get("cash", 0) or 0)
+
+        reasons = [[] for _ in range(n)]
+        vetoed = (atr > self.max_atr) | (prices <= 0)
+        for i in np.flatnonzero(vetoed):
+            reasons[i].append(f"ATR too high ({atr[i]})" if atr[i] > self.max_atr else "Price unavailable")
+
+        buys = is_buy & ~vetoed
+        # Dollar amounts each buy may add; shrunk by every limit in turn
+        notional = np.where(buys, quantity * prices, 0.0)
+        held_value = np.abs(held) * prices
+
+        if equity > 0:
+            # 1. Single-name concentration
+            room = np.maximum(self.max_position_pct * equity - held_value, 0.0)
+            self._cap(notional, np.minimum(notional, room), reasons, "position cap")
+
+            # 2. Sector caps (existing holdings in the batch count toward the sector)
+            sectors = np.array([self.sector_map.get(symbol, "") for symbol in symbols])
+            for sector in np.unique(sectors[buys & (sectors != "")]):
+                members = sectors == sector
+                budget = max(self.max_sector_pct * equity - held_value[members].sum(), 0.0)
+                self._scale(notional, members, budget, reasons, f"sector cap {sector}")
+
+            # 3. Correlated exposure
+            if price_history:
+                self._cap_correlated(symbols, notional, held_value, buys, price_history, equity, reasons)
+
+        # 4. Aggregate cash usage across the whole batch
+        spendable = max(cash - self.min_cash_reserve * equity, 0.0)
+        self._scale(notional, buys, spendable, reasons, "cash budget")
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            approved_qty = np.where(buys, np.floor(notional / np.where(prices > 0, prices, 1.0)), quantity)
+        approved_qty[vetoed] = 0
+
+        decisions = []
+        for i, symbol in enumerate(symbols):
+            qty = int(approved_qty[i])
+            if vetoed[i] or qty <= 0:
+                reason = "; ".join(reasons[i]) or "Zero quantity after limits"
+                decisions.append(RiskDecision(symbol, False, 0, f"Trade rejected: {reason}."))
+            elif qty < quantity[i]:
+                decisions.append(RiskDecision(
+                    symbol, True, qty, f"Approved, resized {int(quantity[i])} -> {qty}: {'; '.join(reasons[i])}."
+                ))
+            else:
+                decisions.append(RiskDecision(symbol, True, qty, "Approved."))
+        return decisions
+
+    @staticmethod
+    def _cap(notional: np.ndarray, capped: np.ndarray, reasons: List[List[str]], label: str):
+        for i in np.flatnonzero(capped < notional):
+            reasons[i].append(label)
+        notional[:] = capped
+
+    @classmethod
+    def _scale(cls, notional: np.ndarray, members: np.ndarray, budget: float, reasons: List[List[str]], label: str):
+        total = notional[members].sum()
+        if total > budget:
+            capped = notional.copy()
+            capped[members] *= budget / total
+            cls._cap(notional, capped, reasons, label)
+
+    def _cap_correlated(self, symbols, notional, held_value, buys, price_history, equity, reasons):
+        # Correlation of recent close-to-close returns, over names with enough aligned history
+        series = [np.asarray(price_history.get(symbol, ()), dtype=float) for symbol in symbols]
+        length = min((len(s) for s, buy in zip(series, buys) if buy), default=0)
+        if length < 3:
+            return
+        usable = np.array([len(s) >= length for s in series])
+        idx = np.flatnonzero(usable)
+        closes = np.vstack([series[i][-length:] for i in idx])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            returns = np.diff(closes, axis=1) / closes[:, :-1]
+            corr = np.nan_to_num(np.corrcoef(returns))
+        corr = np.atleast_2d(corr)
+        linked = np.abs(corr) >= self.correlation_threshold
+
+        budget = self.max_correlated_pct * equity
+        exposure = linked @ (held_value[idx] + notional[idx])
+        scale = np.ones(len(symbols))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scale[idx] = np.where(exposure > budget, budget / exposure, 1.0)
+        capped = np.where(buys, notional * scale, notional)
+        self._cap(notional, capped, reasons, "correlated exposure")
+
+
+def _position_quantity(position: Any) -> float:
+    if isinstance(position, dict):
+        return float(position.get("quantity", position.get("qty", 0)) or 0)
+    return float(position or 0)
+
 
 class TransactionLedgerAgent:
     def __init__(self):
         self.name = "TransactionLedgerAgent"
         self.ledger = []
 
-    def record_transaction(self, symbol: str, metadata: Dict[str, Any]):
-        logger.info(f"[LEDGER] {symbol} | {metadata}")
-        self.ledger.append({symbol: metadata})
+    def record_transaction(self, symbol: str, metadata: Any):
+        logger.info("[LEDGER] %s | %s", symbol, metadata)
+        self.ledger.append((symbol, metadata))
+
+    def record_execution(self, symbol: str, action: str, qty: float, execution: Dict[str, Any]):
+        # CryptoTraderAgent's call style
+        self.record_transaction(symbol, {"action": action, "qty": qty, "execution": execution})
+
+    def export_packed(self) -> List[bytes]:
+        """
+        Packed ledger entries (trade records only) for shipping to a durable store.
+        """
+        return [pack(metadata) for _, metadata in self.ledger if is_record(metadata)]
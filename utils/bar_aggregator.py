@@ -0,0 +1,345 @@
+# bar_aggregator.py
+
+import logging
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, Any, Callable, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger("BarAggregator")
+logger.setLevel(logging.INFO)
+
+BASE_TIMEFRAME = "1m"
+TIMEFRAME_SECONDS = {
+    "1m": 60,
+    "5m": 300,
+    "15m": 900,
+    "1h": 3600,
+    "4h": 14400,
+    "1d": 86400,
+}
+DEFAULT_CAPACITY = 500        # closed bars kept per symbol and timeframe
+
+# Same parameters as utils.market_indicators.compute_indicators
+RSI_PERIOD = 14
+SMA_PERIOD = 14
+EMA_PERIOD = 14
+MACD_FAST = 12
+MACD_SLOW = 26
+MACD_SIGNAL = 9
+BB_PERIOD = 20
+BB_STD = 2
+ATR_PERIOD = 14
+MOMENTUM_PERIOD = 10
+VWAP_WINDOW = 100
+
+# Ring buffer columns
+TS, OPEN, HIGH, LOW, CLOSE, VOLUME = range(6)
+
+def to_epoch(timestamp: Any) -> float:
+    """
+    Epoch seconds from a datetime, an ISO-8601 string (naive = UTC) or a number
+    (seconds, or milliseconds as ccxt returns).
+    """
+    if isinstance(timestamp, (int, float)):
+        return timestamp / 1000.0 if timestamp > 1e11 else float(timestamp)
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.timestamp()
+
+def _iso(epoch: float) -> str:
+    return datetime.fromtimestamp(epoch, tz=timezone.utc).replace(tzinfo=None).isoformat()
+
+class BarCloseEvent(NamedTuple):
+    symbol: str
+    timeframe: str
+    bar: Dict[str, Any]
+    indicators: Dict[str, Optional[float]]
+
+class BarRing:
+    """
+    Fixed-capacity ring of closed OHLCV bars in one NumPy array.
+    """
+    __slots__ = ("data", "head", "count")
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.data = np.zeros((capacity, 6))
+        self.head = 0
+        self.count = 0
+
+    def append(self, bar: Sequence[float]):
+        self.data[self.head] = bar
+        self.head = (self.head + 1) % len(self.data)
+        self.count = min(self.count + 1, len(self.data))
+
+    def last(self, limit: Optional[int] = None) -> np.ndarray:
+        """
+        The most recent `limit` bars, oldest first.
+        """
+        n = self.count if limit is None else min(limit, self.count)
+        idx = (self.head - n + np.arange(n)) % len(self.data)
+        return self.data[idx]
+
+    def __len__(self):
+        return self.count
+
+class IncrementalIndicators:
+    """
+    The compute_indicators() set, updated in O(1) per closed bar from running sums and
+    EMAs instead of being recomputed over a DataFrame window.
+    """
+    __slots__ = ("count", "prev_close", "gains", "losses", "gain_sum", "loss_sum", "sma_window", "sma_sum",
+                 "ema", "ema_fast", "ema_slow", "macd_signal", "bb_window", "bb_sum", "bb_sumsq",
+                 "true_ranges", "tr_sum", "vwap_window", "vwap_pv", "vwap_volume", "closes", "close")
+
+    def __init__(self):
+        self.count = 0
+        self.prev_close = None
+        self.gains = deque(maxlen=RSI_PERIOD)
+        self.losses = deque(maxlen=RSI_PERIOD)
+        self.gain_sum = self.loss_sum = 0.0
+        self.sma_window = deque(maxlen=SMA_PERIOD)
+        self.sma_sum = 0.0
+        self.ema = self.ema_fast = self.ema_slow = self.macd_signal = None
+        self.bb_window = deque(maxlen=BB_PERIOD)
+        self.bb_sum = self.bb_sumsq = 0.0
+        self.true_ranges = deque(maxlen=ATR_PERIOD)
+        self.tr_sum = 0.0
+        self.vwap_window = deque(maxlen=VWAP_WINDOW)
+        self.vwap_pv = self.vwap_volume = 0.0
+        self.closes = deque(maxlen=MOMENTUM_PERIOD + 1)
+        self.close = None
+
+    @staticmethod
+    def _push(window: deque, value: float, total: float) -> float:
+        if len(window) == window.maxlen:
+            total -= window[0]
+        window.append(value)
+        return total + value
+
+    @staticmethod
+    def _ema(previous: Optional[float], value: float, span: int) -> float:
+        alpha = 2.0 / (span + 1)
+        return value if previous is None else alpha * value + (1 - alpha) * previous
+
+    def update(self, high: float, low: float, close: float, volume: float):
+        self.count += 1
+        if self.prev_close is not None:
+            delta = close - self.prev_close
+            self.gain_sum = self._push(self.gains, max(delta, 0.0), self.gain_sum)
+            self.loss_sum = self._push(self.losses, max(-delta, 0.0), self.loss_sum)
+            true_range = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+        else:
+            true_range = high - low
+        self.tr_sum = self._push(self.true_ranges, true_range, self.tr_sum)
+
+        self.sma_sum = self._push(self.sma_window, close, self.sma_sum)
+        if len(self.bb_window) == BB_PERIOD:
+            self.bb_sumsq -= self.bb_window[0] ** 2
+        self.bb_sum = self._push(self.bb_window, close, self.bb_sum)
+        self.bb_sumsq += close * close
+
+        self.ema = self._ema(self.ema, close, EMA_PERIOD)
+        self.ema_fast = self._ema(self.ema_fast, close, MACD_FAST)
+        self.ema_slow = self._ema(self.ema_slow, close, MACD_SLOW)
+        self.macd_signal = self._ema(self.macd_signal, self.ema_fast - self.ema_slow, MACD_SIGNAL)
+
+        typical = (high + low + close) / 3
+        if len(self.vwap_window) == VWAP_WINDOW:
+            old_pv, old_volume = self.vwap_window[0]
+            self.vwap_pv -= old_pv
+            self.vwap_volume -= old_volume
+        self.vwap_window.append((typical * volume, volume))
+        self.vwap_pv += typical * volume
+        self.vwap_volume += volume
+
+        self.closes.append(close)
+        self.prev_close = close
+        self.close = close
+
+    def snapshot(self) -> Dict[str, Optional[float]]:
+        n = self.count
+        rsi = None
+        if len(self.gains) == RSI_PERIOD:
+            if self.loss_sum > 0:
+                rsi = 100 - 100 / (1 + self.gain_sum / self.loss_sum)
+            elif self.gain_sum > 0:
+                rsi = 100.0
+        bb_upper = bb_lower = bb_width = None
+        if n >= BB_PERIOD:
+            mean = self.bb_sum / BB_PERIOD
+            variance = max((self.bb_sumsq - BB_PERIOD * mean * mean) / (BB_PERIOD - 1), 0.0)
+            std = variance ** 0.5
+            bb_upper, bb_lower = mean + BB_STD * std, mean - BB_STD * std
+            bb_width = bb_upper - bb_lower
+        macd = self.ema_fast - self.ema_slow if n >= MACD_SLOW else None
+        return {
+            'rsi': rsi,
+            'sma': self.sma_sum / SMA_PERIOD if n >= SMA_PERIOD else None,
+            'ema': self.ema if n >= EMA_PERIOD else None,
+            'macd': macd,
+            'macd_signal': self.macd_signal if macd is not None else None,
+            'bb_upper': bb_upper,
+            'bb_lower': bb_lower,
+            'bb_width': bb_width,
+            'atr': self.tr_sum / ATR_PERIOD if n >= ATR_PERIOD else None,
+            'vwap': self.vwap_pv / self.vwap_volume if self.vwap_volume > 0 else None,
+            'momentum': self.closes[-1] - self.closes[0] if len(self.closes) == MOMENTUM_PERIOD + 1 else None,
+            'close': self.close,
+        }
+
+class _SymbolState:
+    __slots__ = ("last_ts", "forming", "rings", "indicators", "trade_bar")
+
+    def __init__(self, timeframes: Sequence[str], capacity: int):
+        self.last_ts = None
+        self.forming: Dict[str, List[float]] = {}
+        self.rings = {tf: BarRing(capacity) for tf in timeframes}
+        self.indicators = {tf: IncrementalIndicators() for tf in timeframes}
+        self.trade_bar = None
+
+class BarAggregator:
+    """
+    Streams trades or 1-minute bars into 1m/5m/15m/1h/4h/1d bars per symbol.
+
+    Every timeframe keeps its forming bar plus a ring buffer of closed bars. When a bar
+    closes (the last minute of its bucket arrives, or the first minute of the next one),
+    its incremental indicators are updated and a BarCloseEvent goes to subscribers.
+    Higher timeframes never resample history.
+    """
+
+    def __init__(self, timeframes: Sequence[str] = tuple(TIMEFRAME_SECONDS), capacity: int = DEFAULT_CAPACITY):
+        unknown = [tf for tf in timeframes if tf not in TIMEFRAME_SECONDS]
+        if unknown:
+            raise ValueError(f"Unsupported timeframes: {unknown}")
+        self.timeframes = sorted(timeframes, key=TIMEFRAME_SECONDS.get)
+        self.capacity = capacity
+        self._symbols: Dict[str, _SymbolState] = {}
+        self._subscribers: List[tuple] = []
+        self._lock = threading.RLock()
+
+    def subscribe(self, callback: Callable[[BarCloseEvent], None], timeframe: Optional[str] = None,
+                  symbol: Optional[str] = None):
+        """
+        Registers a bar-close callback, optionally filtered by timeframe and/or symbol.
+        """
+        self._subscribers.append((callback, timeframe, symbol))
+
+    def _state(self, symbol: str) -> _SymbolState:
+        state = self._symbols.get(symbol)
+        if state is None:
+            state = self._symbols[symbol] = _SymbolState(self.timeframes, self.capacity)
+        return state
+
+    # --- Input ---
+    def on_bar(self, symbol: str, bar: Dict[str, Any]) -> List[BarCloseEvent]:
+        """
+        Consumes one closed 1-minute bar. Bars at or before the last one seen are ignored,
+        so overlapping history windows can be fed repeatedly.
+        """
+        with self._lock:
+            state = self._state(symbol)
+            ts = to_epoch(bar["timestamp"])
+            if state.last_ts is not None and ts <= state.last_ts:
+                return []
+            state.last_ts = ts
+            values = [ts, float(bar["open"]), float(bar["high"]), float(bar["low"]),
+                      float(bar["close"]), float(bar.get("volume", 0.0))]
+            events = []
+            for timeframe in self.timeframes:
+                seconds = TIMEFRAME_SECONDS[timeframe]
+                bucket = ts - ts % seconds
+                forming = state.forming.get(timeframe)
+                if forming is not None and forming[TS] != bucket:
+                    events.append(self._close(symbol, state, timeframe))
+                    forming = None
+                if forming is None:
+                    state.forming[timeframe] = [bucket] + values[1:]
+                else:
+                    forming[HIGH] = max(forming[HIGH], values[HIGH])
+                    forming[LOW] = min(forming[LOW], values[LOW])
+                    forming[CLOSE] = values[CLOSE]
+                    forming[VOLUME] += values[VOLUME]
+                if ts + TIMEFRAME_SECONDS[BASE_TIMEFRAME] >= bucket + seconds:
+                    events.append(self._close(symbol, state, timeframe))
+        self._emit(events)
+        return events
+
+    def on_bars(self, symbol: str, bars: Sequence[Dict[str, Any]]) -> List[BarCloseEvent]:
+        events = []
+        for bar in bars:
+            events.extend(self.on_bar(symbol, bar))
+        return events
+
+    def on_trade(self, symbol: str, timestamp: Any, price: float, size: float = 0.0) -> List[BarCloseEvent]:
+        """
+        Consumes a single trade print; completed minutes are fed through on_bar().
+        """
+        ts = to_epoch(timestamp)
+        minute = ts - ts % TIMEFRAME_SECONDS[BASE_TIMEFRAME]
+        with self._lock:
+            state = self._state(symbol)
+            bar = state.trade_bar
+            completed = None
+            if bar is not None and bar["timestamp"] != minute:
+                completed, bar = bar, None
+            if bar is None:
+                state.trade_bar = {"timestamp": minute, "open": price, "high": price, "low": price,
+                                   "close": price, "volume": size}
+            else:
+                bar["high"] = max(bar["high"], price)
+                bar["low"] = min(bar["low"], price)
+                bar["close"] = price
+                bar["volume"] += size
+        return self.on_bar(symbol, completed) if completed else []
+
+    def _close(self, symbol: str, state: _SymbolState, timeframe: str) -> BarCloseEvent:
+        bar = state.forming.pop(timeframe)
+        state.rings[timeframe].append(bar)
+        indicators = state.indicators[timeframe]
+        indicators.update(bar[HIGH], bar[LOW], bar[CLOSE], bar[VOLUME])
+        return BarCloseEvent(symbol, timeframe, self._as_dict(bar), indicators.snapshot())
+
+    def _emit(self, events: List[BarCloseEvent]):
+        for event in events:
+            for callback, timeframe, symbol in self._subscribers:
+                if (timeframe is None or timeframe == event.timeframe) and (symbol is None or symbol == event.symbol):
+                    try:
+                        callback(event)
+                    except Exception as e:
+                        logger.error(f"Bar-close subscriber failed for {event.symbol} {event.timeframe}: {e}")
+
+    # --- Output ---
+    @staticmethod
+    def _as_dict(bar: Sequence[float]) -> Dict[str, Any]:
+        return {"timestamp": _iso(bar[TS]), "open": bar[OPEN], "high": bar[HIGH], "low": bar[LOW],
+                "close": bar[CLOSE], "volume": bar[VOLUME]}
+
+    def candles(self, symbol: str, timeframe: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Closed bars for a timeframe, oldest first, in compute_indicators() format.
+        """
+        with self._lock:
+            state = self._symbols.get(symbol)
+            if state is None or timeframe not in state.rings:
+                return []
+            return [self._as_dict(bar) for bar in state.rings[timeframe].last(limit).tolist()]
+
+    def bar_count(self, symbol: str, timeframe: str) -> int:
+        state = self._symbols.get(symbol)
+        return len(state.rings[timeframe]) if state and timeframe in state.rings else 0
+
+    def indicators(self, symbol: str, timeframe: str) -> Optional[Dict[str, Optional[float]]]:
+        with self._lock:
+            state = self._symbols.get(symbol)
+            if state is None or timeframe not in state.indicators or not state.indicators[timeframe].count:
+                return None
+            return state.indicators[timeframe].snapshot()
+
+    def last_timestamp(self, symbol: str) -> Optional[float]:
+        state = self._symbols.get(symbol)
+        return state.last_ts if state else None
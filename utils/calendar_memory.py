@@ -1,58 +1,221 @@
-
 # calendar_memory.py
 
 import json
 import os
-from typing import List, Dict
-from datetime import datetime
+import threading
+from typing import Iterable, List, Dict, Optional
+from datetime import datetime, timedelta
+
+from core.db_pool import get_connection
+from utils.interval_index import IntervalIndex, to_timestamp
+
+CREATE_EVENTS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS calendar_events (
+        event_id TEXT PRIMARY KEY,
+        start_time TEXT,
+        end_time TEXT,
+        data TEXT NOT NULL
+    )
+'''
+SELECT_EVENTS_QUERY = "SELECT rowid, event_id, data FROM calendar_events ORDER BY rowid"
+COUNT_EVENTS_QUERY = "SELECT COUNT(*) FROM calendar_events"
+# Upserts keep the row (and its rowid, our storage order) when the event already exists
+UPSERT_EVENT_QUERY = '''
+    INSERT INTO calendar_events (event_id, start_time, end_time, data) VALUES (?, ?, ?, ?)
+    ON CONFLICT(event_id) DO UPDATE SET
+        start_time = excluded.start_time, end_time = excluded.end_time, data = excluded.data
+'''
+DELETE_EVENT_QUERY = "DELETE FROM calendar_events WHERE event_id = ?"
+
+# Batches larger than this are merged into the index in one pass instead of event by event
+REINDEX_BATCH_SIZE = 256
 
 class CalendarMemory:
-    def __init__(self, filepath: str = "memory/calendar_events.json"):
-        self.filepath = filepath
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        if not os.path.exists(self.filepath):
-            with open(self.filepath, "w") as f:
-                json.dump([], f)
+    """
+    Calendar events keyed by event_id in SQLite (WAL, pooled connections), with an
+    in-memory copy: a dict by event_id plus an IntervalIndex ordered by start time.
+
+    Writes go to SQLite first and then update the copy; other writers (threads or
+    processes) are picked up via `PRAGMA data_version` (the file holds nothing else). Bulk
+    upserts (sync imports) are one transaction. A legacy JSON event file next to the
+    database is imported once on first use.
+    """
+
+    def __init__(self, filepath: str = "memory/calendar_events.db"):
+        base, extension = os.path.splitext(filepath)
+        # Callers still passing the old JSON path get the sibling database
+        self.filepath = base + ".db" if extension == ".json" else filepath
+        self.legacy_path = base + ".json"
+        if os.path.dirname(self.filepath):
+            os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
+        self._lock = threading.RLock()
+        self._events: Dict[str, Dict] = {}
+        self._order: Dict[str, int] = {}
+        self._next_order = 0
+        self._index = IntervalIndex()
+        self._seen_versions = {}
+        self._ensure_table()
+        self._migrate_legacy_json()
+        self._reload(get_connection(self.filepath))
+
+    def _ensure_table(self):
+        conn = get_connection(self.filepath)
+        with conn:
+            conn.execute(CREATE_EVENTS_TABLE)
+
+    def _migrate_legacy_json(self):
+        if not os.path.exists(self.legacy_path):
+            return
+        conn = get_connection(self.filepath)
+        if conn.execute(COUNT_EVENTS_QUERY).fetchone()[0] == 0:
+            with open(self.legacy_path, "r") as f:
+                events = [event for event in json.load(f) if event.get("event_id")]
+            with conn:
+                conn.executemany(UPSERT_EVENT_QUERY, [self._row(event) for event in events])
+            print(f"[CalendarMemory] Migrated {len(events)} events from {self.legacy_path}.")
+        os.replace(self.legacy_path, self.legacy_path + ".migrated")
+
+    # --- Cache maintenance ---
+    @staticmethod
+    def _row(event: Dict):
+        return event["event_id"], event.get("start_time"), event.get("end_time"), json.dumps(event)
 
-    def _load(self) -> List[Dict]:
-        with open(self.filepath, "r") as f:
-            return json.load(f)
+    def _index_item(self, event: Dict):
+        try:
+            start = to_timestamp(event["start_time"])
+            end = to_timestamp(event["end_time"])
+        except Exception:
+            return None     # unparseable events stay stored but never match a window
+        return event["event_id"], start, end, self._order[event["event_id"]]
 
-    def _save(self, data: List[Dict]):
-        with open(self.filepath, "w") as f:
-            json.dump(data, f, indent=2)
+    def _reload(self, conn):
+        events, order = {}, {}
+        for rowid, event_id, data in conn.execute(SELECT_EVENTS_QUERY):
+            events[event_id] = json.loads(data)
+            order[event_id] = rowid
+        self._events = events
+        self._order = order
+        self._next_order = max(order.values(), default=0) + 1
+        self._index.rebuild(item for item in map(self._index_item, events.values()) if item)
+        self._seen_versions[id(conn)] = conn.execute("PRAGMA data_version").fetchone()[0]
 
+    def _refresh(self):
+        conn = get_connection(self.filepath)
+        if self._seen_versions.get(id(conn)) != conn.execute("PRAGMA data_version").fetchone()[0]:
+            self._reload(conn)
+        return conn
+
+    def _after_write(self, conn) -> bool:
+        """
+        True (after reloading) if another connection committed around our write.
+        """
+        if self._seen_versions.get(id(conn)) != conn.execute("PRAGMA data_version").fetchone()[0]:
+            self._reload(conn)
+            return True
+        return False
+
+    # --- Writes ---
     def save_event(self, event: Dict):
-        data = self._load()
-        for i, e in enumerate(data):
-            if e.get("event_id") == event["event_id"]:
-                data[i] = event
-                self._save(data)
-                return
-        data.append(event)
-        self._save(data)
+        self.save_events([event])
+
+    def save_events(self, events: Iterable[Dict]) -> int:
+        """
+        Upserts many events in one transaction. Returns the number written.
+        """
+        events = list({event["event_id"]: event for event in events}.values())
+        if not events:
+            return 0
+        with self._lock:
+            conn = self._refresh()
+            with conn:
+                conn.executemany(UPSERT_EVENT_QUERY, [self._row(event) for event in events])
+            if self._after_write(conn):
+                return len(events)
+            for event in events:
+                event = dict(event)
+                if event["event_id"] not in self._order:
+                    self._order[event["event_id"]] = self._next_order
+                    self._next_order += 1
+                self._events[event["event_id"]] = event
+            if len(events) > REINDEX_BATCH_SIZE:
+                items = [self._index_item(event) for event in events]
+                for event, item in zip(events, items):
+                    if not item:
+                        self._index.remove(event["event_id"])
+                self._index.update(item for item in items if item)
+            else:
+                for event in events:
+                    item = self._index_item(event)
+                    if item:
+                        self._index.add(*item)
+                    else:
+                        self._index.remove(event["event_id"])
+        return len(events)
 
     def delete_event(self, event_id: str) -> bool:
-        data = self._load()
-        new_data = [e for e in data if e.get("event_id") != event_id]
-        if len(new_data) == len(data):
-            return False
-        self._save(new_data)
-        return True
+        return self.delete_events([event_id]) == 1
+
+    def delete_events(self, event_ids: Iterable[str]) -> int:
+        with self._lock:
+            conn = self._refresh()
+            event_ids = [event_id for event_id in dict.fromkeys(event_ids) if event_id in self._events]
+            if not event_ids:
+                return 0
+            with conn:
+                conn.executemany(DELETE_EVENT_QUERY, [(event_id,) for event_id in event_ids])
+            if not self._after_write(conn):
+                for event_id in event_ids:
+                    del self._events[event_id]
+                    del self._order[event_id]
+                    self._index.remove(event_id)
+        return len(event_ids)
 
+    # --- Reads (memory speed) ---
     def load_all_events(self) -> List[Dict]:
-        return self._load()
+        with self._lock:
+            self._refresh()
+            return [dict(event) for event in self._events.values()]
+
+    def get_event(self, event_id: str) -> Optional[Dict]:
+        with self._lock:
+            self._refresh()
+            event = self._events.get(event_id)
+            return dict(event) if event else None
 
     def get_events(self, start_datetime: datetime, end_datetime: datetime) -> List[Dict]:
-        """Returns events that overlap with the given datetime window."""
-        events = self._load()
-        filtered = []
+        """Returns events that overlap with the given datetime window, ordered by start."""
+        with self._lock:
+            self._refresh()
+            keys = self._index.overlapping(to_timestamp(start_datetime), to_timestamp(end_datetime))
+            return [dict(self._events[key]) for key in keys]
+
+    def get_events_on(self, day) -> List[Dict]:
+        """Returns events whose start..end dates include `day` (ends at midnight count), ordered by start."""
+        day_start = datetime.combine(day, datetime.min.time())
+        with self._lock:
+            self._refresh()
+            # Widen by a second so events ending exactly at midnight are candidates too
+            keys = self._index.overlapping(day_start.timestamp() - 1, (day_start + timedelta(days=1)).timestamp())
+            events = [self._events[key] for key in keys]
+        result = []
         for event in events:
-            try:
-                start = datetime.fromisoformat(event["start_time"])
-                end = datetime.fromisoformat(event["end_time"])
-                if start < end_datetime and end > start_datetime:
-                    filtered.append(event)
-            except Exception:
-                continue
-        return filtered
+            start = datetime.fromisoformat(event["start_time"])
+            end = datetime.fromisoformat(event["end_time"])
+            if start.date() <= day <= end.date():
+                result.append(dict(event))
+        return result
+
+    def sorted_events(self) -> List[Dict]:
+        """All indexed events ordered by start time (ties in storage order)."""
+        with self._lock:
+            self._refresh()
+            return [dict(self._events[key]) for key in self._index.keys()]
+
+    def conflict_groups(self) -> List[List[Dict]]:
+        """
+        Overlap groups in start order: each event with every later-starting event that
+        overlaps it, skipping groups contained in one already reported.
+        """
+        with self._lock:
+            self._refresh()
+            return [[dict(self._events[key]) for key in group] for group in self._index.overlap_groups()]
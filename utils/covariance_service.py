@@ -0,0 +1,250 @@
+# covariance_service.py
+
+import logging
+import threading
+from typing import Dict, Any, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger("CovarianceService")
+logger.setLevel(logging.INFO)
+
+DEFAULT_DECAY = 0.94          # RiskMetrics daily lambda
+MIN_OBSERVATIONS = 20         # bars before an asset gets a model weight
+INITIAL_CAPACITY = 32
+RIDGE = 1e-8                  # keeps the covariance invertible for nearly collinear assets
+SHRINKAGE = 0.1               # pull towards the diagonal; short EW windows give rank-deficient matrices
+RISK_PARITY_ITERATIONS = 50     # Newton steps
+RISK_PARITY_TOLERANCE = 1e-12
+
+class CovarianceService:
+    """
+    Exponentially weighted return mean/covariance for a trading universe.
+
+    Each bar updates the estimates in place in O(n^2) for the n assets that printed on
+    that bar (West's incremental EW update), so history is never re-scanned. Candles are
+    ingested by timestamp; bars already seen are skipped, so callers can hand over the
+    same rolling window every cycle and only new bars are folded in.
+    """
+
+    def __init__(self, decay: float = DEFAULT_DECAY, min_observations: int = MIN_OBSERVATIONS,
+                 max_weight: float = 1.0, shrinkage: float = SHRINKAGE):
+        if not 0 < decay < 1:
+            raise ValueError("decay must be in (0, 1)")
+        self.decay = decay
+        self.min_observations = min_observations
+        self.max_weight = max_weight
+        self.shrinkage = shrinkage
+
+        self.symbols: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.mean = np.zeros(INITIAL_CAPACITY)
+        self.cov = np.zeros((INITIAL_CAPACITY, INITIAL_CAPACITY))
+        self.last_close = np.zeros(INITIAL_CAPACITY)
+        self.observations = np.zeros(INITIAL_CAPACITY, dtype=np.int64)
+        self.last_timestamp: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+
+    # --- Registry ---
+    def _asset_id(self, symbol: str) -> int:
+        i = self.index.get(symbol)
+        if i is None:
+            i = len(self.symbols)
+            if i >= len(self.mean):
+                self._grow()
+            self.index[symbol] = i
+            self.symbols.append(symbol)
+        return i
+
+    def _grow(self):
+        capacity = len(self.mean) * 2
+        n = len(self.mean)
+        for name in ("mean", "last_close", "observations"):
+            array = getattr(self, name)
+            grown = np.zeros(capacity, dtype=array.dtype)
+            grown[:n] = array
+            setattr(self, name, grown)
+        cov = np.zeros((capacity, capacity))
+        cov[:n, :n] = self.cov
+        self.cov = cov
+
+    # --- Updates ---
+    def update(self, closes: Dict[str, float]):
+        """
+        Folds one bar of closing prices into the estimates. Assets missing from the bar
+        keep their estimates; their next return spans the gap.
+        """
+        with self._lock:
+            if not closes:
+                return
+            ids = np.fromiter((self._asset_id(symbol) for symbol in closes), dtype=np.int64, count=len(closes))
+            prices = np.fromiter(closes.values(), dtype=float, count=len(closes))
+            valid = (self.last_close[ids] > 0) & (prices > 0)
+            if valid.any():
+                v = ids[valid]
+                returns = prices[valid] / self.last_close[v] - 1.0
+                self._update_returns(v, returns)
+            self.last_close[ids] = np.where(prices > 0, prices, self.last_close[ids])
+
+    def _update_returns(self, ids: np.ndarray, returns: np.ndarray):
+        lam = self.decay
+        n = len(self.symbols)
+        first = self.observations[ids] == 0
+        # Seed the mean with the first return so early estimates are not pulled towards zero
+        self.mean[ids[first]] = returns[first]
+        deviation = returns - self.mean[ids]
+        self.mean[ids] += (1 - lam) * deviation
+        if len(ids) == n and n and (ids == np.arange(n)).all():
+            block = self.cov[:n, :n]
+            block *= lam
+            block += lam * (1 - lam) * np.outer(deviation, deviation)
+        else:
+            block = np.ix_(ids, ids)
+            self.cov[block] = lam * (self.cov[block] + (1 - lam) * np.outer(deviation, deviation))
+        self.observations[ids] += 1
+
+    def ingest(self, candles_by_symbol: Dict[str, Sequence[Dict[str, Any]]]):
+        """
+        Adds any bars newer than the last one seen per symbol, aligned across symbols by
+        timestamp. Candles without a timestamp contribute only their latest close.
+        """
+        with self._lock:
+            bars: Dict[Any, Dict[str, float]] = {}
+            untimed: Dict[str, float] = {}
+            for symbol, candles in candles_by_symbol.items():
+                if not candles:
+                    continue
+                last_seen = self.last_timestamp.get(symbol)
+                if candles[-1].get("timestamp") is None:
+                    untimed[symbol] = float(candles[-1]["close"])
+                    continue
+                for candle in reversed(candles):
+                    timestamp = candle.get("timestamp")
+                    if last_seen is not None and timestamp <= last_seen:
+                        break
+                    bars.setdefault(timestamp, {})[symbol] = float(candle["close"])
+                self.last_timestamp[symbol] = candles[-1]["timestamp"]
+
+            for timestamp in sorted(bars):
+                self.update(bars[timestamp])
+            if untimed:
+                self.update(untimed)
+
+    # --- Estimates ---
+    def ready_symbols(self, symbols: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        Symbols (in the given order) with enough observations to be modelled.
+        """
+        symbols = self.symbols if symbols is None else symbols
+        return [s for s in symbols if s in self.index and self.observations[self.index[s]] >= self.min_observations]
+
+    def _ids(self, symbols: Optional[Sequence[str]]) -> np.ndarray:
+        symbols = self.symbols if symbols is None else symbols
+        return np.array([self.index[s] for s in symbols], dtype=np.int64)
+
+    def covariance(self, symbols: Optional[Sequence[str]] = None) -> np.ndarray:
+        with self._lock:
+            ids = self._ids(symbols)
+            return self.cov[np.ix_(ids, ids)].copy()
+
+    def correlation(self, symbols: Optional[Sequence[str]] = None) -> np.ndarray:
+        cov = self.covariance(symbols)
+        vol = np.sqrt(np.clip(np.diag(cov), 0.0, None))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = cov / np.outer(vol, vol)
+        corr = np.nan_to_num(corr)
+        np.fill_diagonal(corr, 1.0)
+        return corr
+
+    def expected_returns(self, symbols: Optional[Sequence[str]] = None) -> np.ndarray:
+        with self._lock:
+            return self.mean[self._ids(symbols)].copy()
+
+    # --- Target weights ---
+    def _model_covariance(self, symbols: Sequence[str]) -> np.ndarray:
+        cov = self.covariance(symbols)
+        diagonal = np.diag(np.diag(cov))
+        cov = (1 - self.shrinkage) * cov + self.shrinkage * diagonal
+        cov += np.eye(len(symbols)) * (RIDGE + RIDGE * np.trace(cov))
+        return cov
+
+    def mean_variance_weights(self, symbols: Optional[Sequence[str]] = None,
+                              expected_returns: Optional[Sequence[float]] = None,
+                              long_only: bool = True) -> Dict[str, float]:
+        """
+        Tangency-style weights w ∝ Σ⁻¹μ, normalised to sum to 1 (long-only clips shorts).
+        Falls back to risk parity when no asset has a positive risk-adjusted return.
+        """
+        symbols = self.ready_symbols(symbols)
+        if not symbols:
+            return {}
+        cov = self._model_covariance(symbols)
+        mu = self.expected_returns(symbols) if expected_returns is None else np.asarray(expected_returns, dtype=float)
+        raw = np.linalg.solve(cov, mu)
+        if long_only:
+            raw = np.clip(raw, 0.0, None)
+        if raw.sum() <= 0:
+            return self.risk_parity_weights(symbols)
+        return self._finalize(symbols, raw / raw.sum())
+
+    def risk_parity_weights(self, symbols: Optional[Sequence[str]] = None) -> Dict[str, float]:
+        """
+        Equal-risk-contribution weights (long-only). Minimises the convex objective
+        x'Σx/2 - Σ b·log(x) with damped Newton steps; at the optimum x_i(Σx)_i = b for
+        every asset, and the log barrier keeps every weight positive.
+        """
+        symbols = self.ready_symbols(symbols)
+        if not symbols:
+            return {}
+        cov = self._model_covariance(symbols)
+        n = len(symbols)
+        budget = 1.0 / n
+        weights = 1.0 / np.sqrt(np.diag(cov))
+        weights /= np.sqrt(weights @ cov @ weights)
+
+        def objective(x):
+            return 0.5 * x @ cov @ x - budget * np.log(x).sum()
+
+        value = objective(weights)
+        for _ in range(RISK_PARITY_ITERATIONS):
+            gradient = cov @ weights - budget / weights
+            hessian = cov + np.diag(budget / weights ** 2)
+            step = np.linalg.solve(hessian, -gradient)
+            decrement = -gradient @ step
+            if decrement / 2 <= RISK_PARITY_TOLERANCE:
+                break
+            # Largest step that stays strictly positive, then backtrack on the objective
+            shrinking = step < 0
+            t = min(1.0, 0.99 * float(np.min(-weights[shrinking] / step[shrinking]))) if shrinking.any() else 1.0
+            while t > 1e-12:
+                candidate = weights + t * step
+                candidate_value = objective(candidate)
+                if candidate_value <= value - 0.25 * t * decrement:
+                    weights, value = candidate, candidate_value
+                    break
+                t *= 0.5
+            else:
+                break
+        return self._finalize(symbols, weights / weights.sum())
+
+    def _finalize(self, symbols: Sequence[str], weights: np.ndarray) -> Dict[str, float]:
+        # Cap single-name weight and hand the excess to the uncapped names
+        if self.max_weight < 1.0 and len(symbols) * self.max_weight >= 1.0:
+            for _ in range(len(symbols)):
+                over = weights > self.max_weight
+                if not over.any():
+                    break
+                excess = (weights[over] - self.max_weight).sum()
+                weights[over] = self.max_weight
+                under = ~over & (weights > 0)
+                if not under.any():
+                    break
+                weights[under] += excess * weights[under] / weights[under].sum()
+        return {symbol: float(weight) for symbol, weight in zip(symbols, weights)}
+
+    def target_weights(self, method: str = "risk_parity", symbols: Optional[Sequence[str]] = None) -> Dict[str, float]:
+        if method == "mean_variance":
+            return self.mean_variance_weights(symbols)
+        if method == "risk_parity":
+            return self.risk_parity_weights(symbols)
+        raise ValueError(f"Unknown weighting method: {method}")
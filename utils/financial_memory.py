@@ -1,61 +1,209 @@
 # financial_memory.py
 
+import copy
 import json
 import os
-from typing import Dict, List, Any
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Any, Optional, Tuple
+
+DEFAULT_CATEGORIES = ("accounts", "bills", "income_sources", "goals")
+# Paths with these extensions get the SQLite backend (utils.financial_memory_sqlite)
+SQLITE_EXTENSIONS = (".db", ".sqlite", ".sqlite3")
+
+def default_filepath() -> str:
+    return os.getenv("FINANCIAL_MEMORY_PATH") or os.path.join(os.getcwd(), "data", "financial_memory.json")
+
+def _date_key(value: Any) -> Any:
+    """Dates compare as their ISO text, which is how the records store them."""
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
 
 class FinancialMemory:
+    """
+    Financial records (accounts, bills, income, goals, ...) in one JSON file.
+
+    The parsed file is cached and re-read only when the file changes (inode, mtime or
+    size), so reads are memory lookups; callers always get deep copies. Saves write a
+    temp file next to the target and os.replace() it, so readers in other threads or
+    processes never see a partial file. Mutations hold an RLock, and `batch()` groups
+    several of them into one save. Use get_financial_memory() to share one instance per
+    file across agents.
+    """
+
     def __init__(self, filepath: str = None):
         if not filepath:
-            default_dir = os.path.join(os.getcwd(), "data")
-            os.makedirs(default_dir, exist_ok=True)
-            filepath = os.path.join(default_dir, "financial_memory.json")
-        else:
-            os.makedirs(os.path.dirname(filepath), exist_ok=True)
+            filepath = default_filepath()
+        os.makedirs(os.path.dirname(filepath) or ".", exist_ok=True)
 
         self.filepath = filepath
+        self._lock = threading.RLock()
+        self._data: Optional[Dict[str, List[Dict[str, Any]]]] = None
+        self._stamp: Optional[Tuple[int, int, int]] = None
+        self._batch_depth = 0
+        self._dirty = False
+
+        with self._lock:
+            if not os.path.exists(self.filepath):
+                self._write({category: [] for category in DEFAULT_CATEGORIES})
 
-        if not os.path.exists(self.filepath):
-            with open(self.filepath, 'w') as f:
-                json.dump({
-                    "accounts": [],
-                    "bills": [],
-                    "income_sources": [],
-                    "goals": []
-                }, f)
+    # --- File access ---
+    def _file_stamp(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat = os.stat(self.filepath)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
 
     def _load(self) -> Dict[str, List[Dict[str, Any]]]:
-        with open(self.filepath, "r") as f:
-            return json.load(f)
+        """
+        The cached data (not a copy), reloaded if the file changed. Inside a batch the
+        pending in-memory state wins.
+        """
+        with self._lock:
+            if self._batch_depth and self._data is not None:
+                return self._data
+            stamp = self._file_stamp()
+            if self._data is None or stamp != self._stamp:
+                with open(self.filepath, "r") as f:
+                    self._data = json.load(f)
+                self._stamp = stamp
+            return self._data
+
+    def _write(self, data: Dict[str, List[Dict[str, Any]]]):
+        directory = os.path.dirname(os.path.abspath(self.filepath))
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".financial_memory-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.filepath)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            self._data, self._stamp = None, None     # reload from disk on next read
+            raise
+        self._data = data
+        self._stamp = self._file_stamp()
+
+    def _commit(self):
+        if self._batch_depth:
+            self._dirty = True
+        else:
+            self._write(self._data)
 
     def _save(self, data: Dict[str, List[Dict[str, Any]]]):
-        with open(self.filepath, "w") as f:
-            json.dump(data, f, indent=2)
+        """Replaces the whole file with `data`."""
+        with self._lock:
+            self._data = copy.deepcopy(data)
+            self._commit()
+
+    @contextmanager
+    def batch(self):
+        """
+        Groups mutations into one save at the end of the outermost batch; if the block
+        raises, nothing is saved and the cache is reloaded from disk.
+        """
+        with self._lock:
+            self._load()
+            self._batch_depth += 1
+            try:
+                yield self
+            except BaseException:
+                if self._batch_depth == 1:
+                    self._dirty = False
+                    self._data, self._stamp = None, None
+                raise
+            finally:
+                self._batch_depth -= 1
+            if self._batch_depth == 0 and self._dirty:
+                self._dirty = False
+                self._write(self._data)
 
+    # --- Records ---
     def add_record(self, category: str, record: Dict[str, Any]):
-        data = self._load()
-        if category not in data:
-            raise ValueError(f"Unknown category: {category}")
-        data[category].append(record)
-        self._save(data)
+        with self._lock:
+            data = self._load()
+            if category not in data:
+                raise ValueError(f"Unknown category: {category}")
+            data[category].append(copy.deepcopy(record))
+            self._commit()
 
     def update_record(self, category: str, index: int, updated_record: Dict[str, Any]):
-        data = self._load()
-        if category not in data or index >= len(data[category]):
-            raise IndexError("Record not found.")
-        data[category][index] = updated_record
-        self._save(data)
+        with self._lock:
+            data = self._load()
+            if category not in data or index >= len(data[category]):
+                raise IndexError("Record not found.")
+            data[category][index] = copy.deepcopy(updated_record)
+            self._commit()
 
     def delete_record(self, category: str, index: int):
-        data = self._load()
-        if category not in data or index >= len(data[category]):
-            raise IndexError("Record not found.")
-        data[category].pop(index)
-        self._save(data)
+        with self._lock:
+            data = self._load()
+            if category not in data or index >= len(data[category]):
+                raise IndexError("Record not found.")
+            data[category].pop(index)
+            self._commit()
+
+    def replace_category(self, category: str, records: Iterable[Dict[str, Any]]):
+        """Replaces every record of one category, leaving the others untouched."""
+        with self._lock:
+            data = self._load()
+            data[category] = copy.deepcopy(list(records))
+            self._commit()
 
     def list_records(self, category: str) -> List[Dict[str, Any]]:
-        data = self._load()
-        return data.get(category, [])
+        with self._lock:
+            return copy.deepcopy(self._load().get(category, []))
 
     def get_all_data(self) -> Dict[str, List[Dict[str, Any]]]:
-        return self._load()
+        with self._lock:
+            return copy.deepcopy(self._load())
+
+    def list_records_between(self, category: str, field: str, start: Any, end: Any) -> List[Dict[str, Any]]:
+        """
+        Records with start <= field <= end (dates as date/datetime or YYYY-MM-DD), ordered
+        by field. A scan here; the SQLite backend answers it from an index.
+        """
+        start, end = _date_key(start), _date_key(end)
+        with self._lock:
+            matches = [record for record in self._load().get(category, [])
+                       if record.get(field) is not None and start <= _date_key(record[field]) <= end]
+            return copy.deepcopy(sorted(matches, key=lambda record: _date_key(record[field])))
+
+    def bills_due_between(self, start: Any, end: Any) -> List[Dict[str, Any]]:
+        return self.list_records_between("bills", "due_date", start, end)
+
+_instances: Dict[str, Any] = {}
+_instances_lock = threading.Lock()
+
+def get_financial_memory(filepath: str = None):
+    """
+    The process-wide financial memory for `filepath` (default $FINANCIAL_MEMORY_PATH or
+    data/financial_memory.json), so every agent shares one cache and one write lock per
+    file. .db/.sqlite paths get a SQLiteFinancialMemory; a new database is seeded from
+    the JSON file of the same name when one exists.
+    """
+    path = os.path.abspath(filepath or default_filepath())
+    with _instances_lock:
+        memory = _instances.get(path)
+        if memory is None:
+            memory = _instances[path] = _open_backend(path)
+        return memory
+
+def _open_backend(path: str):
+    base, extension = os.path.splitext(path)
+    if extension.lower() not in SQLITE_EXTENSIONS:
+        return FinancialMemory(path)
+    from utils.financial_memory_sqlite import SQLiteFinancialMemory
+    is_new = not os.path.exists(path)
+    memory = SQLiteFinancialMemory(path)
+    if is_new and os.path.exists(base + ".json"):
+        memory.import_json(base + ".json")
+    return memory
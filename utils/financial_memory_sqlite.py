@@ -0,0 +1,196 @@
+# financial_memory_sqlite.py
+
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional
+
+from core.db_pool import get_connection
+from utils.financial_memory import _date_key
+
+# category -> (table, typed columns, indexed columns). Typed columns are copies of the
+# record's fields for filtering; the full record (extra fields included) is kept as JSON.
+CATEGORY_SCHEMAS = {
+    "accounts": ("fm_accounts", {"name": "TEXT", "type": "TEXT", "balance": "REAL",
+                                 "buffer_required": "REAL", "last_updated": "TEXT"},
+                 ("name",)),
+    "bills": ("fm_bills", {"name": "TEXT", "account": "TEXT", "amount": "REAL",
+                           "frequency": "TEXT", "due_date": "TEXT"},
+              ("name", "account", "due_date")),
+    "income_sources": ("fm_income_sources", {"name": "TEXT", "source_account": "TEXT", "amount": "REAL",
+                                             "frequency": "TEXT", "next_expected_date": "TEXT"},
+                       ("name", "source_account", "next_expected_date")),
+    "goals": ("fm_goals", {"name": "TEXT", "target_amount": "REAL", "current_amount": "REAL",
+                           "deadline": "TEXT", "priority": "TEXT"},
+              ("name", "deadline")),
+    "401k_funds": ("fm_401k_funds", {"name": "TEXT", "risk_level": "TEXT", "performance_score": "REAL",
+                                     "max_allowed_allocation": "REAL"},
+                   ("name",)),
+}
+
+class SQLiteFinancialMemory:
+    """
+    FinancialMemory with one SQLite table per category (WAL, pooled connections).
+
+    Each row holds the record as JSON plus typed, indexed copies of its key fields
+    (name, account, dates, amounts), so lookups and date-range queries such as
+    "bills due between X and Y" scale with the result, and a mutation touches one row
+    instead of rewriting every category. Records keep insertion order (rowid), so the
+    index-based list/update/delete API matches the JSON FinancialMemory.
+    """
+
+    def __init__(self, filepath: str):
+        if os.path.dirname(filepath):
+            os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        self.filepath = filepath
+        self._local = threading.local()
+        self._ensure_tables()
+
+    def _ensure_tables(self):
+        conn = get_connection(self.filepath)
+        with conn:
+            for table, columns, indexes in CATEGORY_SCHEMAS.values():
+                column_sql = ", ".join(f"{column} {kind}" for column, kind in columns.items())
+                conn.execute(f"CREATE TABLE IF NOT EXISTS {table} (id INTEGER PRIMARY KEY, {column_sql}, data TEXT NOT NULL)")
+                for column in indexes:
+                    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{column} ON {table} ({column})")
+
+    # --- Helpers ---
+    @staticmethod
+    def _schema(category: str):
+        schema = CATEGORY_SCHEMAS.get(category)
+        if schema is None:
+            raise ValueError(f"Unknown category: {category}")
+        return schema
+
+    @staticmethod
+    def _row(columns: Dict[str, str], record: Dict[str, Any]) -> List[Any]:
+        values = []
+        for column, kind in columns.items():
+            value = _date_key(record.get(column))
+            if kind == "REAL" and value is not None:
+                try:
+                    value = float(value)
+                except (TypeError, ValueError):
+                    value = None
+            values.append(value)
+        values.append(json.dumps(record, default=_date_key))
+        return values
+
+    @contextmanager
+    def _transaction(self):
+        conn = get_connection(self.filepath)
+        if getattr(self._local, "depth", 0):
+            yield conn
+        else:
+            with conn:
+                yield conn
+
+    @contextmanager
+    def batch(self):
+        """Runs several mutations in one transaction (rolled back if the block raises)."""
+        conn = get_connection(self.filepath)
+        depth = getattr(self._local, "depth", 0)
+        self._local.depth = depth + 1
+        try:
+            if depth:
+                yield self
+            else:
+                with conn:
+                    yield self
+        finally:
+            self._local.depth = depth
+
+    def _row_id(self, conn, table: str, index: int) -> Optional[int]:
+        if index < 0:
+            return None
+        row = conn.execute(f"SELECT id FROM {table} ORDER BY id LIMIT 1 OFFSET ?", (index,)).fetchone()
+        return row[0] if row else None
+
+    # --- FinancialMemory API ---
+    def add_record(self, category: str, record: Dict[str, Any]):
+        table, columns, _ = self._schema(category)
+        placeholders = ", ".join("?" * (len(columns) + 1))
+        with self._transaction() as conn:
+            conn.execute(f"INSERT INTO {table} ({', '.join(columns)}, data) VALUES ({placeholders})",
+                         self._row(columns, record))
+
+    def update_record(self, category: str, index: int, updated_record: Dict[str, Any]):
+        if category not in CATEGORY_SCHEMAS:
+            raise IndexError("Record not found.")
+        table, columns, _ = CATEGORY_SCHEMAS[category]
+        assignments = ", ".join(f"{column} = ?" for column in columns)
+        with self._transaction() as conn:
+            row_id = self._row_id(conn, table, index)
+            if row_id is None:
+                raise IndexError("Record not found.")
+            conn.execute(f"UPDATE {table} SET {assignments}, data = ? WHERE id = ?",
+                         self._row(columns, updated_record) + [row_id])
+
+    def delete_record(self, category: str, index: int):
+        if category not in CATEGORY_SCHEMAS:
+            raise IndexError("Record not found.")
+        table = CATEGORY_SCHEMAS[category][0]
+        with self._transaction() as conn:
+            row_id = self._row_id(conn, table, index)
+            if row_id is None:
+                raise IndexError("Record not found.")
+            conn.execute(f"DELETE FROM {table} WHERE id = ?", (row_id,))
+
+    def replace_category(self, category: str, records: Iterable[Dict[str, Any]]):
+        """Replaces every record of one category, leaving the others untouched."""
+        table, columns, _ = self._schema(category)
+        placeholders = ", ".join("?" * (len(columns) + 1))
+        with self._transaction() as conn:
+            conn.execute(f"DELETE FROM {table}")
+            conn.executemany(f"INSERT INTO {table} ({', '.join(columns)}, data) VALUES ({placeholders})",
+                             [self._row(columns, record) for record in records])
+
+    def list_records(self, category: str) -> List[Dict[str, Any]]:
+        if category not in CATEGORY_SCHEMAS:
+            return []
+        table = CATEGORY_SCHEMAS[category][0]
+        conn = get_connection(self.filepath)
+        return [json.loads(data) for (data,) in conn.execute(f"SELECT data FROM {table} ORDER BY id")]
+
+    def get_all_data(self) -> Dict[str, List[Dict[str, Any]]]:
+        return {category: self.list_records(category) for category in CATEGORY_SCHEMAS}
+
+    # --- Indexed queries ---
+    def find_records(self, category: str, **equals: Any) -> List[Dict[str, Any]]:
+        """Records whose typed columns equal the given values, e.g. find_records("bills", account="chk")."""
+        table, columns, _ = self._schema(category)
+        unknown = set(equals) - set(columns)
+        if unknown:
+            raise ValueError(f"Cannot filter {category} by: {', '.join(sorted(unknown))}")
+        where = " AND ".join(f"{column} = ?" for column in equals) or "1"
+        conn = get_connection(self.filepath)
+        query = f"SELECT data FROM {table} WHERE {where} ORDER BY id"
+        return [json.loads(data) for (data,) in conn.execute(query, [_date_key(v) for v in equals.values()])]
+
+    def list_records_between(self, category: str, field: str, start: Any, end: Any) -> List[Dict[str, Any]]:
+        """Records with start <= field <= end (dates as date/datetime or YYYY-MM-DD), ordered by field."""
+        table, columns, _ = self._schema(category)
+        if field not in columns:
+            raise ValueError(f"Cannot range-query {category} by: {field}")
+        conn = get_connection(self.filepath)
+        query = f"SELECT data FROM {table} WHERE {field} BETWEEN ? AND ? ORDER BY {field}, id"
+        return [json.loads(data) for (data,) in conn.execute(query, (_date_key(start), _date_key(end)))]
+
+    def bills_due_between(self, start: Any, end: Any) -> List[Dict[str, Any]]:
+        return self.list_records_between("bills", "due_date", start, end)
+
+    # --- Migration ---
+    def import_json(self, json_path: str) -> int:
+        """Copies a JSON FinancialMemory file's known categories in. Returns the record count."""
+        with open(json_path, "r") as f:
+            data = json.load(f)
+        count = 0
+        with self.batch():
+            for category, records in data.items():
+                if category in CATEGORY_SCHEMAS:
+                    self.replace_category(category, records)
+                    count += len(records)
+        print(f"[SQLiteFinancialMemory] Imported {count} records from {json_path}.")
+        return count
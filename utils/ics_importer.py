@@ -0,0 +1,427 @@
+# ics_importer.py
+
+import re
+import hashlib
+import logging
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from dateutil.relativedelta import relativedelta
+from dateutil.rrule import rruleset, rrulestr
+
+logger = logging.getLogger("ICSImporter")
+logger.setLevel(logging.INFO)
+
+IMPORT_CHUNK_SIZE = 1000             # events per store transaction
+DEFAULT_HORIZON_DAYS = 365           # recurrence expansion bound when none is given
+DEFAULT_LOOKBACK_DAYS = 7            # CalendarSyncAgent imports expand series from this far back
+# Rule periods that are a fixed duration (wall-clock for zoned DTSTARTs)
+FIXED_PERIODS = {
+    "SECONDLY": timedelta(seconds=1), "MINUTELY": timedelta(minutes=1),
+    "HOURLY": timedelta(hours=1), "DAILY": timedelta(days=1), "WEEKLY": timedelta(weeks=1),
+}
+ICS_PRIORITY = {1: "high", 2: "high", 3: "high", 4: "high", 5: "medium",
+                6: "low", 7: "low", 8: "low", 9: "low"}
+
+DURATION_PATTERN = re.compile(
+    r"^(?P<sign>[+-])?P(?:(?P<weeks>\d+)W)?(?:(?P<days>\d+)D)?"
+    r"(?:T(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?(?:(?P<seconds>\d+)S)?)?$"
+)
+TEXT_ESCAPE = re.compile(r"\\([\\;,nN])")
+
+Component = Dict[str, List[Tuple[Dict[str, str], str]]]
+
+# --- Streaming parse ---
+
+def unfold_lines(stream: Iterable[str]) -> Iterator[str]:
+    """
+    Joins RFC 5545 folded lines (continuations start with a space or tab) one line at a time.
+    """
+    pending = None
+    for raw in stream:
+        line = raw.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and pending is not None:
+            pending += line[1:]
+            continue
+        if pending:
+            yield pending
+        pending = line
+    if pending:
+        yield pending
+
+def _split_unquoted(text: str, separator: str) -> List[str]:
+    parts, current, quoted = [], [], False
+    for ch in text:
+        if ch == '"':
+            quoted = not quoted
+        if ch == separator and not quoted:
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(ch)
+    parts.append("".join(current))
+    return parts
+
+def parse_content_line(line: str) -> Optional[Tuple[str, Dict[str, str], str]]:
+    """
+    NAME;PARAM=VALUE;...:value -> (NAME, {PARAM: VALUE}, value); None for malformed lines.
+    """
+    quoted = False
+    for position, ch in enumerate(line):
+        if ch == '"':
+            quoted = not quoted
+        elif ch == ':' and not quoted:
+            break
+    else:
+        return None
+    head, value = line[:position], line[position + 1:]
+    name, *raw_params = _split_unquoted(head, ';')
+    params = {}
+    for raw in raw_params:
+        key, _, param_value = raw.partition('=')
+        params[key.upper()] = param_value.strip('"')
+    return name.upper(), params, value
+
+def iter_vevents(lines: Iterable[str]) -> Iterator[Component]:
+    """
+    Yields each VEVENT as {PROPERTY: [(params, value), ...]}, one at a time. Nested
+    components (VALARM) are skipped.
+    """
+    event: Optional[Component] = None
+    nested = 0
+    for line in unfold_lines(lines):
+        parsed = parse_content_line(line)
+        if parsed is None:
+            continue
+        name, params, value = parsed
+        if name == "BEGIN":
+            if value.upper() == "VEVENT" and event is None:
+                event = {}
+            elif event is not None:
+                nested += 1
+            continue
+        if name == "END" and event is not None:
+            if nested:
+                nested -= 1
+            elif value.upper() == "VEVENT":
+                yield event
+                event = None
+            continue
+        if event is not None and not nested:
+            event.setdefault(name, []).append((params, value))
+
+# --- Values ---
+
+@lru_cache(maxsize=64)
+def _zone(tzid: str):
+    try:
+        return ZoneInfo(tzid)
+    except Exception:
+        return None     # non-IANA TZIDs (e.g. Windows names) are read as floating local time
+
+def parse_ics_datetime(value: str, params: Dict[str, str]) -> Tuple[datetime, bool]:
+    """
+    (datetime, is_all_day). UTC ('Z') and IANA TZID values are timezone-aware; floating
+    and unknown-zone values are naive; DATE values are naive midnights.
+    """
+    value = value.strip()
+    if params.get("VALUE") == "DATE" or len(value) == 8:
+        return datetime.strptime(value, "%Y%m%d"), True
+    moment = datetime.strptime(value.rstrip("Z"), "%Y%m%dT%H%M%S")
+    if value.endswith("Z"):
+        return moment.replace(tzinfo=timezone.utc), False
+    tz = _zone(params["TZID"]) if params.get("TZID") else None
+    return (moment.replace(tzinfo=tz) if tz else moment), False
+
+def parse_duration(value: str) -> timedelta:
+    match = DURATION_PATTERN.match(value.strip())
+    if not match:
+        raise ValueError(f"Invalid duration: {value}")
+    parts = {key: int(number or 0) for key, number in match.groupdict().items() if key != "sign"}
+    duration = timedelta(weeks=parts["weeks"], days=parts["days"], hours=parts["hours"],
+                         minutes=parts["minutes"], seconds=parts["seconds"])
+    return -duration if match.group("sign") == "-" else duration
+
+def unescape_text(value: str) -> str:
+    return TEXT_ESCAPE.sub(lambda m: "\n" if m.group(1) in "nN" else m.group(1), value)
+
+def _align(moment: datetime, reference: datetime) -> datetime:
+    """
+    Gives `moment` the same awareness as `reference` so the two compare.
+    """
+    if reference.tzinfo and not moment.tzinfo:
+        return moment.astimezone()
+    if not reference.tzinfo and moment.tzinfo:
+        return moment.astimezone().replace(tzinfo=None)
+    return moment
+
+def _first(component: Component, name: str) -> Tuple[Dict[str, str], Optional[str]]:
+    values = component.get(name)
+    return values[0] if values else ({}, None)
+
+class ICSImporter:
+    """
+    Streams an .ics export into a CalendarSyncAgent in bulk.
+
+    One-off events are normalized as they are parsed and written in chunks of
+    `chunk_size` (one store transaction each). Recurring series are kept only as their
+    definitions (master + RECURRENCE-ID overrides) until the file ends, then expanded
+    lazily with dateutil within [recurrence_start, horizon_end], so memory grows with the
+    number of series, never with their occurrences. One-off events are kept within
+    [horizon_start, horizon_end]; recurrence_start defaults to horizon_start. Events are
+    keyed by UID (occurrences by UID and start), so re-imports upsert; duplicate UIDs
+    keep the highest SEQUENCE.
+    """
+
+    def __init__(self, sync_agent, horizon_start: datetime = None, horizon_end: datetime = None,
+                 chunk_size: int = IMPORT_CHUNK_SIZE, default_priority: str = "medium",
+                 recurrence_start: datetime = None):
+        self.sync_agent = sync_agent
+        self.horizon_start = horizon_start
+        self.recurrence_start = recurrence_start if recurrence_start is not None else horizon_start
+        self.horizon_end = horizon_end or datetime.now() + timedelta(days=DEFAULT_HORIZON_DAYS)
+        self.chunk_size = chunk_size
+        self.default_priority = default_priority
+
+    def import_file(self, path: str, source: str = None) -> Dict[str, int]:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            return self.import_lines(f, source or f"ics:{path}")
+
+    def import_lines(self, lines: Iterable[str], source: str = "ics") -> Dict[str, int]:
+        stats = {"events": 0, "occurrences": 0, "duplicates": 0, "cancelled": 0, "skipped": 0, "errors": 0}
+        sequences: Dict[Any, int] = {}      # dedupe key -> highest SEQUENCE seen
+        masters: Dict[str, Component] = {}
+        overrides: Dict[str, Dict[datetime, Component]] = {}
+        cancelled = set()                   # event ids to remove from the store
+        batch: List[Dict[str, Any]] = []
+
+        def flush():
+            if batch:
+                self.sync_agent.add_events(batch)
+                batch.clear()
+
+        def emit(event):
+            cancelled.discard(event["event_id"])    # a later revision un-cancels
+            batch.append(event)
+            if len(batch) >= self.chunk_size:
+                flush()
+
+        for component in iter_vevents(lines):
+            try:
+                uid = self._uid(component)
+                sequence = int(_first(component, "SEQUENCE")[1] or 0)
+                recurrence_params, recurrence_id = _first(component, "RECURRENCE-ID")
+                if recurrence_id:
+                    occurrence = parse_ics_datetime(recurrence_id, recurrence_params)[0]
+                    key = (uid, occurrence)
+                elif "RRULE" in component or "RDATE" in component:
+                    key = (uid, None)
+                else:
+                    key = uid
+                if key in sequences and sequences[key] >= sequence:
+                    stats["duplicates"] += 1
+                    continue
+                sequences[key] = sequence
+
+                if recurrence_id:
+                    overrides.setdefault(uid, {})[occurrence] = component
+                elif key != uid:
+                    masters[uid] = component
+                else:
+                    if self._is_cancelled(component):
+                        stats["cancelled"] += 1
+                        cancelled.add(uid)
+                        continue
+                    event = self._event(component, uid, source)
+                    if event is None or not self._in_horizon(event):
+                        stats["skipped"] += 1
+                        continue
+                    emit(event)
+                    stats["events"] += 1
+            except Exception as e:
+                stats["errors"] += 1
+                logger.warning("Skipping unreadable VEVENT: %s", e)
+
+        for uid, master in masters.items():
+            try:
+                for event in self._expand(master, uid, overrides.pop(uid, {}), source, stats, cancelled):
+                    emit(event)
+                    stats["occurrences"] += 1
+            except Exception as e:
+                stats["errors"] += 1
+                logger.warning("Skipping recurring series %s: %s", uid, e)
+
+        # Overrides whose series never appeared are ordinary events
+        for uid, instances in overrides.items():
+            for occurrence, component in instances.items():
+                event_id = f"{uid}::{occurrence.isoformat()}"
+                if self._is_cancelled(component):
+                    stats["cancelled"] += 1
+                    cancelled.add(event_id)
+                    continue
+                event = self._event(component, event_id, source)
+                if event and self._in_horizon(event):
+                    emit(event)
+                    stats["occurrences"] += 1
+        flush()
+        if cancelled:
+            # Cancellations also retract what earlier imports (or this one) wrote
+            self.sync_agent.remove_events(list(cancelled))
+        logger.info("ICS import from %s: %s", source, stats)
+        return stats
+
+    # --- Components ---
+    @staticmethod
+    def _uid(component: Component) -> str:
+        uid = _first(component, "UID")[1]
+        if uid:
+            return uid.strip()
+        # No UID: derive a stable one so re-imports still dedupe
+        fingerprint = f"{_first(component, 'SUMMARY')[1]}|{_first(component, 'DTSTART')[1]}"
+        return "ics-" + hashlib.sha1(fingerprint.encode()).hexdigest()[:16]
+
+    @staticmethod
+    def _is_cancelled(component: Component) -> bool:
+        return (_first(component, "STATUS")[1] or "").strip().upper() == "CANCELLED"
+
+    @staticmethod
+    def _span(component: Component) -> Tuple[datetime, timedelta]:
+        start_params, start_value = _first(component, "DTSTART")
+        if not start_value:
+            raise ValueError("VEVENT without DTSTART")
+        start, all_day = parse_ics_datetime(start_value, start_params)
+        end_params, end_value = _first(component, "DTEND")
+        duration_value = _first(component, "DURATION")[1]
+        if end_value:
+            end = _align(parse_ics_datetime(end_value, end_params)[0], start)
+            return start, end - start
+        if duration_value:
+            return start, parse_duration(duration_value)
+        return start, timedelta(days=1) if all_day else timedelta(0)
+
+    def _event(self, component: Component, event_id: str, source: str,
+               span: Tuple[datetime, timedelta] = None) -> Optional[Dict]:
+        start, duration = span or self._span(component)
+        priority_value = _first(component, "PRIORITY")[1]
+        priority = ICS_PRIORITY.get(int(priority_value), self.default_priority) if priority_value else self.default_priority
+        event = {
+            "event_id": event_id,
+            "title": unescape_text(_first(component, "SUMMARY")[1] or "(untitled)"),
+            "start_time": start,
+            "end_time": start + duration,
+            "source": source,
+            "priority": priority,
+        }
+        location = _first(component, "LOCATION")[1]
+        notes = _first(component, "DESCRIPTION")[1]
+        if location:
+            event["location"] = unescape_text(location)
+        if notes:
+            event["notes"] = unescape_text(notes)
+        return event
+
+    def _in_horizon(self, event: Dict, recurring: bool = False) -> bool:
+        start, end = event["start_time"], event["end_time"]
+        if start > _align(self.horizon_end, start):
+            return False
+        lower = self.recurrence_start if recurring else self.horizon_start
+        return lower is None or end >= _align(lower, end)
+
+    # --- Recurrence ---
+    @staticmethod
+    def _fit_until(rule: str, dtstart: datetime) -> str:
+        """
+        dateutil needs UNTIL in UTC for aware DTSTARTs and floating for naive ones.
+        """
+        match = re.search(r"UNTIL=([0-9TZ]+)", rule, re.IGNORECASE)
+        if not match:
+            return rule
+        raw = match.group(1).upper()
+        until = parse_ics_datetime(raw, {})[0]
+        if len(raw) == 8:
+            until = until.replace(hour=23, minute=59, second=59)
+        if dtstart.tzinfo:
+            until = until.replace(tzinfo=dtstart.tzinfo) if not until.tzinfo else until
+            fitted = until.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        else:
+            fitted = _align(until, dtstart).strftime("%Y%m%dT%H%M%S")
+        return rule[:match.start(1)] + fitted + rule[match.end(1):]
+
+    @staticmethod
+    def _fast_forward(rule: str, dtstart: datetime, lower: Optional[datetime]) -> datetime:
+        """
+        A later DTSTART giving the same occurrences from `lower` on, so dateutil does not
+        walk years of history. Only whole rule periods are skipped, which keeps the rule's
+        grid and its DTSTART-derived defaults; COUNT/BYSETPOS rules and month-end or
+        leap-day anchors are expanded from the original DTSTART.
+        """
+        if lower is None or lower <= dtstart:
+            return dtstart
+        parts = dict(part.split("=", 1) for part in rule.upper().split(";") if "=" in part)
+        if "COUNT" in parts or "BYSETPOS" in parts:
+            return dtstart
+        interval = int(parts.get("INTERVAL", 1))
+        freq = parts.get("FREQ")
+        if freq in FIXED_PERIODS:
+            period = FIXED_PERIODS[freq] * interval
+            skip = int((lower - dtstart) / period) - 1
+            return dtstart + period * skip if skip > 0 else dtstart
+        if freq == "MONTHLY" and dtstart.day <= 28:
+            months = (lower.year - dtstart.year) * 12 + lower.month - dtstart.month
+            skip = (months // interval - 1) * interval
+            return dtstart + relativedelta(months=skip) if skip > 0 else dtstart
+        if freq == "YEARLY" and (dtstart.month, dtstart.day) != (2, 29):
+            skip = ((lower.year - dtstart.year) // interval - 1) * interval
+            return dtstart + relativedelta(years=skip) if skip > 0 else dtstart
+        return dtstart
+
+    def _occurrences(self, master: Component, dtstart: datetime, duration: timedelta) -> Iterator[datetime]:
+        # Occurrences starting up to one duration early still overlap the horizon
+        lower = _align(self.recurrence_start, dtstart) - duration if self.recurrence_start is not None else None
+        rules = rruleset()
+        rules.rdate(dtstart)
+        for _, value in master.get("RRULE", []):
+            value = self._fit_until(value, dtstart)
+            rules.rrule(rrulestr(value, dtstart=self._fast_forward(value, dtstart, lower)))
+        for name, add in (("RDATE", rules.rdate), ("EXDATE", rules.exdate)):
+            for params, value in master.get(name, []):
+                if params.get("VALUE") == "PERIOD":
+                    continue
+                for item in value.split(","):
+                    add(_align(parse_ics_datetime(item, params)[0], dtstart))
+
+        upper = _align(self.horizon_end, dtstart)
+        if lower is not None:
+            iterator = rules.xafter(lower, inc=True)
+        else:
+            iterator = iter(rules)
+        for occurrence in iterator:
+            if occurrence > upper:
+                break
+            yield occurrence
+
+    def _expand(self, master: Component, uid: str, overrides: Dict[datetime, Component],
+                source: str, stats: Dict[str, int], cancelled: set) -> Iterator[Dict]:
+        dtstart, duration = self._span(master)
+        cancelled_series = self._is_cancelled(master)
+        for occurrence in self._occurrences(master, dtstart, duration):
+            event_id = f"{uid}::{occurrence.isoformat()}"
+            override = overrides.pop(occurrence, None)
+            component = override or master
+            if cancelled_series or self._is_cancelled(component):
+                stats["cancelled"] += 1
+                cancelled.add(event_id)
+                continue
+            yield self._event(component, event_id, source, span=None if override else (occurrence, duration))
+        # Overrides moved off their original slot (or outside the rule) still apply
+        for occurrence, component in overrides.items():
+            event_id = f"{uid}::{occurrence.isoformat()}"
+            if cancelled_series or self._is_cancelled(component):
+                stats["cancelled"] += 1
+                cancelled.add(event_id)
+                continue
+            event = self._event(component, event_id, source)
+            if self._in_horizon(event, recurring=True):
+                yield event
@@ -0,0 +1,266 @@
+# instrumentation.py
+
+import io
+import os
+import time
+import pstats
+import random
+import bisect
+import cProfile
+import logging
+import threading
+import functools
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger("Instrumentation")
+logger.setLevel(logging.INFO)
+
+# Prometheus-style latency buckets (seconds)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Per-symbol series are useful but multiply cardinality; disable with SHIPMATE_METRICS_PER_SYMBOL=0
+PER_SYMBOL_METRICS = os.getenv("SHIPMATE_METRICS_PER_SYMBOL", "1").lower() not in ("0", "false", "no")
+# Fraction of agent cycles to run under cProfile (0 = off)
+PROFILE_SAMPLE_RATE = float(os.getenv("SHIPMATE_PROFILE_SAMPLE_RATE", 0))
+PROFILE_OUTPUT_DIR = os.getenv("SHIPMATE_PROFILE_DIR", os.path.join(os.getcwd(), "profiles"))
+PROFILE_TOP_N = 25
+PROFILE_HISTORY = 10
+
+class Histogram:
+    """
+    Fixed-bucket latency histogram (non-cumulative counts; cumulated on export).
+    """
+    __slots__ = ("counts", "sum", "count", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimates a quantile by linear interpolation inside the bucket that contains it.
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = LATENCY_BUCKETS[i - 1] if i > 0 else 0.0
+                upper = LATENCY_BUCKETS[i] if i < len(LATENCY_BUCKETS) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / bucket_count, self.max)
+            seen += bucket_count
+        return self.max
+
+class MetricsRegistry:
+    """
+    Process-wide store of stage latency histograms keyed by (agent, stage) and (agent, stage, symbol).
+    """
+
+    def __init__(self, per_symbol: bool = PER_SYMBOL_METRICS):
+        self.per_symbol = per_symbol
+        self.stages: Dict[Tuple[str, str], Histogram] = {}
+        self.symbol_stages: Dict[Tuple[str, str, str], Histogram] = {}
+        self.errors: Dict[Tuple[str, str], int] = {}
+        self.profiles: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def observe(self, agent: str, stage: str, seconds: float, symbol: Optional[str] = None, error: bool = False):
+        key = (agent, stage)
+        with self._lock:
+            histogram = self.stages.get(key)
+            if histogram is None:
+                histogram = self.stages[key] = Histogram()
+            histogram.observe(seconds)
+            if symbol is not None and self.per_symbol:
+                symbol_key = (agent, stage, symbol)
+                histogram = self.symbol_stages.get(symbol_key)
+                if histogram is None:
+                    histogram = self.symbol_stages[symbol_key] = Histogram()
+                histogram.observe(seconds)
+            if error:
+                self.errors[key] = self.errors.get(key, 0) + 1
+
+    def add_profile(self, profile: Dict[str, Any]):
+        with self._lock:
+            self.profiles.append(profile)
+            del self.profiles[:-PROFILE_HISTORY]
+
+    def reset(self):
+        with self._lock:
+            self.stages.clear()
+            self.symbol_stages.clear()
+            self.errors.clear()
+            self.profiles.clear()
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """
+        Per agent/stage latency summary in milliseconds (for the dashboard and JSON APIs).
+        """
+        with self._lock:
+            items = sorted(self.stages.items())
+            errors = dict(self.errors)
+        return [
+            {
+                "agent": agent,
+                "stage": stage,
+                "count": histogram.count,
+                "errors": errors.get((agent, stage), 0),
+                "mean_ms": round(histogram.sum / histogram.count * 1000, 3) if histogram.count else 0.0,
+                "p50_ms": round(histogram.quantile(0.50) * 1000, 3),
+                "p95_ms": round(histogram.quantile(0.95) * 1000, 3),
+                "p99_ms": round(histogram.quantile(0.99) * 1000, 3),
+                "max_ms": round(histogram.max * 1000, 3),
+            }
+            for (agent, stage), histogram in items
+        ]
+
+    def render_prometheus(self) -> str:
+        """
+        Prometheus text exposition format (version 0.0.4).
+        """
+        with self._lock:
+            stages = sorted(self.stages.items())
+            symbol_stages = sorted(self.symbol_stages.items())
+            errors = sorted(self.errors.items())
+
+        lines = []
+        self._render_histograms(lines, "shipmate_stage_latency_seconds",
+                                "Trading cycle stage latency per agent.", stages, ("agent", "stage"))
+        if symbol_stages:
+            self._render_histograms(lines, "shipmate_symbol_stage_latency_seconds",
+                                    "Trading cycle stage latency per agent and symbol.", symbol_stages,
+                                    ("agent", "stage", "symbol"))
+        lines.append("# HELP shipmate_stage_errors_total Stages that raised an exception.")
+        lines.append("# TYPE shipmate_stage_errors_total counter")
+        for (agent, stage), count in errors:
+            lines.append(f'shipmate_stage_errors_total{{{_labels(("agent", "stage"), (agent, stage))}}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def _render_histograms(self, lines, name, help_text, items, label_names):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for key, histogram in items:
+            labels = _labels(label_names, key)
+            cumulative = 0
+            for bound, bucket_count in zip(LATENCY_BUCKETS, histogram.counts):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            lines.append(f"{name}_sum{{{labels}}} {histogram.sum:.9f}")
+            lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+def _labels(names, values) -> str:
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in values)
+    return ",".join(f'{name}="{value}"' for name, value in zip(names, escaped))
+
+# Shared registry for every agent in the process
+metrics_registry = MetricsRegistry()
+
+class span:
+    """
+    Times a block and records it under (agent, stage[, symbol]).
+
+        with span("DayTraderAgent", "decide", symbol):
+            ...
+    """
+    __slots__ = ("agent", "stage", "symbol", "start")
+
+    def __init__(self, agent: str, stage: str, symbol: Optional[str] = None):
+        self.agent = agent
+        self.stage = stage
+        self.symbol = symbol
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        metrics_registry.observe(self.agent, self.stage, time.perf_counter() - self.start,
+                                 self.symbol, error=exc_type is not None)
+        return False
+
+def timed(agent: str, stage: str, symbol_arg: Optional[str] = None):
+    """
+    Decorator form of span(). `symbol_arg` names the keyword/first positional argument holding the symbol.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            symbol = None
+            if symbol_arg is not None:
+                symbol = kwargs.get(symbol_arg, args[1] if len(args) > 1 else None)
+            with span(agent, stage, symbol):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+class profile_cycle:
+    """
+    Runs a whole agent cycle under cProfile for a sampled fraction of cycles.
+
+    Opt in with SHIPMATE_PROFILE_SAMPLE_RATE (e.g. 0.01 = one cycle in a hundred). Sampled
+    cycles are dumped to SHIPMATE_PROFILE_DIR as .prof files (snakeviz/pstats compatible)
+    and the top functions are kept on the registry for the dashboard.
+    """
+    __slots__ = ("agent", "rate", "profiler", "start")
+
+    def __init__(self, agent: str, rate: Optional[float] = None):
+        self.agent = agent
+        self.rate = PROFILE_SAMPLE_RATE if rate is None else rate
+        self.profiler = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        if self.rate > 0 and random.random() < self.rate:
+            self.profiler = cProfile.Profile()
+            try:
+                self.profiler.enable()
+            except ValueError:
+                # Another profiler is already active on this thread
+                self.profiler = None
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        metrics_registry.observe(self.agent, "cycle", elapsed, error=exc_type is not None)
+        if self.profiler is not None:
+            self.profiler.disable()
+            try:
+                self._save(elapsed)
+            except Exception as e:
+                logger.error(f"Failed to save cycle profile for {self.agent}: {e}")
+        return False
+
+    def _save(self, elapsed: float):
+        os.makedirs(PROFILE_OUTPUT_DIR, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        path = os.path.join(PROFILE_OUTPUT_DIR, f"{self.agent}_{timestamp}.prof")
+        self.profiler.dump_stats(path)
+
+        summary = io.StringIO()
+        pstats.Stats(self.profiler, stream=summary).sort_stats("cumulative").print_stats(PROFILE_TOP_N)
+        metrics_registry.add_profile({
+            "agent": self.agent,
+            "timestamp": timestamp,
+            "elapsed_ms": round(elapsed * 1000, 3),
+            "path": path,
+            "top": summary.getvalue()
+        })
+        logger.info(f"Profiled {self.agent} cycle ({elapsed * 1000:.1f} ms) -> {path}")
+
+def render_prometheus() -> str:
+    return metrics_registry.render_prometheus()
+
+def latency_snapshot() -> List[Dict[str, Any]]:
+    return metrics_registry.snapshot()
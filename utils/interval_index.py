@@ -0,0 +1,145 @@
+# interval_index.py
+
+from bisect import bisect_left, insort
+from datetime import datetime
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+# Intervals longer than this are kept aside and checked directly, so window queries
+# only look back LONG_INTERVAL_SECONDS from the window start in the sorted keys.
+LONG_INTERVAL_SECONDS = 7 * 24 * 60 * 60
+
+def to_timestamp(value: Any) -> float:
+    """
+    Epoch seconds for a datetime or ISO-8601 string (naive values are local time).
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.timestamp()
+
+class IntervalIndex:
+    """
+    Sorted index of half-open intervals [start, end) keyed by an id.
+
+    Entries are kept ordered by (start, order), where `order` breaks ties between equal
+    starts (e.g. insertion order). Window queries bisect to the first candidate and scan
+    only intervals that can overlap: O(log n + k), plus the handful of very long intervals.
+    """
+
+    def __init__(self, long_threshold: float = LONG_INTERVAL_SECONDS):
+        self.long_threshold = long_threshold
+        self._entries: List[Tuple[float, int, Hashable]] = []
+        self._spans: Dict[Hashable, Tuple[float, float, int]] = {}
+        self._long = set()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._spans
+
+    def span(self, key: Hashable) -> Optional[Tuple[float, float]]:
+        span = self._spans.get(key)
+        return (span[0], span[1]) if span else None
+
+    # --- Maintenance ---
+    def rebuild(self, items: Iterable[Tuple[Hashable, float, float, int]]):
+        """
+        Replaces the contents with (key, start, end, order) items in one sort.
+        """
+        self._spans = {key: (start, end, order) for key, start, end, order in items}
+        self._entries = sorted((start, order, key) for key, (start, _, order) in self._spans.items())
+        self._long = {key for key, (start, end, _) in self._spans.items() if end - start > self.long_threshold}
+
+    def update(self, items: Iterable[Tuple[Hashable, float, float, int]]):
+        """
+        Adds or replaces many (key, start, end, order) items in one pass: the new items are
+        appended and sorted, which timsort merges as two runs in O(n + k log k).
+        """
+        items = list(items)
+        replaced = {key for key, *_ in items if key in self._spans}
+        if replaced:
+            self._entries = [entry for entry in self._entries if entry[2] not in replaced]
+        for key, start, end, order in items:
+            self._spans[key] = (start, end, order)
+            if end - start > self.long_threshold:
+                self._long.add(key)
+            else:
+                self._long.discard(key)
+        self._entries.extend((start, order, key) for key, start, _, order in items)
+        self._entries.sort()
+
+    def add(self, key: Hashable, start: float, end: float, order: int):
+        if key in self._spans:
+            self.remove(key)
+        self._spans[key] = (start, end, order)
+        insort(self._entries, (start, order, key))
+        if end - start > self.long_threshold:
+            self._long.add(key)
+
+    def remove(self, key: Hashable) -> bool:
+        span = self._spans.pop(key, None)
+        if span is None:
+            return False
+        start, _, order = span
+        position = bisect_left(self._entries, (start, order, key))
+        del self._entries[position]
+        self._long.discard(key)
+        return True
+
+    # --- Queries ---
+    def keys(self) -> List[Hashable]:
+        """
+        All keys in (start, order) order.
+        """
+        return [key for _, _, key in self._entries]
+
+    def overlapping(self, start: float, end: float) -> List[Hashable]:
+        """
+        Keys of intervals with interval.start < end and interval.end > start, in (start, order) order.
+        """
+        entries = self._entries
+        spans = self._spans
+        position = bisect_left(entries, (start - self.long_threshold,))
+        hits = []
+        while position < len(entries):
+            entry_start, order, key = entries[position]
+            if entry_start >= end:
+                break
+            if spans[key][1] > start and key not in self._long:
+                hits.append((entry_start, order, key))
+            position += 1
+        for key in self._long:
+            entry_start, entry_end, order = spans[key]
+            if entry_start < end and entry_end > start:
+                hits.append((entry_start, order, key))
+        if self._long:
+            hits.sort()
+        return [key for _, _, key in hits]
+
+    def overlap_groups(self) -> List[List[Hashable]]:
+        """
+        For each interval (in start order), the interval followed by every later-starting
+        interval overlapping it; groups of one are dropped, as are groups whose keys are a
+        subset of a group already emitted.
+
+        Single sweep: later-starting overlaps of interval i are a contiguous run of the
+        sorted keys (start < end_i). Every member also ends after start_i, so the group is
+        a subset of an earlier emitted group exactly when that group's run reaches as far,
+        which reduces the subset test to one running maximum.
+        """
+        entries = self._entries
+        spans = self._spans
+        starts = [entry[0] for entry in entries]
+        ends = [spans[key][1] for _, _, key in entries]
+        groups = []
+        reach = -1          # furthest run end of any emitted group
+        for i, (start, _, key) in enumerate(entries):
+            run_end = bisect_left(starts, ends[i], i + 1)
+            members = [j for j in range(i + 1, run_end) if ends[j] > start]
+            if not members or reach >= members[-1]:
+                continue
+            groups.append([key] + [entries[j][2] for j in members])
+            reach = max(reach, run_end - 1)
+        return groups
@@ -1,21 +1,31 @@
-
 # memory.py
 
 import json
 import os
+import threading
 from typing import List, Dict, Any
 
+from utils.trade_records import is_record, write_frame, iter_frames, history_dict
+
 class TradeMemory:
     """
     Simple JSON-based persistent memory for trade history per symbol.
+
+    Slotted trade records (utils.trade_records) skip the JSON rewrite: they are appended
+    as packed frames to a side log (`<name>.records`) and tailed into an in-process index.
+    Reads return plain dicts either way.
     """
 
     def __init__(self, filepath: str = "memory/trade_memory.json"):
         self.filepath = filepath
+        self.records_path = os.path.splitext(filepath)[0] + ".records"
         os.makedirs(os.path.dirname(filepath), exist_ok=True)
         if not os.path.isfile(self.filepath):
             with open(self.filepath, "w") as f:
                 json.dump({}, f)
+        self._records: Dict[str, List[Any]] = {}
+        self._records_offset = 0
+        self._lock = threading.Lock()
 
     def _load_memory(self) -> Dict[str, List[Dict[str, Any]]]:
         try:
@@ -28,7 +38,22 @@ class TradeMemory:
         with open(self.filepath, "w") as f:
             json.dump(memory, f, indent=2)
 
-    def record_trade(self, symbol: str, trade_data: Dict[str, Any]):
+    def _refresh_records(self):
+        # Pick up frames appended since the last read (by this or another process)
+        if not os.path.isfile(self.records_path):
+            return
+        with open(self.records_path, "rb") as f:
+            f.seek(self._records_offset)
+            for record, offset in iter_frames(f):
+                self._records.setdefault(record.symbol, []).append(record)
+                self._records_offset = offset
+
+    def record_trade(self, symbol: str, trade_data: Any):
+        if is_record(trade_data):
+            with self._lock:
+                with open(self.records_path, "ab") as f:
+                    write_frame(f, trade_data)
+            return
         memory = self._load_memory()
         if symbol not in memory:
             memory[symbol] = []
@@ -36,8 +61,15 @@ class TradeMemory:
         self._save_memory(memory)
 
     def get_trade_history(self, symbol: str) -> List[Dict[str, Any]]:
+        """
+        JSON entries followed by packed records, all as dicts (records converted with
+        history_dict(), so executed trades keep their "order" and "result" entries).
+        """
         memory = self._load_memory()
-        return memory.get(symbol, [])
+        with self._lock:
+            self._refresh_records()
+            records = list(self._records.get(symbol, ()))
+        return memory.get(symbol, []) + [history_dict(record) for record in records]
 
     def get_last_trade(self, symbol: str) -> Dict[str, Any]:
         history = self.get_trade_history(symbol)
@@ -1,13 +1,11 @@
 
 import os
-import requests
+from core.notification_outbox import enqueue_notification
 
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 TELEGRAM_USER_ID = os.getenv("TELEGRAM_USER_ID")
 SHIPMATE_DASHBOARD_URL = os.getenv("SHIPMATE_DASHBOARD_URL", "https://your-shipmate-url.com")
 
-TELEGRAM_API_URL = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-
 def send_overmind_alert(agent_name, problem_description, suggested_fix):
     if not TELEGRAM_BOT_TOKEN or not TELEGRAM_USER_ID:
         print("❌ Missing Telegram credentials.")
@@ -21,8 +19,6 @@ def send_overmind_alert(agent_name, problem_description, suggested_fix):
     )
 
     payload = {
-        "chat_id": TELEGRAM_USER_ID,
-        "text": message,
         "parse_mode": "Markdown",
         "reply_markup": {
             "inline_keyboard": [
@@ -33,11 +29,5 @@ def send_overmind_alert(agent_name, problem_description, suggested_fix):
         }
     }
 
-    try:
-        response = requests.post(TELEGRAM_API_URL, json=payload)
-        if response.status_code != 200:
-            print("❌ Telegram error:", response.text)
-        else:
-            print("✅ Telegram alert sent.")
-    except Exception as e:
-        print("❌ Failed to send Telegram alert:", str(e))
+    # Inline keyboards are per-alert, so these messages are never merged with others
+    enqueue_notification('telegram', f"Overmind Alert: {agent_name}", message, payload=payload, coalesce=False)
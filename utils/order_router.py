@@ -0,0 +1,595 @@
+# order_router.py
+
+import os
+import math
+import time
+import queue
+import random
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from utils.trade_utils import BrokerAPI, TradeOrder, TradeResult, AlpacaBroker, IBKRBroker
+
+logger = logging.getLogger("OrderRouter")
+logger.setLevel(logging.INFO)
+
+DEFAULT_RATE_PER_SECOND = float(os.getenv("ORDER_ROUTER_RATE", 5))
+DEFAULT_BURST = int(os.getenv("ORDER_ROUTER_BURST", 10))
+DEFAULT_MAX_BATCH_SIZE = 20
+DEFAULT_BATCH_WINDOW = 0.005       # seconds to wait for more orders before sending a batch
+DEFAULT_ORDER_TIMEOUT = 30.0
+LATENCY_SAMPLE_SIZE = 2048
+
+# --- Rate Limiting ---
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate` tokens per second, holding at most `capacity`.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, tokens: float = 1) -> float:
+        """
+        Takes tokens if available. Returns 0.0 on success, otherwise the seconds to wait.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return 0.0
+            return (tokens - self.tokens) / self.rate
+
+    def acquire(self, tokens: float = 1) -> float:
+        """
+        Blocks until the tokens are available. Returns the total time spent waiting.
+        """
+        tokens = min(tokens, self.capacity)
+        waited = 0.0
+        while True:
+            delay = self.try_acquire(tokens)
+            if delay <= 0:
+                return waited
+            time.sleep(delay)
+            waited += delay
+
+# --- Venue Adapters ---
+class VenueAdapter:
+    """
+    Uniform interface the router uses for every venue.
+
+    `supports_batch` venues send a whole batch as one API request (one rate-limit token);
+    the rest are charged one token per order.
+    """
+    supports_batch = False
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def connect(self):
+        pass
+
+    def submit(self, order: TradeOrder) -> TradeResult:
+        raise NotImplementedError
+
+    def submit_batch(self, orders: List[TradeOrder]) -> List[TradeResult]:
+        return [self.submit(order) for order in orders]
+
+    def requests_for(self, orders: List[TradeOrder]) -> int:
+        return 1 if self.supports_batch else len(orders)
+
+    def get_historical_data(self, symbol: str) -> Any:
+        return []
+
+    def fetch_ohlcv(self, symbol: str, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        The last `limit` closed 1-minute OHLCV bars, oldest first, or None when the venue
+        serves none (callers then use their own data).
+        """
+        return None
+
+    def get_account_info(self) -> Dict[str, Any]:
+        return {}
+
+class BrokerVenue(VenueAdapter):
+    """
+    Wraps an existing BrokerAPI implementation (AlpacaBroker, IBKRBroker, ...).
+    """
+
+    def __init__(self, name: str, broker: BrokerAPI):
+        super().__init__(name)
+        self.broker = broker
+
+    def submit(self, order: TradeOrder) -> TradeResult:
+        return self.broker.place_order(order)
+
+    def get_historical_data(self, symbol: str) -> Any:
+        return self.broker.get_historical_data(symbol)
+
+    def fetch_ohlcv(self, symbol: str, limit: int) -> Optional[List[Dict[str, Any]]]:
+        if hasattr(self.broker, "fetch_ohlcv"):
+            return self.broker.fetch_ohlcv(symbol, limit)
+        return None
+
+    def get_account_info(self) -> Dict[str, Any]:
+        return self.broker.get_account_info()
+
+class AlpacaConnectorVenue(VenueAdapter):
+    """
+    Wraps core.alpaca_connector.AlpacaConnector (string-returning API).
+    """
+
+    def __init__(self, connector, name: str = "alpaca"):
+        super().__init__(name)
+        self.connector = connector
+
+    def connect(self):
+        logger.info(self.connector.connect())
+
+    def submit(self, order: TradeOrder) -> TradeResult:
+        response = self.connector.submit_order(order.symbol, order.quantity, str(order.action).lower())
+        success = isinstance(response, str) and response.startswith("Order submitted")
+        return TradeResult(success=success, order_id="", fill_price=0.0,
+                           details={"broker": "Alpaca", "response": response})
+
+    def get_account_info(self) -> Dict[str, Any]:
+        balance = self.connector.get_account_balance()
+        if not isinstance(balance, dict):
+            return {}
+        return {"cash": balance["buying_power"], "equity": balance["equity"], "positions": {}}
+
+class KrakenConnectorVenue(VenueAdapter):
+    """
+    Wraps core.kraken_connector.KrakenConnector. Symbols like 'BTC/USD' become 'BTCUSD'.
+    """
+
+    def __init__(self, connector, name: str = "kraken"):
+        super().__init__(name)
+        self.connector = connector
+
+    def submit(self, order: TradeOrder) -> TradeResult:
+        pair = order.symbol.replace("/", "")
+        response = self.connector.submit_market_order(pair, str(order.action).lower(), order.quantity)
+        success = isinstance(response, str) and response.startswith("Order submitted successfully")
+        return TradeResult(success=success, order_id="", fill_price=0.0,
+                           details={"broker": "Kraken", "response": response})
+
+    def fetch_ohlcv(self, symbol: str, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Kraken's public 1-minute OHLC (at most its 720 most recent bars). The last row is
+        the forming bar and is left out.
+        """
+        rows = self.connector.get_ohlc(symbol.replace("/", ""), interval=1)
+        if not isinstance(rows, list):
+            raise RuntimeError(f"Kraken OHLC for {symbol} failed: {rows}")
+        return [
+            {"timestamp": float(row[0]), "open": float(row[1]), "high": float(row[2]), "low": float(row[3]),
+             "close": float(row[4]), "volume": float(row[6])}
+            for row in rows[:-1][-limit:]
+        ]
+
+    def get_account_info(self) -> Dict[str, Any]:
+        balance = self.connector.get_account_balance()
+        if not isinstance(balance, dict):
+            return {}
+        return {"cash": float(balance.get("ZUSD", 0)), "equity": float(balance.get("ZUSD", 0)), "positions": {}}
+
+class MockVenue(VenueAdapter):
+    """
+    In-process venue for offline testing: fixed round-trip latency per request,
+    optional random rejects, and a count of the requests it actually received.
+    """
+
+    def __init__(self, name: str = "mock", latency: float = 0.002, fill_price: float = 100.0,
+                 reject_rate: float = 0.0, supports_batch: bool = True):
+        super().__init__(name)
+        self.latency = latency
+        self.fill_price = fill_price
+        self.reject_rate = reject_rate
+        self.supports_batch = supports_batch
+        self.requests = 0
+        self.orders = 0
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def _fill(self, order: TradeOrder) -> TradeResult:
+        with self._lock:
+            self._sequence += 1
+            order_id = f"{self.name.upper()}-{self._sequence}"
+        if self.reject_rate and random.random() < self.reject_rate:
+            return TradeResult(success=False, order_id=order_id, fill_price=0.0,
+                               details={"broker": self.name, "mock": True, "error": "Rejected by mock venue"})
+        return TradeResult(success=True, order_id=order_id, fill_price=self.fill_price,
+                           details={"broker": self.name, "mock": True})
+
+    def submit(self, order: TradeOrder) -> TradeResult:
+        return self.submit_batch([order])[0]
+
+    def submit_batch(self, orders: List[TradeOrder]) -> List[TradeResult]:
+        requests = self.requests_for(orders)
+        time.sleep(self.latency * requests)
+        with self._lock:
+            self.requests += requests
+            self.orders += len(orders)
+        return [self._fill(order) for order in orders]
+
+    def get_historical_data(self, symbol: str) -> Any:
+        return [{"close": self.fill_price + i} for i in range(60)]
+
+    def fetch_ohlcv(self, symbol: str, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Synthetic 1-minute bars up to the last closed minute. Each minute's price depends
+        only on the symbol and the minute, so overlapping windows agree.
+        """
+        last = int(time.time() // 60) - 1
+        bars = []
+        for minute in range(last - limit + 1, last + 1):
+            rng = random.Random(f"{symbol}:{minute}")
+            open_ = self.fill_price * (1 + 0.02 * math.sin(minute / 240) + 0.002 * rng.uniform(-1, 1))
+            close = self.fill_price * (1 + 0.02 * math.sin((minute + 1) / 240) + 0.002 * rng.uniform(-1, 1))
+            bars.append({"timestamp": minute * 60.0, "open": open_, "high": max(open_, close) * (1 + 0.001 * rng.random()),
+                         "low": min(open_, close) * (1 - 0.001 * rng.random()), "close": close,
+                         "volume": rng.uniform(1, 10)})
+        return bars
+
+    def get_account_info(self) -> Dict[str, Any]:
+        return {"cash": 100000, "equity": 100000, "positions": {}}
+
+# --- Metrics ---
+class LatencyStats:
+    """
+    Bounded sample of latencies (seconds) with percentile summaries in milliseconds.
+    """
+
+    def __init__(self, size: int = LATENCY_SAMPLE_SIZE):
+        self.samples = deque(maxlen=size)
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def add(self, value: float):
+        with self.lock:
+            self.samples.append(value)
+            self.count += 1
+
+    def summary(self) -> Dict[str, float]:
+        with self.lock:
+            ordered = sorted(self.samples)
+            count = self.count
+        if not ordered:
+            return {"count": count, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+
+        def pct(p):
+            return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000, 3)
+
+        return {"count": count, "p50_ms": pct(0.50), "p95_ms": pct(0.95), "p99_ms": pct(0.99),
+                "max_ms": round(ordered[-1] * 1000, 3)}
+
+class _VenueLane:
+    """
+    Per-venue queue, token bucket, worker thread and counters. Counters are written by
+    submitting threads and the worker, so they change only under `lock`.
+    """
+
+    def __init__(self, adapter: VenueAdapter, rate: float, burst: int):
+        self.adapter = adapter
+        self.bucket = TokenBucket(rate, burst)
+        self.queue = queue.Queue()
+        self.worker = None
+        self.latency = LatencyStats()
+        self.queue_wait = LatencyStats()
+        self.submitted = 0
+        self.filled = 0
+        self.rejected = 0
+        self.errors = 0
+        self.cancelled = 0
+        self.batches = 0
+        self.throttled_seconds = 0.0
+        self.lock = threading.Lock()
+
+# --- Router ---
+class OrderRouter(BrokerAPI):
+    """
+    Routes orders from every trading agent to the right venue through one BrokerAPI.
+
+    Each venue has its own queue and worker thread. The worker drains whatever is queued
+    (up to max_batch_size, waiting batch_window for stragglers), waits on the venue's
+    token bucket, then submits the batch. submit() returns a Future immediately;
+    place_order() keeps the synchronous BrokerAPI contract. An order still queued when
+    its caller times out is cancelled and never sent; one already sent is waited for,
+    so every fill reaches the caller.
+    """
+
+    def __init__(self, default_venue: Optional[str] = None, routes: Optional[Dict[str, str]] = None,
+                 max_batch_size: int = DEFAULT_MAX_BATCH_SIZE, batch_window: float = DEFAULT_BATCH_WINDOW,
+                 order_timeout: float = DEFAULT_ORDER_TIMEOUT):
+        self.default_venue = default_venue
+        self.routes = dict(routes or {})
+        self.crypto_venue = None
+        self.max_batch_size = max_batch_size
+        self.batch_window = batch_window
+        self.order_timeout = order_timeout
+        self.lanes: Dict[str, _VenueLane] = {}
+        self.started_at = time.monotonic()
+        self._running = True
+
+    # --- Venue management ---
+    def add_venue(self, adapter: VenueAdapter, rate: float = DEFAULT_RATE_PER_SECOND, burst: int = DEFAULT_BURST,
+                  default: bool = False, crypto: bool = False):
+        """
+        Registers a venue with its rate limit (requests/second and burst size).
+        """
+        lane = _VenueLane(adapter, rate, burst)
+        self.lanes[adapter.name] = lane
+        if default or self.default_venue is None:
+            self.default_venue = adapter.name
+        if crypto:
+            self.crypto_venue = adapter.name
+        try:
+            adapter.connect()
+        except Exception as e:
+            logger.error(f"Failed to connect venue {adapter.name}: {e}")
+        lane.worker = threading.Thread(target=self._run_lane, args=(lane,), name=f"OrderRouter-{adapter.name}", daemon=True)
+        lane.worker.start()
+        logger.info(f"Venue {adapter.name} registered ({rate}/s, burst {burst}).")
+
+    def route(self, symbol: str) -> str:
+        """
+        Picks a venue: explicit symbol route, then crypto pairs ('BTC/USD') to the crypto venue, then the default.
+        """
+        if symbol in self.routes:
+            return self.routes[symbol]
+        if "/" in symbol and self.crypto_venue:
+            return self.crypto_venue
+        if not self.default_venue:
+            raise RuntimeError("OrderRouter has no venues configured.")
+        return self.default_venue
+
+    def stop(self):
+        self._running = False
+        for lane in self.lanes.values():
+            lane.queue.put(None)
+
+    # --- Submission ---
+    def submit(self, order: TradeOrder, venue: Optional[str] = None) -> Future:
+        """
+        Queues an order for its venue and returns a Future resolving to a TradeResult.
+        """
+        lane = self.lanes[venue or self.route(order.symbol)]
+        future = Future()
+        with lane.lock:
+            lane.submitted += 1
+        lane.queue.put((order, future, time.perf_counter()))
+        return future
+
+    def _await(self, future: Future) -> TradeResult:
+        try:
+            return future.result(timeout=self.order_timeout)
+        except FutureTimeout:
+            if future.cancel():
+                raise TimeoutError(f"Order not sent within {self.order_timeout}s; cancelled.")
+            # Already with the venue: its answer may be a fill, so it must reach the caller
+            logger.warning("Order in flight past %.1fs; waiting for the venue's answer.", self.order_timeout)
+            return future.result()
+
+    def place_order(self, order: TradeOrder) -> TradeResult:
+        return self._await(self.submit(order))
+
+    def place_orders(self, orders: List[TradeOrder]) -> List[TradeResult]:
+        """
+        Submits all orders at once so they batch per venue, then waits for every result.
+        """
+        futures = [self.submit(order) for order in orders]
+        return [self._await(future) for future in futures]
+
+    def submit_order(self, symbol: str, side: str, qty: float, order_type: str = 'market') -> Dict[str, Any]:
+        """
+        KrakenBroker-style compatibility call used by CryptoTraderAgent.
+        """
+        result = self.place_order(TradeOrder(symbol, str(side).upper(), qty, {"order_type": order_type}))
+        return {
+            'symbol': symbol,
+            'side': side,
+            'qty': qty,
+            'order_type': order_type,
+            'status': 'filled' if result.success else 'failed',
+            'order_id': result.order_id,
+            'fill_price': result.fill_price,
+            'error': result.details.get('error'),
+            'timestamp': datetime.utcnow().isoformat()
+        }
+
+    # --- BrokerAPI data calls ---
+    def get_historical_data(self, symbol: str) -> Any:
+        lane = self.lanes[self.route(symbol)]
+        lane.bucket.acquire()
+        return lane.adapter.get_historical_data(symbol)
+
+    def fetch_ohlcv(self, symbol: str, limit: int = 100) -> Optional[List[Dict[str, Any]]]:
+        """
+        1-minute OHLCV bars from the symbol's venue (None when it serves none), charged
+        to the venue's rate limit like any other request.
+        """
+        lane = self.lanes[self.route(symbol)]
+        lane.bucket.acquire()
+        return lane.adapter.fetch_ohlcv(symbol, limit)
+
+    def get_account_info(self) -> Dict[str, Any]:
+        """
+        Aggregated account across venues, with the per-venue breakdown under 'venues'.
+        """
+        combined = {"cash": 0.0, "equity": 0.0, "positions": {}, "venues": {}}
+        for name, lane in self.lanes.items():
+            try:
+                lane.bucket.acquire()
+                info = lane.adapter.get_account_info() or {}
+            except Exception as e:
+                logger.error(f"Account info failed for {name}: {e}")
+                continue
+            combined["venues"][name] = info
+            combined["cash"] += float(info.get("cash", 0) or 0)
+            combined["equity"] += float(info.get("equity", 0) or 0)
+            combined["positions"].update(info.get("positions", {}) or {})
+        return combined
+
+    def get_account_balance(self) -> Dict[str, Any]:
+        return self.get_account_info()
+
+    # --- Workers ---
+    def _collect_batch(self, lane: _VenueLane, first) -> list:
+        batch = [first]
+        limit = self.max_batch_size
+        if not lane.adapter.supports_batch:
+            # Per-order venues: never take more than one burst's worth of tokens at once
+            limit = max(1, min(limit, int(lane.bucket.capacity)))
+        deadline = time.perf_counter() + self.batch_window
+        while len(batch) < limit:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = lane.queue.get_nowait() if remaining <= 0 else lane.queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                lane.queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run_lane(self, lane: _VenueLane):
+        while self._running:
+            first = lane.queue.get()
+            if first is None:
+                break
+            collected = [first]
+            try:
+                collected = self._collect_batch(lane, first)
+                # Orders their callers gave up on (cancelled futures) are never sent
+                batch = [item for item in collected if item[1].set_running_or_notify_cancel()]
+                if len(batch) < len(collected):
+                    with lane.lock:
+                        lane.cancelled += len(collected) - len(batch)
+                if batch:
+                    self._send_batch(lane, batch)
+            except Exception as e:
+                # Keep the lane alive; fail whatever this batch left unanswered
+                logger.error(f"Venue {lane.adapter.name} worker error: {e}")
+                for _, future, _ in collected:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _send_batch(self, lane: _VenueLane, batch: list):
+        orders = [order for order, _, _ in batch]
+
+        throttled = lane.bucket.acquire(lane.adapter.requests_for(orders))
+        with lane.lock:
+            lane.throttled_seconds += throttled
+        sent_at = time.perf_counter()
+        for _, _, queued_at in batch:
+            lane.queue_wait.add(sent_at - queued_at)
+
+        errors = 0
+        try:
+            results = list(lane.adapter.submit_batch(orders))
+        except Exception as e:
+            logger.error(f"Venue {lane.adapter.name} batch of {len(orders)} failed: {e}")
+            errors = len(batch)
+            results = [self._failed(lane, str(e)) for _ in orders]
+        if len(results) != len(batch):
+            # Never leave a caller waiting on an order the venue did not answer for
+            logger.error(f"Venue {lane.adapter.name} returned {len(results)} results for {len(batch)} orders.")
+            errors += abs(len(batch) - len(results))
+            error = f"No result from venue (got {len(results)} for a batch of {len(batch)})"
+            results = results[:len(batch)] + [self._failed(lane, error) for _ in range(len(batch) - len(results))]
+
+        done_at = time.perf_counter()
+        filled = 0
+        for (_, _, queued_at), result in zip(batch, results):
+            lane.latency.add(done_at - queued_at)
+            filled += 1 if result.success else 0
+        with lane.lock:
+            lane.batches += 1
+            lane.errors += errors
+            lane.filled += filled
+            lane.rejected += len(batch) - filled
+        for (_, future, _), result in zip(batch, results):
+            future.set_result(result)
+
+    @staticmethod
+    def _failed(lane: _VenueLane, error: str) -> TradeResult:
+        return TradeResult(success=False, order_id="", fill_price=0.0,
+                           details={"broker": lane.adapter.name, "error": error})
+
+    # --- Metrics ---
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Per-venue submission latency (queue to result), queue wait, throughput and throttling.
+        """
+        elapsed = max(time.monotonic() - self.started_at, 1e-9)
+        metrics = {}
+        for name, lane in self.lanes.items():
+            with lane.lock:
+                submitted, filled, rejected = lane.submitted, lane.filled, lane.rejected
+                errors, batches, throttled = lane.errors, lane.batches, lane.throttled_seconds
+                cancelled = lane.cancelled
+            completed = filled + rejected
+            metrics[name] = {
+                "submitted": submitted,
+                "filled": filled,
+                "rejected": rejected,
+                "errors": errors,
+                "cancelled": cancelled,
+                "pending": lane.queue.qsize(),
+                "batches": batches,
+                "avg_batch_size": round(completed / batches, 2) if batches else 0.0,
+                "orders_per_second": round(completed / elapsed, 2),
+                "throttled_seconds": round(throttled, 3),
+                "latency": lane.latency.summary(),
+                "queue_wait": lane.queue_wait.summary()
+            }
+        return metrics
+
+def build_default_router(paper: bool = True) -> OrderRouter:
+    """
+    Router over the Alpaca (default) and IBKR brokers plus Kraken for crypto. Kraken has
+    no paper environment, so paper routers fill crypto on a mock venue; live routers use
+    the real KrakenConnector and fail to build without it rather than fall back to the mock.
+    """
+    if paper:
+        crypto_venue = MockVenue("kraken", fill_price=30000.0, supports_batch=False)
+    else:
+        from core.kraken_connector import KrakenConnector
+        crypto_venue = KrakenConnectorVenue(KrakenConnector())
+    router = OrderRouter()
+    router.add_venue(BrokerVenue("alpaca", AlpacaBroker(paper=paper)), rate=3, burst=6, default=True)
+    router.add_venue(BrokerVenue("ibkr", IBKRBroker(paper=paper)), rate=50, burst=50)
+    router.add_venue(crypto_venue, rate=1, burst=15, crypto=True)
+    return router
+
+if __name__ == "__main__":
+    # Offline burst test against in-process mock venues
+    logging.basicConfig(level=logging.INFO)
+    router = OrderRouter()
+    router.add_venue(MockVenue("equities", latency=0.005), rate=20, burst=5, default=True)
+    router.add_venue(MockVenue("crypto", latency=0.005, supports_batch=False), rate=200, burst=20, crypto=True)
+
+    burst = [TradeOrder(f"SYM{i % 25}", "BUY", 1, {}) for i in range(500)]
+    burst += [TradeOrder("BTC/USD", "SELL", 0.01, {}) for _ in range(200)]
+    start = time.perf_counter()
+    results = router.place_orders(burst)
+    elapsed = time.perf_counter() - start
+    print(f"{len(results)} orders in {elapsed:.2f}s ({len(results) / elapsed:.0f} orders/s)")
+    for venue, stats in router.get_metrics().items():
+        print(venue, stats)
+    router.stop()
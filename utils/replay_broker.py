@@ -0,0 +1,263 @@
+# replay_broker.py
+
+import os
+import csv
+import time
+import random
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from utils.trade_utils import BrokerAPI, TradeAction, TradeOrder, TradeResult
+
+logger = logging.getLogger("ReplayBroker")
+logger.setLevel(logging.INFO)
+
+DEFAULT_HISTORY_LIMIT = 100
+DEFAULT_SYNTHETIC_BARS = 1000
+
+class ReplayBrokerError(ConnectionError):
+    """
+    Raised for injected API failures so callers see the same exception family as a dropped connection.
+    """
+    pass
+
+class ReplayBroker(BrokerAPI):
+    """
+    Local BrokerAPI that replays recorded or synthetic OHLCV and simulates fills.
+
+    Recorded bars are read from `<data_dir>/<SYMBOL>.csv` (timestamp, open, high, low, close, volume;
+    'BTC/USD' is looked up as 'BTC_USD.csv'). Symbols without a file get a deterministic random-walk
+    series seeded from the symbol name, so any universe size works offline.
+
+    Every call can be delayed by `latency` +/- `jitter` seconds and fail with probability
+    `error_rate`. Orders fill at the current bar's close plus `slippage_bps`, and with probability
+    `partial_fill_rate` only part of the quantity fills. advance() moves the replay clock forward.
+    """
+
+    def __init__(
+        self,
+        data_dir: Optional[str] = None,
+        seed: int = 42,
+        synthetic_bars: int = DEFAULT_SYNTHETIC_BARS,
+        history_limit: int = DEFAULT_HISTORY_LIMIT,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        partial_fill_rate: float = 0.0,
+        slippage_bps: float = 0.0,
+        starting_cash: float = 100000.0,
+    ):
+        self.data_dir = data_dir
+        self.seed = seed
+        self.synthetic_bars = synthetic_bars
+        self.history_limit = history_limit
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.partial_fill_rate = partial_fill_rate
+        self.slippage_bps = slippage_bps
+        self.cash = float(starting_cash)
+        self.positions: Dict[str, Dict[str, float]] = {}
+        self.stats = {"data_calls": 0, "orders": 0, "fills": 0, "partial_fills": 0, "errors": 0}
+        self._series: Dict[str, List[Dict[str, float]]] = {}
+        self._cursor = history_limit
+        self._order_sequence = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.RLock()
+
+    # --- Market data ---
+    def _load_series(self, symbol: str) -> List[Dict[str, float]]:
+        series = self._series.get(symbol)
+        if series is None:
+            path = os.path.join(self.data_dir, f"{symbol.replace('/', '_')}.csv") if self.data_dir else None
+            if path and os.path.isfile(path):
+                series = self._read_csv(path)
+            else:
+                series = self._synthesize(symbol)
+            self._series[symbol] = series
+        return series
+
+    def _read_csv(self, path: str) -> List[Dict[str, float]]:
+        with open(path, newline="") as f:
+            return [
+                {
+                    "timestamp": row.get("timestamp"),
+                    "open": float(row["open"]),
+                    "high": float(row["high"]),
+                    "low": float(row["low"]),
+                    "close": float(row["close"]),
+                    "volume": float(row["volume"]),
+                }
+                for row in csv.DictReader(f)
+            ]
+
+    def _synthesize(self, symbol: str) -> List[Dict[str, float]]:
+        # Deterministic per symbol: same seed + symbol always yields the same bars
+        digest = hashlib.sha1(f"{self.seed}:{symbol}".encode()).digest()
+        rng = np.random.default_rng(int.from_bytes(digest[:8], "little"))
+        n = self.synthetic_bars
+        start_price = 20 + rng.random() * 480
+        returns = rng.normal(0.0, 0.01 + rng.random() * 0.02, n)
+        close = start_price * np.exp(np.cumsum(returns))
+        open_ = np.concatenate(([start_price], close[:-1]))
+        spread = np.abs(rng.normal(0.0, 0.005, n)) * close
+        high = np.maximum(open_, close) + spread
+        low = np.minimum(open_, close) - spread
+        volume = rng.integers(10_000, 1_000_000, n)
+        start = datetime(2024, 1, 1)
+        return [
+            {
+                "timestamp": (start + timedelta(minutes=i)).isoformat(),
+                "open": float(open_[i]),
+                "high": float(high[i]),
+                "low": float(low[i]),
+                "close": float(close[i]),
+                "volume": float(volume[i]),
+            }
+            for i in range(n)
+        ]
+
+    def _window(self, symbol: str, limit: int) -> List[Dict[str, float]]:
+        series = self._load_series(symbol)
+        end = min(self._cursor, len(series))
+        return series[max(0, end - limit):end]
+
+    def _current_price(self, symbol: str) -> float:
+        window = self._window(symbol, 1)
+        return window[-1]["close"] if window else 0.0
+
+    def advance(self, steps: int = 1) -> int:
+        """
+        Moves the replay clock forward; returns the new bar index.
+        """
+        with self._lock:
+            self._cursor += steps
+            return self._cursor
+
+    def reset(self):
+        with self._lock:
+            self._cursor = self.history_limit
+
+    # --- Timing and failure simulation ---
+    def _simulate_call(self, operation: str):
+        if self.latency or self.jitter:
+            delay = self.latency + self._rng.uniform(-self.jitter, self.jitter)
+            if delay > 0:
+                time.sleep(delay)
+        if self.error_rate and self._rng.random() < self.error_rate:
+            with self._lock:
+                self.stats["errors"] += 1
+            raise ReplayBrokerError(f"Injected {operation} failure")
+
+    # --- BrokerAPI ---
+    def get_historical_data(self, symbol: str, limit: Optional[int] = None) -> List[Dict[str, float]]:
+        self._simulate_call("market data")
+        with self._lock:
+            self.stats["data_calls"] += 1
+            return self._window(symbol, limit or self.history_limit)
+
+    def fetch_ohlcv(self, symbol: str, limit: int = DEFAULT_HISTORY_LIMIT) -> List[Dict[str, float]]:
+        """
+        OHLCV window ending at the replay clock (what the agents' fetch_market_data expects).
+        """
+        return self.get_historical_data(symbol, limit)
+
+    def get_account_info(self) -> Dict[str, Any]:
+        self._simulate_call("account")
+        with self._lock:
+            equity = self.cash + sum(
+                position["quantity"] * self._current_price(symbol) for symbol, position in self.positions.items()
+            )
+            return {
+                "cash": round(self.cash, 2),
+                "equity": round(equity, 2),
+                "positions": {symbol: dict(position) for symbol, position in self.positions.items()},
+            }
+
+    def place_order(self, order: TradeOrder) -> TradeResult:
+        with self._lock:
+            self._order_sequence += 1
+            order_id = f"REPLAY-{self._order_sequence}"
+            self.stats["orders"] += 1
+        try:
+            self._simulate_call("order")
+        except ReplayBrokerError as e:
+            return TradeResult(success=False, order_id=order_id, fill_price=0.0,
+                               details={"broker": "Replay", "error": str(e)})
+
+        action = str(order.action).upper()
+        if action not in (TradeAction.BUY, TradeAction.SELL) or order.quantity <= 0:
+            return TradeResult(success=False, order_id=order_id, fill_price=0.0,
+                               details={"broker": "Replay", "error": f"Unfillable order: {action} {order.quantity}"})
+
+        with self._lock:
+            quantity = order.quantity
+            partial = False
+            if self.partial_fill_rate and self._rng.random() < self.partial_fill_rate:
+                fraction = self._rng.uniform(0.1, 0.9)
+                filled = int(quantity * fraction) if isinstance(quantity, int) else quantity * fraction
+                if filled > 0:
+                    quantity, partial = filled, True
+
+            direction = 1 if action == TradeAction.BUY else -1
+            price = self._current_price(order.symbol) * (1 + direction * self.slippage_bps / 10000)
+            position = self.positions.setdefault(order.symbol, {"quantity": 0, "avg_price": 0.0})
+            total = position["quantity"] + direction * quantity
+            if total == 0:
+                del self.positions[order.symbol]
+            else:
+                if position["quantity"] * total < 0:
+                    # Flipped through flat: the remainder opened at this fill
+                    position["avg_price"] = price
+                elif abs(total) > abs(position["quantity"]):
+                    # Adding to the position (long or short) moves the average entry price
+                    position["avg_price"] = (
+                        position["avg_price"] * abs(position["quantity"]) + price * quantity
+                    ) / abs(total)
+                position["quantity"] = total
+            self.cash -= direction * price * quantity
+
+            self.stats["fills"] += 1
+            if partial:
+                self.stats["partial_fills"] += 1
+
+        return TradeResult(
+            success=True,
+            order_id=order_id,
+            fill_price=round(price, 4),
+            details={
+                "broker": "Replay",
+                "requested_quantity": order.quantity,
+                "filled_quantity": quantity,
+                "partial": partial,
+                "bar": self._cursor,
+            },
+        )
+
+    # --- KrakenBroker-style compatibility (CryptoTraderAgent) ---
+    def submit_order(self, symbol: str, side: str, qty: float, order_type: str = 'market') -> Dict[str, Any]:
+        result = self.place_order(TradeOrder(symbol, str(side).upper(), qty, {"order_type": order_type}))
+        return {
+            'symbol': symbol,
+            'side': side,
+            'qty': result.details.get('filled_quantity', qty),
+            'order_type': order_type,
+            'status': 'filled' if result.success else 'failed',
+            'order_id': result.order_id,
+            'fill_price': result.fill_price,
+            'partial': result.details.get('partial', False),
+            'error': result.details.get('error'),
+            'timestamp': datetime.utcnow().isoformat()
+        }
+
+    def get_account_balance(self) -> Dict[str, Any]:
+        account = self.get_account_info()
+        balance = {"USD": account["cash"]}
+        for symbol, position in account["positions"].items():
+            balance[symbol.split("/")[0]] = position["quantity"]
+        return balance
@@ -0,0 +1,348 @@
+# risk_engine.py
+
+import logging
+import threading
+from typing import Dict, Any, Iterable, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger("RiskEngine")
+logger.setLevel(logging.INFO)
+
+INITIAL_CAPACITY = 64
+DEFAULT_VAR_WINDOW = 250          # return observations kept for historical VaR
+UNASSIGNED_SECTOR = "Unassigned"
+
+class RiskEngine:
+    """
+    Portfolio book held in NumPy arrays indexed by asset.
+
+    Asset -> index and asset -> sector are dictionary/array lookups, so recording a
+    trade or checking an order is O(1). Daily losses accumulate per sector as trades
+    arrive instead of being re-summed. Exposure, VaR and drawdown are computed with
+    vector operations over the whole book, cheap enough to run before every order.
+    """
+
+    def __init__(self, starting_cash: float = 0.0, var_window: int = DEFAULT_VAR_WINDOW,
+                 max_gross_exposure: Optional[float] = None, max_position_value: Optional[float] = None):
+        self.cash = float(starting_cash)
+        self.var_window = var_window
+        self.max_gross_exposure = max_gross_exposure
+        self.max_position_value = max_position_value
+
+        self.asset_index: Dict[str, int] = {}
+        self.assets = []
+        self.sector_index: Dict[str, int] = {}
+        self.sectors = []
+
+        capacity = INITIAL_CAPACITY
+        self.positions = np.zeros(capacity)
+        self.avg_cost = np.zeros(capacity)
+        self.prices = np.zeros(capacity)
+        self.realized_pnl = np.zeros(capacity)
+        self.asset_sector = np.zeros(capacity, dtype=np.int32)
+        # Ring buffer of per-asset simple returns, one row per price update
+        self.returns = np.zeros((var_window, capacity))
+        self.returns_count = 0
+        self.returns_head = 0
+
+        self.daily_loss = np.zeros(0)
+        self.daily_loss_limit = np.zeros(0)
+        self.loss_threshold_percent = np.zeros(0)
+        # Drawdown baseline: sector value at the last reset (or registration), the net cash
+        # put into the sector since, and its peak gross exposure since
+        self.sector_start_value = np.zeros(0)
+        self.sector_flows = np.zeros(0)
+        self.sector_capital = np.zeros(0)
+        self.sector_locked = np.zeros(0, dtype=bool)
+
+        self.equity_peak = None
+        self._lock = threading.RLock()
+        self.add_sector(UNASSIGNED_SECTOR)
+
+    # --- Registry ---
+    def add_sector(self, name: str, assets: Iterable[str] = (), daily_loss_limit: float = np.inf,
+                   loss_threshold_percent: float = np.inf) -> int:
+        with self._lock:
+            sector_id = self.sector_index.get(name)
+            is_new = sector_id is None
+            if is_new:
+                sector_id = len(self.sectors)
+                self.sector_index[name] = sector_id
+                self.sectors.append(name)
+                self.daily_loss = np.append(self.daily_loss, 0.0)
+                self.daily_loss_limit = np.append(self.daily_loss_limit, daily_loss_limit)
+                self.loss_threshold_percent = np.append(self.loss_threshold_percent, loss_threshold_percent)
+                self.sector_start_value = np.append(self.sector_start_value, 0.0)
+                self.sector_flows = np.append(self.sector_flows, 0.0)
+                self.sector_capital = np.append(self.sector_capital, 0.0)
+                self.sector_locked = np.append(self.sector_locked, False)
+            else:
+                self.daily_loss_limit[sector_id] = daily_loss_limit
+                self.loss_threshold_percent[sector_id] = loss_threshold_percent
+            for asset in assets:
+                i = self._asset_id(asset)
+                if self.asset_sector[i] != sector_id:
+                    self._move_asset(i, sector_id, carry=not is_new)
+            if is_new:
+                # Baseline from what the sector holds now rather than 0 until the first reset_daily()
+                self.sector_start_value[sector_id] = self.sector_values()[sector_id]
+                self._update_capital(sector_id)
+            return sector_id
+
+    def _move_asset(self, i: int, sector_id: int, carry: bool = True):
+        """
+        Reassigns an asset; a held position leaves its old sector like a sale and, with
+        `carry`, enters the new sector's baseline like a purchase.
+        """
+        value = self.positions[i] * self.prices[i]
+        if value:
+            self.sector_flows[self.asset_sector[i]] -= value
+            if carry:
+                self.sector_flows[sector_id] += value
+                self._update_capital(sector_id)
+        self.asset_sector[i] = sector_id
+
+    def _update_capital(self, sector_id: int):
+        n = self._n()
+        in_sector = self.asset_sector[:n] == sector_id
+        exposure = np.abs(self.market_values()[in_sector]).sum()
+        self.sector_capital[sector_id] = max(self.sector_capital[sector_id], exposure)
+
+    def _asset_id(self, asset: str) -> int:
+        index = self.asset_index.get(asset)
+        if index is None:
+            index = len(self.assets)
+            if index >= len(self.positions):
+                self._grow()
+            self.asset_index[asset] = index
+            self.assets.append(asset)
+        return index
+
+    def _grow(self):
+        capacity = len(self.positions) * 2
+        for name in ("positions", "avg_cost", "prices", "realized_pnl"):
+            array = getattr(self, name)
+            grown = np.zeros(capacity)
+            grown[:len(array)] = array
+            setattr(self, name, grown)
+        sectors = np.zeros(capacity, dtype=np.int32)
+        sectors[:len(self.asset_sector)] = self.asset_sector
+        self.asset_sector = sectors
+        returns = np.zeros((self.var_window, capacity))
+        returns[:, :self.returns.shape[1]] = self.returns
+        self.returns = returns
+
+    def sector_of(self, asset: str) -> str:
+        index = self.asset_index.get(asset)
+        return self.sectors[self.asset_sector[index]] if index is not None else UNASSIGNED_SECTOR
+
+    # --- Book updates ---
+    def update_prices(self, prices: Dict[str, float]):
+        """
+        Marks assets to market and appends one row of returns for VaR.
+        """
+        with self._lock:
+            indices = np.fromiter((self._asset_id(asset) for asset in prices), dtype=np.int64, count=len(prices))
+            new_prices = np.fromiter(prices.values(), dtype=float, count=len(prices))
+            old_prices = self.prices[indices]
+            row = np.zeros(self.returns.shape[1])
+            valid = old_prices > 0
+            row[indices[valid]] = new_prices[valid] / old_prices[valid] - 1.0
+            self.returns[self.returns_head] = row
+            self.returns_head = (self.returns_head + 1) % self.var_window
+            self.returns_count = min(self.returns_count + 1, self.var_window)
+            self.prices[indices] = new_prices
+            self._update_peak()
+
+    def record_trade(self, asset: str, quantity: float, price: Optional[float] = None,
+                     realized: Optional[float] = None) -> float:
+        """
+        Applies a fill (quantity > 0 buys, < 0 sells) at `price` (default: the last mark).
+        Returns the realized P/L of the fill (computed from average cost unless given) and
+        adds any loss to the sector's daily accumulator.
+        """
+        with self._lock:
+            i = self._asset_id(asset)
+            price = float(price) if price else self.prices[i]
+            position = self.positions[i]
+            realized = float(realized) if realized is not None else self._realized(i, quantity, price)
+            new_position = position + quantity
+            if new_position == 0:
+                self.avg_cost[i] = 0.0
+            elif position == 0 or np.sign(new_position) != np.sign(position):
+                self.avg_cost[i] = price
+            elif abs(new_position) > abs(position):
+                self.avg_cost[i] = (self.avg_cost[i] * abs(position) + price * abs(quantity)) / abs(new_position)
+            self.positions[i] = new_position
+            self.prices[i] = price
+            self.cash -= quantity * price
+            sector_id = self.asset_sector[i]
+            self.sector_flows[sector_id] += quantity * price
+            self._update_capital(sector_id)
+            if realized:
+                self.realized_pnl[i] += realized
+                if realized < 0:
+                    self.daily_loss[self.asset_sector[i]] -= realized
+            self._update_peak()
+            return realized
+
+    def _realized(self, i: int, quantity: float, price: float) -> float:
+        position = self.positions[i]
+        if position and np.sign(position) != np.sign(quantity):
+            closed = min(abs(quantity), abs(position))
+            return float(closed * (price - self.avg_cost[i]) * np.sign(position))
+        return 0.0
+
+    def realized_for(self, asset: str, quantity: float, price: Optional[float] = None) -> float:
+        """
+        Realized P/L a fill would book against the current average cost, without applying it.
+        """
+        with self._lock:
+            i = self.asset_index.get(asset)
+            if i is None:
+                return 0.0
+            return self._realized(i, quantity, float(price) if price else self.prices[i])
+
+    def record_pnl(self, asset: str, amount: float, is_profit: bool = True):
+        """
+        Adds an externally computed trade outcome to the sector accumulators.
+        """
+        with self._lock:
+            i = self._asset_id(asset)
+            amount = abs(amount)
+            self.realized_pnl[i] += amount if is_profit else -amount
+            if not is_profit:
+                self.daily_loss[self.asset_sector[i]] += amount
+
+    def reset_daily(self):
+        """
+        Clears daily loss accumulators and locks, and snapshots sector values as the day's baseline.
+        """
+        with self._lock:
+            self.daily_loss[:] = 0.0
+            self.sector_locked[:] = False
+            self.sector_start_value = self.sector_values()
+            self.sector_flows[:] = 0.0
+            self.sector_capital = self.sector_exposure()
+            self.realized_pnl[:] = 0.0
+
+    # --- Vectorized measures ---
+    def _n(self) -> int:
+        return len(self.assets)
+
+    def market_values(self) -> np.ndarray:
+        n = self._n()
+        return self.positions[:n] * self.prices[:n]
+
+    def equity(self) -> float:
+        return float(self.cash + self.market_values().sum())
+
+    def _update_peak(self):
+        equity = self.equity()
+        if self.equity_peak is None or equity > self.equity_peak:
+            self.equity_peak = equity
+
+    def sector_values(self) -> np.ndarray:
+        n = self._n()
+        return np.bincount(self.asset_sector[:n], weights=self.market_values(), minlength=len(self.sectors))
+
+    def sector_exposure(self) -> np.ndarray:
+        n = self._n()
+        return np.bincount(self.asset_sector[:n], weights=np.abs(self.market_values()), minlength=len(self.sectors))
+
+    def drawdown_amount(self) -> float:
+        if self.equity_peak is None:
+            return 0.0
+        return max(0.0, self.equity_peak - self.equity())
+
+    def drawdown(self) -> float:
+        if not self.equity_peak or self.equity_peak <= 0:
+            return 0.0
+        return self.drawdown_amount() / self.equity_peak
+
+    def sector_drawdown_percent(self) -> np.ndarray:
+        """
+        Loss since the baseline (start value plus net cash put in, less current value) as a
+        percentage of the sector's peak gross exposure, so closing a position is not a drawdown.
+        """
+        basis = self.sector_start_value + self.sector_flows
+        capital = self.sector_capital
+        current = self.sector_values()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            drawdown = np.where(capital > 0, (basis - current) / capital * 100, 0.0)
+        return np.maximum(drawdown, 0.0)
+
+    def value_at_risk(self, confidence: float = 0.95) -> float:
+        """
+        One-period historical VaR of the current book (positive number = potential loss).
+        """
+        with self._lock:
+            if self.returns_count < 2:
+                return 0.0
+            n = self._n()
+            scenarios = self.returns[:self.returns_count, :n] @ self.market_values()
+            return float(max(0.0, -np.percentile(scenarios, (1 - confidence) * 100)))
+
+    # --- Checks ---
+    def evaluate_limits(self) -> np.ndarray:
+        """
+        Locks every sector whose daily loss or drawdown breached its limit. Returns newly locked sector ids.
+        """
+        with self._lock:
+            breached = (self.daily_loss >= self.daily_loss_limit) | \
+                (self.sector_drawdown_percent() >= self.loss_threshold_percent)
+            newly_locked = np.flatnonzero(breached & ~self.sector_locked)
+            self.sector_locked |= breached
+            return newly_locked
+
+    def check_order(self, asset: str, quantity: float, price: Optional[float] = None) -> Tuple[bool, str]:
+        """
+        Pre-trade check: sector lock, sector daily loss, position and gross exposure limits.
+        """
+        with self._lock:
+            # Look up without registering: checks must not grow the book
+            i = self.asset_index.get(asset)
+            sector_id = self.asset_sector[i] if i is not None else self.sector_index[UNASSIGNED_SECTOR]
+            sector = self.sectors[sector_id]
+            if self.sector_locked[sector_id]:
+                return False, f"{sector} trading is locked."
+            if self.daily_loss[sector_id] >= self.daily_loss_limit[sector_id]:
+                return False, f"{sector} daily loss ${self.daily_loss[sector_id]:.2f} is at its limit."
+
+            position = self.positions[i] if i is not None else 0.0
+            if price is None:
+                price = self.prices[i] if i is not None else 0.0
+            new_value = abs((position + quantity) * price)
+            if self.max_position_value is not None and new_value > self.max_position_value:
+                return False, f"{asset} position ${new_value:.2f} would exceed ${self.max_position_value:.2f}."
+            if self.max_gross_exposure is not None:
+                gross = np.abs(self.market_values()).sum() - abs(position * price) + new_value
+                if gross > self.max_gross_exposure:
+                    return False, f"Gross exposure ${gross:.2f} would exceed ${self.max_gross_exposure:.2f}."
+            return True, "Approved."
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            values = self.market_values()
+            exposure = self.sector_exposure()
+            drawdown = self.sector_drawdown_percent()
+            return {
+                "equity": round(self.equity(), 2),
+                "cash": round(self.cash, 2),
+                "gross_exposure": round(float(np.abs(values).sum()), 2),
+                "net_exposure": round(float(values.sum()), 2),
+                "var_95": round(self.value_at_risk(0.95), 2),
+                "var_99": round(self.value_at_risk(0.99), 2),
+                "drawdown": round(self.drawdown_amount(), 2),
+                "drawdown_percent": round(self.drawdown() * 100, 2),
+                "sectors": {
+                    name: {
+                        "exposure": round(float(exposure[i]), 2),
+                        "daily_loss": round(float(self.daily_loss[i]), 2),
+                        "drawdown_percent": round(float(drawdown[i]), 2),
+                        "locked": bool(self.sector_locked[i]),
+                    }
+                    for i, name in enumerate(self.sectors)
+                },
+            }
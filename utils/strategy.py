@@ -2,7 +2,7 @@
 # strategy.py
 
 from abc import ABC, abstractmethod
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 from utils.trade_utils import TradeAction
 
 class BaseStrategy(ABC):
@@ -38,8 +38,8 @@ class SimpleMomentumStrategy(BaseStrategy):
         self,
         symbol: str,
         indicators: Dict[str, float],
-        trade_history: List[Dict],
-        account_info: Dict,
+        trade_history: Optional[List[Dict]] = None,
+        account_info: Optional[Dict] = None,
     ) -> Tuple[str, float, Dict]:
         close = indicators.get("close")
         rsi = indicators.get("rsi")
@@ -0,0 +1,164 @@
+# trade_records.py
+
+import json
+import struct
+from typing import NamedTuple, Optional, Dict, Any, Iterator, BinaryIO
+
+try:
+    import msgpack
+except ImportError:  # optional: compact JSON is used when msgpack is not installed
+    msgpack = None
+
+FRAME_HEADER = struct.Struct(">I")
+
+# --- Record Types ---
+# NamedTuples carry no per-instance __dict__, are immutable, and pack directly as arrays.
+
+class IndicatorSnapshot(NamedTuple):
+    close: Optional[float] = None
+    rsi: Optional[float] = None
+    sma: Optional[float] = None
+    ema: Optional[float] = None
+    macd: Optional[float] = None
+    macd_signal: Optional[float] = None
+    bb_upper: Optional[float] = None
+    bb_lower: Optional[float] = None
+    bb_width: Optional[float] = None
+    atr: Optional[float] = None
+    vwap: Optional[float] = None
+    momentum: Optional[float] = None
+
+    @classmethod
+    def from_dict(cls, indicators: Dict[str, Optional[float]]) -> "IndicatorSnapshot":
+        return cls._make(map(indicators.get, cls._fields))
+
+    def get(self, key: str, default=None):
+        return getattr(self, key, default)
+
+class Fill(NamedTuple):
+    order_id: str
+    symbol: str
+    action: str
+    quantity: float
+    price: float
+    timestamp: str
+    venue: Optional[str] = None
+    partial: bool = False
+
+    def get(self, key: str, default=None):
+        return getattr(self, key, default)
+
+class TradeDecision(NamedTuple):
+    symbol: str
+    timestamp: str
+    decision: str
+    position_size: float
+    confidence: float
+    rationale: Dict[str, Any]
+    vetoed: bool = False
+    success: Optional[bool] = None
+    order_id: Optional[str] = None
+    fill_price: Optional[float] = None
+    indicators: Optional[IndicatorSnapshot] = None
+
+    def get(self, key: str, default=None):
+        """
+        Dict-style read access so code written against the old metadata dicts keeps working.
+        """
+        return getattr(self, key, default)
+
+    @classmethod
+    def _from_packed(cls, fields) -> "TradeDecision":
+        record = cls._make(fields)
+        if record.indicators is not None and not isinstance(record.indicators, IndicatorSnapshot):
+            record = record._replace(indicators=IndicatorSnapshot._make(record.indicators))
+        return record
+
+RECORD_TYPES = {
+    "I": IndicatorSnapshot,
+    "F": Fill,
+    "D": TradeDecision,
+}
+_RECORD_TAGS = {cls: tag for tag, cls in RECORD_TYPES.items()}
+
+def is_record(value) -> bool:
+    return type(value) in _RECORD_TAGS
+
+# --- Serialization ---
+def _plain(value):
+    """
+    Packs numpy scalars and arrays (indicator values, strategy rationale) as Python
+    numbers and lists; anything else unserializable is an error rather than a string.
+    """
+    if type(value).__module__ == "numpy":
+        if hasattr(value, "tolist"):
+            return value.tolist()
+    raise TypeError(f"Cannot pack {type(value).__name__} in a trade record")
+
+def pack(record) -> bytes:
+    """
+    Serializes a record as [tag, *fields] with msgpack, or compact JSON as a fallback.
+    """
+    payload = [_RECORD_TAGS[type(record)], *record]
+    if msgpack is not None:
+        return msgpack.packb(payload, use_bin_type=True, default=_plain)
+    return json.dumps(payload, separators=(",", ":"), default=_plain).encode("utf-8")
+
+def unpack(data: bytes):
+    if msgpack is not None and data[:1] != b"[":
+        payload = msgpack.unpackb(data, raw=False)
+    else:
+        payload = json.loads(data)
+    cls = RECORD_TYPES[payload[0]]
+    loader = getattr(cls, "_from_packed", cls._make)
+    return loader(payload[1:])
+
+def to_dict(record) -> Dict[str, Any]:
+    """
+    Plain-dict view (nested records included) for JSON APIs and legacy consumers.
+    """
+    return {
+        key: (value._asdict() if is_record(value) else value)
+        for key, value in record._asdict().items()
+    }
+
+def history_dict(record) -> Dict[str, Any]:
+    """
+    A record in the trade-history dict shape: to_dict(), plus the "order" and "result"
+    entries executed trades carried before decisions were slotted records.
+    """
+    entry = to_dict(record)
+    if type(record) is TradeDecision and record.success is not None:
+        entry["order"] = {
+            "symbol": record.symbol,
+            "action": record.decision,
+            "quantity": record.position_size,
+            "rationale": record.rationale,
+        }
+        entry["result"] = {
+            "success": record.success,
+            "order_id": record.order_id,
+            "fill_price": record.fill_price,
+            "details": {},
+        }
+    return entry
+
+# --- Length-prefixed frames for append-only logs ---
+def write_frame(stream: BinaryIO, record):
+    data = pack(record)
+    stream.write(FRAME_HEADER.pack(len(data)) + data)
+
+def iter_frames(stream: BinaryIO) -> Iterator[tuple]:
+    """
+    Yields (record, end_offset) for each complete frame; stops at a truncated tail
+    (e.g. a write in progress from another process).
+    """
+    while True:
+        header = stream.read(FRAME_HEADER.size)
+        if len(header) < FRAME_HEADER.size:
+            return
+        (length,) = FRAME_HEADER.unpack(header)
+        data = stream.read(length)
+        if len(data) < length:
+            return
+        yield unpack(data), stream.tell()
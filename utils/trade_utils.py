@@ -15,6 +15,8 @@ class TradeAction:
 
 # --- TradeOrder and TradeResult Definitions ---
 class TradeOrder:
+    __slots__ = ("symbol", "action", "quantity", "rationale")
+
     def __init__(self, symbol: str, action: str, quantity: int, rationale: Dict[str, Any]):
         self.symbol = symbol
         self.action = action
@@ -30,6 +32,8 @@ class TradeOrder:
         }
 
 class TradeResult:
+    __slots__ = ("success", "order_id", "fill_price", "details")
+
     def __init__(self, success: bool, order_id: str, fill_price: float, details: Dict[str, Any]):
         self.success = success
         self.order_id = order_id